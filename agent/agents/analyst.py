@@ -1,6 +1,7 @@
 # agents/analyst.py
 from orchestration.state import ResearchState
 from memory.vector_memory import VectorMemory
+from utils.context_budget import build_context
 
 #graph_mem = GraphMemory()
 
@@ -24,6 +25,18 @@ def analyst_agent(state: ResearchState, vector_mem: VectorMemory) -> ResearchSta
         state["analysis_decision"] = "need_more_info"
         return state
 
+    # --- Assemble context (do NOT summarize here) ---
+    # built even when asking for more info, so a job that runs out of
+    # research budget can still be summarized from the best hits so far
+    # within the token budget, near-duplicates and per-URL excess dropped
+    vectors = vector_mem.vectors(v["id"] for v in vector_hits)
+    state["final_context"], report = build_context(vector_hits, vectors)
+    state["context_report"] = report
+    print(
+        f"[analyst] Context: kept {report['kept']}/{report['hits']} hits, "
+        f"{report['tokens_out']} tokens ({report['tokens_saved']} saved)"
+    )
+
     avg_score = sum(v["score"] for v in vector_hits) / len(vector_hits)
     print(f"[analyst] Average vector score: {avg_score:.4f}")
     # --- 2. Graph reasoning ---
@@ -51,16 +64,9 @@ def analyst_agent(state: ResearchState, vector_mem: VectorMemory) -> ResearchSta
     #else:
     state["analysis_decision"] = "ready"
 
-    # --- 4. Assemble context (do NOT summarize here) ---
-    context_blocks = []
-    for v in vector_hits:
-        context_blocks.append(f"[SOURCE]\n{v['chunk']}")
-
     #for g in graph_hits[:10]: 
     #    context_blocks.append(
     #        f"[GRAPH] {g['source']} --{g['relation']}--> {g['target']}"
     #    )
 
-    state["final_context"] = "\n\n".join(context_blocks)
-
     return state
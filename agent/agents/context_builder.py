@@ -1,8 +1,7 @@
 from orchestration.state import ResearchState
+from utils.context_budget import build_context
 
-def context_builder_agent(state: ResearchState) -> ResearchState:
-    parts = []
-
+def context_builder_agent(state: ResearchState, vector_mem=None) -> ResearchState:
     vector_results = state.get("vector_results", [])
     graph_results = state.get("graph_results", [])
 
@@ -10,17 +9,12 @@ def context_builder_agent(state: ResearchState) -> ResearchState:
         state["final_context"] = ""
         return state
 
-    # Vector memory context
-    for item in vector_results:
-        parts.append(
-            f"[SOURCE]\n{item.get('chunk', '')}"
-        )
-
-    # Graph memory context
-    for rel in graph_results:
-        parts.append(
-            f"[GRAPH]\n{rel['source']} --{rel['relation']}--> {rel['target']}"
-        )
+    # Vector memory context, budgeted and diversified; graph memory context
+    vectors = None
+    if vector_mem is not None and vector_results:
+        vectors = vector_mem.vectors(item["id"] for item in vector_results)
 
-    state["final_context"] = "\n\n".join(parts)
+    state["final_context"], state["context_report"] = build_context(
+        vector_results, vectors, graph_results
+    )
     return state
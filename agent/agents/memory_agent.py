@@ -27,9 +27,10 @@ def memory_agent(state: ResearchState, vector_mem: VectorMemory) -> ResearchStat
     #print("Chunking process over", time.strftime("%X"))
     print("[memory] Storing into vector and graph memory...")
     
-    # Vector memory
-    for url, chunk_id, text in all_chunks:
-        vector_mem.add_chunks(url, [(chunk_id, text)])
+    # Vector memory: one batched ingest for the whole round
+    stored = vector_mem.add_chunks_bulk(all_chunks)
+    print(f"[memory] Stored {len(stored)} new chunks ({len(all_chunks) - len(stored)} duplicates skipped)")
+    print(f"[memory] Embedding cache: {vector_mem.embed_cache.stats()}")
     #print("Storing process over in vector memory", time.strftime("%X"))
     
     # Graph memory
@@ -2,9 +2,35 @@ from tools.fetch_web import FetchWebTool
 from orchestration.state import ResearchState
 from config import Config
 
-def research_agent(state: ResearchState) -> ResearchState:
+# one search phrasing per research round, so later rounds find new pages
+ROUND_QUERIES = [
+    "Academic Research areas on {query}",
+    "{query} recent research papers",
+    "{query} literature review survey",
+    "{query} open problems and future directions",
+    "{query} applications and case studies",
+]
+
+def research_agent(state: ResearchState, vector_mem=None) -> ResearchState:
     n_results = Config.N_RESULTS
-    docs = FetchWebTool().fetch_query("Academic Research areas on " + state["query"], n_results=n_results)
+    research_round = state.get("research_round", 0)
+    seen = set(state.get("seen_urls", []))
+
+    template = ROUND_QUERIES[research_round % len(ROUND_QUERIES)]
+    tool = FetchWebTool()
+    # the job's remaining byte budget caps this round
+    tool.max_round_bytes = min(
+        tool.max_round_bytes, max(0, Config.MAX_JOB_BYTES - state.get("bytes_fetched", 0))
+    )
+
+    urls = tool.search(template.format(query=state["query"]), n_results=n_results)
+    new_urls = [url for url in urls if url not in seen]
+    known = vector_mem.known_urls(new_urls) if vector_mem is not None else set()
+    to_fetch = [url for url in new_urls if url not in known]
+    print(f"[research] Round {research_round + 1}: {len(urls)} results, "
+          f"{len(urls) - len(new_urls)} seen this job, {len(known)} already in memory")
+
+    docs = tool.fetch_urls(to_fetch)
     valid_docs = []
 
     for doc in docs:
@@ -14,6 +40,9 @@ def research_agent(state: ResearchState) -> ResearchState:
             print("[research] Skipped non-text or binary document")
 
     state["fetched_docs"] = valid_docs
+    state["research_round"] = research_round + 1
+    state["seen_urls"] = list(seen) + new_urls
+    state["bytes_fetched"] = state.get("bytes_fetched", 0) + tool.bytes_fetched
     return state
 
 def is_valid_text(text: str) -> bool:
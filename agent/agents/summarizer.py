@@ -1,14 +1,20 @@
 # agents/summarizer.py
 from time import sleep
 
-from tools.call_llm import call_llm
+from tools.call_llm import call_llm_stream
 from orchestration.state import ResearchState
 
-def summarizer_agent(state: ResearchState) -> ResearchState:
+def summarizer_agent(state: ResearchState, config=None) -> ResearchState:
+    """
+    Streams the summary from the LLM. When the run config carries a
+    `token_sink` (see utils.token_stream.TokenStream) each piece is
+    relayed to it as it arrives.
+    """
     from config import Config
     import logging
     
     logger = logging.getLogger(__name__)
+    sink = (config or {}).get("configurable", {}).get("token_sink")
     
     prompt = f"""
     Give some potential research areas using the context below. 
@@ -24,11 +30,17 @@ def summarizer_agent(state: ResearchState) -> ResearchState:
         try:
             print("Calling LLM for summarization...")
             print(f"Attempt {no + 1} of {trials}")
-            result = call_llm(prompt)
-            state["final_context"] = result
+            pieces = []
+            for piece in call_llm_stream(prompt):
+                pieces.append(piece)
+                if sink is not None:
+                    sink.put(piece)
+            state["final_context"] = "".join(pieces)
             return state
         except Exception as e:
             logger.error(f"Error calling LLM: {e}. Retrying...")
+            if sink is not None:
+                sink.reset()
             sleep(3)  # Wait before retrying
             continue
     logger.error("Failed to call LLM after multiple attempts.")
@@ -1,4 +1,19 @@
+import time
+
 from orchestration.state import ResearchState
+from config import Config
+
+
+def budget_exhausted(state: ResearchState) -> str:
+    """Name of the first spent budget (rounds, time, bytes), or ""."""
+    if state.get("research_round", 0) >= Config.MAX_RESEARCH_ROUNDS:
+        return "rounds"
+    if time.time() - state.get("started_at", time.time()) >= Config.MAX_JOB_SECONDS:
+        return "time"
+    if state.get("bytes_fetched", 0) >= Config.MAX_JOB_BYTES:
+        return "bytes"
+    return ""
+
 
 def supervisor_agent(state: ResearchState) -> ResearchState:
     logs = state.setdefault("logs", [])
@@ -6,6 +21,7 @@ def supervisor_agent(state: ResearchState) -> ResearchState:
     # INITIAL ENTRY — bootstrap flow
     if not state.get("next_step"):
         state["next_step"] = "research"
+        state.setdefault("started_at", time.time())
         print("[supervisor] Bootstrapping → research")
         return state
 
@@ -15,8 +31,19 @@ def supervisor_agent(state: ResearchState) -> ResearchState:
         print("[supervisor] Analysis ready → summarize")
 
     elif state.get("analysis_decision") == "need_more_info":
-        state["next_step"] = "research"
-        print("[supervisor] Need more info → research")
+        spent = budget_exhausted(state)
+        if not spent:
+            state["next_step"] = "research"
+            print("[supervisor] Need more info → research")
+        elif state.get("vector_results"):
+            # out of budget: answer with the best context we have
+            state["next_step"] = "summarize"
+            logs.append(f"Research budget ({spent}) spent; summarizing best available context")
+            print(f"[supervisor] Budget ({spent}) spent → summarize")
+        else:
+            state["next_step"] = "end"
+            state["final_context"] = "No relevant sources were found within the research budget."
+            print(f"[supervisor] Budget ({spent}) spent with no sources → end")
         
     else:
         state["next_step"] = "end"
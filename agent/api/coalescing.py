@@ -0,0 +1,172 @@
+"""
+Coalescing of concurrent research jobs for the same query.
+"""
+import logging
+import threading
+
+from api.job_executor import JobCancelled
+from tools.search_cache import normalize_query
+
+logger = logging.getLogger(__name__)
+
+# how often a job waiting on another job's run checks its own cancellation
+CANCEL_POLL = 0.5
+
+
+class _Group:
+    """
+    The jobs attached to one in-flight graph run. Acts as the run's
+    token sink, relaying to every member's stream; members that attach
+    late get the tokens emitted so far first.
+    """
+
+    def __init__(self):
+        self.members = {}  # job_id -> (sink, is_cancelled)
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self._on_done = []
+        self._events = []
+        self._lock = threading.Lock()
+
+    def attach(self, job_id, sink, is_cancelled, on_done=None):
+        with self._lock:
+            self.members[job_id] = (sink, is_cancelled)
+            if on_done is not None:
+                self._on_done.append(on_done)
+            if sink is not None:
+                for kind, token in self._events:
+                    sink.put(token) if kind == "token" else sink.reset()
+
+    def detach(self, job_id):
+        with self._lock:
+            self.members.pop(job_id, None)
+
+    def job_ids(self):
+        with self._lock:
+            return list(self.members)
+
+    def put(self, token):
+        self._relay("token", token)
+
+    def reset(self):
+        self._relay("reset", "")
+
+    def _relay(self, kind, token):
+        with self._lock:
+            self._events.append((kind, token))
+            for sink, _ in self.members.values():
+                if sink is not None:
+                    sink.put(token) if kind == "token" else sink.reset()
+
+    def all_cancelled(self):
+        """The shared run may stop only when nobody wants its result."""
+        with self._lock:
+            members = list(self.members.values())
+        return all(is_cancelled() for _, is_cancelled in members)
+
+    def finish(self):
+        """Wake waiting members and run joined jobs' callbacks."""
+        self.done.set()
+        for on_done in self._on_done:
+            try:
+                on_done(self.result, self.error)
+            except Exception as e:
+                logger.error(f"Coalesced job callback failed: {e}", exc_info=True)
+
+
+class ResearchCoalescer:
+    """
+    Concurrent jobs whose queries normalize to the same key share one
+    graph execution and all receive its result. The run stops early only
+    if every attached job is cancelled.
+
+    A job can attach when it is submitted (join), so it never takes an
+    executor worker, or when a worker starts it (run). Either way the
+    group is created and removed under one lock, so no job can attach to
+    a run that has already ended.
+    """
+
+    def __init__(self):
+        self._groups = {}
+        self._lock = threading.Lock()
+        self.executions = 0
+        self.coalesced = 0
+
+    def join(self, query, job_id, sink, is_cancelled, on_done, on_join=None):
+        """
+        Attach a job to the identical run in flight, if any. `on_join()`
+        is called under the lock once it is attached (so always before
+        the run can end) and `on_done(result, error)` from the running
+        job's thread when it ends. Returns False if nothing is in flight.
+        """
+        with self._lock:
+            group = self._groups.get(normalize_query(query))
+            if group is None:
+                return False
+            if on_join is not None:
+                on_join()
+            group.attach(job_id, sink, is_cancelled, on_done)
+            self.coalesced += 1
+        return True
+
+    def run(self, query, job_id, sink, is_cancelled, fn):
+        """
+        Run `fn(sink, should_stop)` for `query`, or wait for the identical
+        run already in flight. Returns (result, shared).
+        """
+        key = normalize_query(query)
+        while True:
+            with self._lock:
+                group = self._groups.get(key)
+                leader = group is None
+                if leader:
+                    group = self._groups[key] = _Group()
+                    self.executions += 1
+                else:
+                    self.coalesced += 1
+                group.attach(job_id, sink, is_cancelled)
+
+            if leader:
+                return self._lead(key, group, fn), False
+
+            try:
+                # a cancelled job stops waiting without the others
+                while not group.done.wait(CANCEL_POLL):
+                    if is_cancelled():
+                        raise JobCancelled()
+            finally:
+                group.detach(job_id)
+            if group.error is None:
+                return group.result, True
+            if not isinstance(group.error, JobCancelled) or is_cancelled():
+                raise group.error
+            # the shared run was stopped for jobs other than this one
+            if sink is not None:
+                sink.reset()
+
+    def _lead(self, key, group, fn):
+        try:
+            group.result = fn(group, group.all_cancelled)
+            return group.result
+        except BaseException as e:
+            group.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._groups[key]
+            group.finish()
+
+    def job_ids(self):
+        """Ids of the jobs attached to runs in flight."""
+        with self._lock:
+            return [job_id for group in self._groups.values() for job_id in group.job_ids()]
+
+    def stats(self):
+        with self._lock:
+            in_flight = len(self._groups)
+        return {
+            "graph_runs": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": in_flight,
+        }
@@ -0,0 +1,99 @@
+"""
+Bounded worker pool for research jobs.
+"""
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class QueueFull(Exception):
+    """Raised by JobExecutor.submit when every queue slot is taken."""
+
+
+class JobCancelled(Exception):
+    """Raised inside a job that noticed its cancel event."""
+
+
+class JobExecutor:
+    """
+    Runs research jobs on `workers` dedicated threads, with at most
+    `max_queue` more waiting. Each job function receives a
+    threading.Event as its last argument and should stop (e.g. raise
+    JobCancelled) once it is set.
+    """
+
+    def __init__(self, workers, max_queue):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="research-job")
+        self._queued = OrderedDict()  # job_id -> Future, not started yet
+        self._cancel = {}             # job_id -> Event, queued or running
+        self._lock = threading.Lock()
+
+    def submit(self, job_id, fn, *args):
+        """Queue `fn(*args, cancel_event)`; raises QueueFull when full."""
+        with self._lock:
+            if len(self._queued) >= self.max_queue:
+                raise QueueFull(f"{len(self._queued)} jobs already waiting")
+            cancel = self._cancel[job_id] = threading.Event()
+            self._queued[job_id] = self._pool.submit(self._run, job_id, fn, args, cancel)
+
+    def _run(self, job_id, fn, args, cancel):
+        with self._lock:
+            self._queued.pop(job_id, None)
+        try:
+            if cancel.is_set():
+                return None  # cancelled while a worker was picking it up
+            return fn(*args, cancel)
+        finally:
+            with self._lock:
+                self._cancel.pop(job_id, None)
+
+    def position(self, job_id):
+        """1-based place in the waiting queue; 0 once running or unknown."""
+        with self._lock:
+            for pos, queued_id in enumerate(self._queued, 1):
+                if queued_id == job_id:
+                    return pos
+        return 0
+
+    def cancel(self, job_id):
+        """
+        Stop a job. Returns "cancelled" for a job that never started,
+        "cancelling" for a running job that was signalled, or None.
+        """
+        with self._lock:
+            future = self._queued.pop(job_id, None)
+            cancel = self._cancel.pop(job_id, None) if future else self._cancel.get(job_id)
+        if future is not None:
+            cancel.set()
+            future.cancel()
+            return "cancelled"
+        if cancel is not None:
+            cancel.set()
+            return "cancelling"
+        return None
+
+    def job_ids(self):
+        """Ids of the jobs this executor still owns, queued or running."""
+        with self._lock:
+            return list(self._cancel)
+
+    def stats(self):
+        with self._lock:
+            queued = len(self._queued)
+            running = len(self._cancel) - queued
+        return {
+            "workers": self.workers,
+            "running": running,
+            "queued": queued,
+            "max_queue": self.max_queue,
+        }
+
+    def shutdown(self):
+        """Drop queued jobs and signal running ones; does not wait."""
+        with self._lock:
+            for event in self._cancel.values():
+                event.set()
+            self._queued.clear()
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,339 @@
+"""
+Storage for research jobs and conversation history.
+
+Two backends with the same interface:
+  - MemoryJobStore: per-process, LRU-bounded with a TTL
+  - SqliteJobStore: on disk, survives restarts and is shared by every
+    uvicorn worker pointed at the same file
+
+Both apply the same lifetime rules. A queued/processing job is kept
+while the process running it refreshes its heartbeat (update_job or
+heartbeat()); once the heartbeat is `stale_after` seconds old, the job
+is marked as interrupted. Every other job and conversation expires
+`ttl` seconds after it was created.
+"""
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# jobs in these states are never evicted while their heartbeat is fresh
+ACTIVE_STATUSES = ("queued", "processing")
+
+# what a job whose worker went away (crash, restart) is turned into
+INTERRUPTED = {
+    "status": "error",
+    "error": "Interrupted: the worker running this job stopped",
+    "progress": "Error: interrupted",
+}
+
+
+class MemoryJobStore:
+    """
+    Jobs and conversations in OrderedDicts, least recently used first.
+    Expired entries are dropped, and the least recently used inactive
+    jobs beyond `max_jobs` (conversations beyond `max_jobs`) are evicted.
+    """
+
+    def __init__(self, max_jobs=1000, ttl=7 * 24 * 3600, stale_after=120):
+        self.max_jobs = max_jobs
+        self.ttl = ttl
+        self.stale_after = stale_after
+        self._jobs = OrderedDict()           # job_id -> (created, job)
+        self._heartbeats = {}                # job_id -> last heartbeat
+        self._conversations = OrderedDict()  # conversation_id -> (created, messages)
+        self._lock = threading.Lock()
+
+    def create_job(self, job_id, job):
+        with self._lock:
+            now = time.time()
+            self._jobs[job_id] = (now, dict(job))
+            self._heartbeats[job_id] = now
+            self._evict()
+
+    def update_job(self, job_id, **fields):
+        """Returns False if the job no longer exists (e.g. deleted)."""
+        with self._lock:
+            entry = self._jobs.get(job_id)
+            if entry is None:
+                return False
+            entry[1].update(fields)
+            self._heartbeats[job_id] = time.time()
+            return True
+
+    def heartbeat(self, job_ids):
+        """Mark `job_ids` as still owned by a live worker."""
+        with self._lock:
+            now = time.time()
+            for job_id in job_ids:
+                if job_id in self._jobs:
+                    self._heartbeats[job_id] = now
+
+    def reap(self):
+        """Mark active jobs with a stale heartbeat as interrupted."""
+        with self._lock:
+            return self._reap()
+
+    def get_job(self, job_id):
+        with self._lock:
+            self._reap([job_id])
+            entry = self._jobs.get(job_id)
+            if entry is None or (self._expired(entry[0]) and not self._active(self._jobs, job_id)):
+                return None
+            self._jobs.move_to_end(job_id)
+            return dict(entry[1])
+
+    def delete_job(self, job_id):
+        with self._lock:
+            self._heartbeats.pop(job_id, None)
+            return self._jobs.pop(job_id, None) is not None
+
+    def list_jobs(self, offset=0, limit=50):
+        """(jobs newest first as [(job_id, job)], total)."""
+        with self._lock:
+            self._evict()
+            items = sorted(self._jobs.items(), key=lambda kv: kv[1][0], reverse=True)
+            page = [(job_id, dict(job)) for job_id, (_, job) in items[offset:offset + limit]]
+            return page, len(items)
+
+    def create_conversation(self, conversation_id):
+        with self._lock:
+            if conversation_id not in self._conversations:
+                self._conversations[conversation_id] = (time.time(), [])
+                self._evict()
+
+    def append_message(self, conversation_id, message):
+        with self._lock:
+            entry = self._conversations.setdefault(conversation_id, (time.time(), []))
+            entry[1].append(dict(message))
+            self._conversations.move_to_end(conversation_id)
+
+    def get_conversation(self, conversation_id):
+        with self._lock:
+            entry = self._conversations.get(conversation_id)
+            if entry is None or self._expired(entry[0]):
+                return None
+            self._conversations.move_to_end(conversation_id)
+            return list(entry[1])
+
+    def _expired(self, created):
+        return time.time() - created >= self.ttl
+
+    def _reap(self, job_ids=None):
+        cutoff = time.time() - self.stale_after
+        reaped = 0
+        for job_id in list(self._jobs) if job_ids is None else job_ids:
+            if (job_id in self._jobs and self._active(self._jobs, job_id)
+                    and self._heartbeats.get(job_id, 0) <= cutoff):
+                self._jobs[job_id][1].update(INTERRUPTED)
+                reaped += 1
+        return reaped
+
+    def _evict(self):
+        self._reap()
+        for store in (self._jobs, self._conversations):
+            for key, (created, _) in list(store.items()):
+                if self._expired(created) and not self._active(store, key):
+                    del store[key]
+            excess = len(store) - self.max_jobs
+            for key in list(store):
+                if excess <= 0:
+                    break
+                if not self._active(store, key):
+                    del store[key]
+                    excess -= 1
+        for job_id in list(self._heartbeats):
+            if job_id not in self._jobs:
+                del self._heartbeats[job_id]
+
+    def _active(self, store, key):
+        return store is self._jobs and store[key][1].get("status") in ACTIVE_STATUSES
+
+
+class SqliteJobStore:
+    """
+    Jobs and conversation messages as JSON rows in SQLite (WAL mode, so
+    readers in other processes don't block the writer). Expired rows
+    are pruned on write.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            data TEXT NOT NULL,
+            created REAL NOT NULL,
+            heartbeat REAL NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS jobs_created ON jobs(created);
+        CREATE TABLE IF NOT EXISTS conversations (
+            id TEXT PRIMARY KEY,
+            created REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS messages (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            conversation_id TEXT NOT NULL REFERENCES conversations(id),
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS messages_conversation ON messages(conversation_id);
+    """
+
+    def __init__(self, path, ttl=7 * 24 * 3600, stale_after=120):
+        self.ttl = ttl
+        self.stale_after = stale_after
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), check_same_thread=False, timeout=10)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(self.SCHEMA)
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(jobs)")}
+        if "heartbeat" not in columns:
+            # files from before heartbeats: their active rows count as stale
+            self._db.execute("ALTER TABLE jobs ADD COLUMN heartbeat REAL NOT NULL DEFAULT 0")
+        self._db.commit()
+
+    def create_job(self, job_id, job):
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO jobs(id, data, created, heartbeat) VALUES (?, ?, ?, ?)",
+                (job_id, json.dumps(job), now, now),
+            )
+            self._prune(now)
+
+    def update_job(self, job_id, **fields):
+        with self._lock, self._db:
+            row = self._db.execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return False
+            job = json.loads(row[0])
+            job.update(fields)
+            self._db.execute(
+                "UPDATE jobs SET data = ?, heartbeat = ? WHERE id = ?",
+                (json.dumps(job), time.time(), job_id),
+            )
+            return True
+
+    def heartbeat(self, job_ids):
+        """Mark `job_ids` as still owned by a live worker."""
+        now = time.time()
+        with self._lock, self._db:
+            self._db.executemany(
+                "UPDATE jobs SET heartbeat = ? WHERE id = ?", [(now, job_id) for job_id in job_ids]
+            )
+
+    def reap(self):
+        """Mark active jobs with a stale heartbeat as interrupted."""
+        with self._lock, self._db:
+            return self._reap(time.time())
+
+    def get_job(self, job_id):
+        now = time.time()
+        with self._lock, self._db:
+            self._reap(now, job_id)
+            row = self._db.execute(
+                f"SELECT data FROM jobs WHERE id = ? AND {self._LIVE}",
+                (job_id, now - self.ttl, *ACTIVE_STATUSES),
+            ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def delete_job(self, job_id):
+        with self._lock, self._db:
+            return self._db.execute("DELETE FROM jobs WHERE id = ?", (job_id,)).rowcount > 0
+
+    def list_jobs(self, offset=0, limit=50):
+        now = time.time()
+        live = (now - self.ttl, *ACTIVE_STATUSES)
+        with self._lock, self._db:
+            self._reap(now)
+            total = self._db.execute(
+                f"SELECT COUNT(*) FROM jobs WHERE {self._LIVE}", live
+            ).fetchone()[0]
+            rows = self._db.execute(
+                f"SELECT id, data FROM jobs WHERE {self._LIVE} "
+                "ORDER BY created DESC LIMIT ? OFFSET ?",
+                (*live, limit, offset),
+            ).fetchall()
+        return [(job_id, json.loads(data)) for job_id, data in rows], total
+
+    def create_conversation(self, conversation_id):
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR IGNORE INTO conversations(id, created) VALUES (?, ?)",
+                (conversation_id, time.time()),
+            )
+
+    def append_message(self, conversation_id, message):
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR IGNORE INTO conversations(id, created) VALUES (?, ?)",
+                (conversation_id, time.time()),
+            )
+            self._db.execute(
+                "INSERT INTO messages(conversation_id, data) VALUES (?, ?)",
+                (conversation_id, json.dumps(message)),
+            )
+
+    def get_conversation(self, conversation_id):
+        with self._lock:
+            found = self._db.execute(
+                "SELECT 1 FROM conversations WHERE id = ? AND created > ?",
+                (conversation_id, time.time() - self.ttl),
+            ).fetchone()
+            if found is None:
+                return None
+            rows = self._db.execute(
+                "SELECT data FROM messages WHERE conversation_id = ? ORDER BY seq",
+                (conversation_id,),
+            ).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    # rows still visible: not expired, or active (i.e. heartbeat fresh once reaped)
+    _LIVE = (
+        "(created > ? OR json_extract(data, '$.status') IN "
+        f"({','.join('?' * len(ACTIVE_STATUSES))}))"
+    )
+
+    def _reap(self, now, job_id=None):
+        placeholders = ",".join("?" * len(ACTIVE_STATUSES))
+        query = (
+            f"SELECT id, data FROM jobs WHERE heartbeat <= ? "
+            f"AND json_extract(data, '$.status') IN ({placeholders})"
+        )
+        params = [now - self.stale_after, *ACTIVE_STATUSES]
+        if job_id is not None:
+            query += " AND id = ?"
+            params.append(job_id)
+        rows = self._db.execute(query, params).fetchall()
+        for stale_id, data in rows:
+            job = json.loads(data)
+            job.update(INTERRUPTED)
+            self._db.execute("UPDATE jobs SET data = ? WHERE id = ?", (json.dumps(job), stale_id))
+        return len(rows)
+
+    def _prune(self, now):
+        self._reap(now)
+        cutoff = now - self.ttl
+        placeholders = ",".join("?" * len(ACTIVE_STATUSES))
+        self._db.execute(
+            f"DELETE FROM jobs WHERE created <= ? "
+            f"AND json_extract(data, '$.status') NOT IN ({placeholders})",
+            (cutoff, *ACTIVE_STATUSES),
+        )
+        self._db.execute(
+            "DELETE FROM messages WHERE conversation_id IN "
+            "(SELECT id FROM conversations WHERE created <= ?)",
+            (cutoff,),
+        )
+        self._db.execute("DELETE FROM conversations WHERE created <= ?", (cutoff,))
+
+
+def make_job_store():
+    """The store selected by JOB_STORE ("memory" or "sqlite")."""
+    from config import Config
+
+    if Config.JOB_STORE == "sqlite":
+        Config.JOB_STORE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        return SqliteJobStore(Config.JOB_STORE_PATH, Config.JOB_TTL, Config.JOB_STALE_AFTER)
+    if Config.JOB_STORE == "memory":
+        return MemoryJobStore(Config.JOB_STORE_MAX, Config.JOB_TTL, Config.JOB_STALE_AFTER)
+    raise ValueError(f"Unknown JOB_STORE {Config.JOB_STORE!r}; expected 'memory' or 'sqlite'")
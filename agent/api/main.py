@@ -3,11 +3,13 @@ FastAPI backend for the Research Agent web application.
 """
 import os
 import sys
+import time
 import uuid
 import asyncio
+import threading
 from typing import Dict, Optional
 from pathlib import Path
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from contextlib import asynccontextmanager
@@ -20,30 +22,84 @@ sys.path.insert(0, str(parent_dir))
 
 from config import Config
 from utils.logging_config import setup_logging
-from orchestration.graph import build_graph
+from utils.token_stream import TokenStream
+from api.job_executor import JobExecutor, JobCancelled, QueueFull
+from api.job_store import make_job_store
+from api.coalescing import ResearchCoalescer
 
 # Setup logging
 setup_logging()
 import logging
 logger = logging.getLogger(__name__)
 
-# Global state for job tracking
-jobs: Dict[str, Dict] = {}
-conversations: Dict[str, List[Dict]] = {}
+# Jobs and conversation history (in-memory LRU/TTL or SQLite, see JOB_STORE)
+store = make_job_store()
+# Summarizer output of this process's unfinished jobs, relayed by
+# /api/jobs/{job_id}/stream; finished jobs are replayed from the store
+streams: Dict[str, TokenStream] = {}
+# Dedicated workers for graph runs, with a bounded waiting queue
+executor = JobExecutor(Config.JOB_WORKERS, Config.JOB_QUEUE_SIZE)
+# Concurrent jobs for the same normalized query share one graph run
+coalescer = ResearchCoalescer()
 
-# Initialize graph
+# The graph (and with it langgraph, the embedding model and the index) is
+# built on first use or by the background warmup, never at import time
 graph = None
+_graph_lock = threading.Lock()
+readiness = {"status": "starting", "ready_after": None, "error": None}
+_started = time.monotonic()
+
+def _build_graph():
+    from orchestration.graph import build_graph
+    return build_graph(warm=True)
+
+def get_graph():
+    """The compiled graph, built once; callers block while it loads."""
+    global graph
+    with _graph_lock:
+        if graph is None:
+            readiness["status"] = "warming"
+            try:
+                graph = _build_graph()
+            except Exception as e:
+                readiness.update(status="error", error=str(e))
+                raise
+            readiness.update(status="ready", ready_after=round(time.monotonic() - _started, 3))
+            logger.info(f"Research graph ready after {readiness['ready_after']}s")
+        return graph
+
+def _warmup():
+    try:
+        get_graph()
+    except Exception as e:
+        logger.error(f"Warmup failed: {e}", exc_info=True)
+
+def _heartbeat(stop):
+    """Keep this process's queued/running jobs from being reaped as stale."""
+    while not stop.wait(Config.JOB_STALE_AFTER / 4):
+        try:
+            store.heartbeat(executor.job_ids() + coalescer.job_ids())
+            store.reap()
+        except Exception as e:
+            logger.error(f"Job heartbeat failed: {e}", exc_info=True)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan context manager for startup/shutdown."""
-    global graph
     Config.validate()
     Config.ensure_directories()
-    graph = build_graph()
+    # jobs left queued/processing by a process that died are marked interrupted
+    store.reap()
+    stop_heartbeat = threading.Event()
+    threading.Thread(target=_heartbeat, args=(stop_heartbeat,), name="job-heartbeat", daemon=True).start()
+    if Config.WARMUP:
+        # serve liveness checks at once; /health/ready flips when loaded
+        threading.Thread(target=_warmup, name="warmup", daemon=True).start()
     logger.info("Research Agent API started")
     yield
     logger.info("Research Agent API shutting down")
+    stop_heartbeat.set()
+    executor.shutdown()
 
 app = FastAPI(
     title="Research Agent API",
@@ -70,6 +126,7 @@ class ResearchResponse(BaseModel):
     job_id: str
     status: str
     message: str
+    queue_position: Optional[int] = None
 
 class JobStatusResponse(BaseModel):
     job_id: str
@@ -80,64 +137,178 @@ class JobStatusResponse(BaseModel):
     citations: Optional[list] = None
     error: Optional[str] = None
     created_at: Optional[str] = None
+    queue_position: Optional[int] = None
 
 class ConversationRequest(BaseModel):
     query: str
     conversation_id: Optional[str] = None
 
-def run_research_job(job_id: str, query: str, n_results: int, conversation_id: Optional[str] = None):
-    """Run the research job synchronously."""
+def run_graph(query: str, token_sink, should_stop):
+    """
+    One graph execution, stepped node by node so `should_stop` can end
+    it (with JobCancelled) between nodes.
+    """
+    result = None
+    for result in get_graph().stream({
+        "query": query,
+        "fetched_docs": [],
+        "vector_results": [],
+        "graph_results": [],
+        "final_context": "",
+        "next_step": ""
+    }, {"recursion_limit": 50, "configurable": {"token_sink": token_sink}},
+            stream_mode="values"):
+        if should_stop():
+            raise JobCancelled()
+    return result
+
+def _cancel_check(job_id: str, cancel_event=None):
+    def is_cancelled():
+        # DELETE may have been served by another worker process
+        return (cancel_event is not None and cancel_event.is_set()) or store.get_job(job_id) is None
+    return is_cancelled
+
+def finish_job(job_id: str, query: str, conversation_id: Optional[str], result=None, shared=False,
+               error=None):
+    """Record a job's result (or `error`) and close its token stream."""
     from datetime import datetime
     
     try:
-        jobs[job_id]["status"] = "processing"
-        jobs[job_id]["progress"] = "Starting research..."
-        jobs[job_id]["created_at"] = datetime.now().isoformat()
-        
-        result = graph.invoke({
-            "query": query,
-            "fetched_docs": [],
-            "vector_results": [],
-            "graph_results": [],
-            "final_context": "",
-            "next_step": ""
-        }, {"recursion_limit": 50})
+        if error is not None:
+            raise error
+        if shared:
+            logger.info(f"Research job {job_id} joined an identical in-flight run")
         
-        # Extract sources and create citations
+        # Extract sources and create citations. Rounds skip URLs already in
+        # memory, so cite what the answer was built from, not just this
+        # round's downloads.
         sources = []
         citations = []
-        if "fetched_docs" in result:
-            for idx, doc in enumerate(result.get("fetched_docs", []), 1):
-                url = doc.get("url", "")
-                sources.append({"url": url, "title": url})
-                citations.append({
-                    "id": idx,
-                    "url": url,
-                    "title": url.split("/")[-1] or url
-                })
+        urls = [hit.get("url", "") for hit in result.get("vector_results", [])]
+        urls += [doc.get("url", "") for doc in result.get("fetched_docs", [])]
+        for idx, url in enumerate(dict.fromkeys(u for u in urls if u), 1):
+            sources.append({"url": url, "title": url})
+            citations.append({
+                "id": idx,
+                "url": url,
+                "title": url.split("/")[-1] or url
+            })
         
-        jobs[job_id]["status"] = "completed"
-        jobs[job_id]["result"] = result.get("final_context", "")
-        jobs[job_id]["sources"] = sources
-        jobs[job_id]["citations"] = citations
-        jobs[job_id]["progress"] = "Research completed!"
+        store.update_job(
+            job_id,
+            status="completed",
+            result=result.get("final_context", ""),
+            sources=sources,
+            citations=citations,
+            progress="Research completed!",
+            coalesced=shared
+        )
         
         # Store in conversation history if conversation_id provided
         if conversation_id:
-            if conversation_id not in conversations:
-                conversations[conversation_id] = []
-            conversations[conversation_id].append({
+            store.append_message(conversation_id, {
                 "query": query,
                 "result": result.get("final_context", ""),
                 "sources": sources,
                 "timestamp": datetime.now().isoformat()
             })
         
+    except JobCancelled:
+        logger.info(f"Research job {job_id} cancelled")
+        store.update_job(job_id, status="cancelled", progress="Job cancelled")
     except Exception as e:
         logger.error(f"Error in research job {job_id}: {e}", exc_info=True)
-        jobs[job_id]["status"] = "error"
-        jobs[job_id]["error"] = str(e)
-        jobs[job_id]["progress"] = f"Error: {str(e)}"
+        store.update_job(job_id, status="error", error=str(e), progress=f"Error: {str(e)}")
+    finally:
+        # connected readers drain it; later ones replay the stored result
+        stream = streams.pop(job_id, None)
+        if stream is not None:
+            stream.close()
+
+def run_research_job(job_id: str, query: str, n_results: int, conversation_id: Optional[str] = None,
+                     cancel_event=None):
+    """
+    Run the research job synchronously on an executor worker.
+    An identical query that started meanwhile is waited for rather than
+    rerun; `cancel_event` stops the job between graph nodes.
+    """
+    from datetime import datetime
+    
+    try:
+        if not store.update_job(
+            job_id,
+            status="processing",
+            progress="Starting research...",
+            created_at=datetime.now().isoformat()
+        ):
+            raise JobCancelled()  # deleted before it started
+        
+        result, shared = coalescer.run(
+            query, job_id, streams.get(job_id), _cancel_check(job_id, cancel_event),
+            lambda sink, should_stop: run_graph(query, sink, should_stop)
+        )
+    except Exception as e:
+        finish_job(job_id, query, conversation_id, error=e)
+    else:
+        finish_job(job_id, query, conversation_id, result, shared)
+
+def _join_in_flight(job_id: str, query: str, n_results: int, conversation_id: Optional[str]) -> bool:
+    """Attach the job to an identical run in flight; it takes no worker."""
+    from datetime import datetime
+    
+    is_cancelled = _cancel_check(job_id)
+    
+    def joined():
+        store.update_job(
+            job_id,
+            status="processing",
+            progress="Joined an identical research job in progress",
+            created_at=datetime.now().isoformat()
+        )
+    
+    def run_ended(result, error):
+        if isinstance(error, JobCancelled) and not is_cancelled():
+            # stopped because the other jobs were cancelled; run this one
+            try:
+                executor.submit(job_id, run_research_job, job_id, query, n_results, conversation_id)
+            except QueueFull as e:
+                finish_job(job_id, query, conversation_id, error=e)
+            return
+        finish_job(job_id, query, conversation_id, result, True, error)
+    
+    return coalescer.join(query, job_id, streams.get(job_id), is_cancelled, run_ended, joined)
+
+def submit_job(job_id: str, query: str, n_results: int, conversation_id: Optional[str]) -> ResearchResponse:
+    """
+    Hand a registered job to the executor; 429 when the queue is full.
+    A query already being researched is joined instead of queued.
+    """
+    if _join_in_flight(job_id, query, n_results, conversation_id):
+        return ResearchResponse(
+            job_id=job_id,
+            status="processing",
+            message="Joined an identical research job in progress",
+            queue_position=0
+        )
+    
+    try:
+        executor.submit(job_id, run_research_job, job_id, query, n_results, conversation_id)
+    except QueueFull:
+        store.delete_job(job_id)
+        streams.pop(job_id, None)
+        raise HTTPException(
+            status_code=429,
+            detail="Too many research jobs queued; try again shortly",
+            headers={"Retry-After": "30"},
+        )
+    
+    position = executor.position(job_id)
+    return ResearchResponse(
+        job_id=job_id,
+        status="queued",
+        message="Research job created successfully",
+        queue_position=position
+    )
 
 @app.get("/")
 async def root():
@@ -145,15 +316,35 @@ async def root():
     return {
         "message": "Research Agent API",
         "version": "1.0.0",
-        "status": "running"
+        "status": "running",
+        "jobs": executor.stats(),
+        "coalescing": coalescer.stats()
     }
 
+@app.get("/health/live")
+async def liveness():
+    """The process is up and serving requests."""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness_check():
+    """
+    200 once the graph, model and index are loaded (or, without warmup,
+    whenever they would load on the first job); 503 while warming.
+    """
+    from fastapi.responses import JSONResponse
+    
+    ready = readiness["status"] == "ready" or (
+        not Config.WARMUP and readiness["status"] == "starting"
+    )
+    return JSONResponse(status_code=200 if ready else 503, content=readiness)
+
 @app.post("/api/research", response_model=ResearchResponse)
-async def create_research(request: ResearchRequest, background_tasks: BackgroundTasks):
+async def create_research(request: ResearchRequest):
     """Create a new research job."""
     job_id = str(uuid.uuid4())
     
-    jobs[job_id] = {
+    store.create_job(job_id, {
         "status": "queued",
         "query": request.query,
         "progress": "Job queued",
@@ -161,31 +352,24 @@ async def create_research(request: ResearchRequest, background_tasks: Background
         "sources": None,
         "citations": None,
         "error": None
-    }
+    })
+    streams[job_id] = TokenStream()
     
     n_results = request.n_results or Config.N_RESULTS
     
-    # Run job in background
-    background_tasks.add_task(run_research_job, job_id, request.query, n_results, None)
-    
-    return ResearchResponse(
-        job_id=job_id,
-        status="queued",
-        message="Research job created successfully"
-    )
+    return submit_job(job_id, request.query, n_results, None)
 
 @app.post("/api/conversation", response_model=ResearchResponse)
-async def create_conversation_research(request: ConversationRequest, background_tasks: BackgroundTasks):
+async def create_conversation_research(request: ConversationRequest):
     """Create a research job within a conversation context."""
     from datetime import datetime
     
     job_id = str(uuid.uuid4())
     conversation_id = request.conversation_id or str(uuid.uuid4())
     
-    if conversation_id not in conversations:
-        conversations[conversation_id] = []
+    store.create_conversation(conversation_id)
     
-    jobs[job_id] = {
+    store.create_job(job_id, {
         "status": "queued",
         "query": request.query,
         "conversation_id": conversation_id,
@@ -194,49 +378,96 @@ async def create_conversation_research(request: ConversationRequest, background_
         "sources": None,
         "citations": None,
         "error": None
-    }
+    })
+    streams[job_id] = TokenStream()
     
     n_results = Config.N_RESULTS
     
-    # Run job in background
-    background_tasks.add_task(run_research_job, job_id, request.query, n_results, conversation_id)
-    
-    return ResearchResponse(
-        job_id=job_id,
-        status="queued",
-        message="Research job created successfully"
-    )
+    return submit_job(job_id, request.query, n_results, conversation_id)
 
 @app.get("/api/conversations/{conversation_id}")
 async def get_conversation(conversation_id: str):
     """Get conversation history."""
-    if conversation_id not in conversations:
+    messages = store.get_conversation(conversation_id)
+    if messages is None:
         raise HTTPException(status_code=404, detail="Conversation not found")
     
     return {
         "conversation_id": conversation_id,
-        "messages": conversations[conversation_id]
+        "messages": messages
     }
 
 @app.get("/api/jobs/{job_id}", response_model=JobStatusResponse)
 async def get_job_status(job_id: str):
     """Get the status of a research job."""
-    if job_id not in jobs:
+    job = store.get_job(job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    job = jobs[job_id]
+    position = executor.position(job_id) if job["status"] == "queued" else None
     return JobStatusResponse(
         job_id=job_id,
         status=job["status"],
-        progress=job.get("progress"),
+        progress=f"Queued (position {position})" if position else job.get("progress"),
         result=job.get("result"),
         sources=job.get("sources"),
-        error=job.get("error")
+        error=job.get("error"),
+        queue_position=position
+    )
+
+@app.get("/api/jobs/{job_id}/stream")
+async def stream_job(job_id: str):
+    """
+    Server-sent events with the summary as the LLM writes it:
+      data: {"token": "..."}   next piece of text
+      event: reset             the attempt failed and is being retried
+      event: done              no more tokens; fetch /api/jobs/{job_id}
+    """
+    import json
+    from fastapi.responses import StreamingResponse
+
+    stream = streams.get(job_id)
+    if stream is None and store.get_job(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def replay():
+        # finished here, or running in another worker process
+        while True:
+            job = store.get_job(job_id)
+            if job is None or job["status"] not in ("queued", "processing"):
+                break
+            yield ": keep-alive\n\n"
+            await asyncio.sleep(1)
+        if job is not None and job.get("result"):
+            yield f"data: {json.dumps({'token': job['result']})}\n\n"
+        yield "event: done\ndata: {}\n\n"
+
+    async def events():
+        offset = 0
+        while True:
+            batch, closed = await asyncio.to_thread(stream.read, offset, 15)
+            offset += len(batch)
+            for kind, token in batch:
+                if kind == "token":
+                    yield f"data: {json.dumps({'token': token})}\n\n"
+                else:
+                    yield f"event: {kind}\ndata: {{}}\n\n"
+            if closed and not batch:
+                yield "event: done\ndata: {}\n\n"
+                return
+            if not batch:
+                yield ": keep-alive\n\n"
+
+    return StreamingResponse(
+        events() if stream is not None else replay(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 @app.get("/api/jobs")
-async def list_jobs():
-    """List all jobs."""
+async def list_jobs(offset: int = Query(0, ge=0), limit: int = Query(50, ge=1, le=500)):
+    """List jobs, newest first, one page at a time."""
+    page, total = store.list_jobs(offset, limit)
     return {
         "jobs": [
             {
@@ -245,17 +476,24 @@ async def list_jobs():
                 "query": job.get("query", ""),
                 "created_at": job.get("created_at")
             }
-            for job_id, job in jobs.items()
-        ]
+            for job_id, job in page
+        ],
+        "total": total,
+        "offset": offset,
+        "limit": limit
     }
 
 @app.delete("/api/jobs/{job_id}")
 async def delete_job(job_id: str):
-    """Delete a job."""
-    if job_id not in jobs:
+    """Cancel a job if it is queued or running, and delete it."""
+    if not store.delete_job(job_id):
         raise HTTPException(status_code=404, detail="Job not found")
     
-    del jobs[job_id]
+    # queued jobs never start; running ones stop after the current node
+    executor.cancel(job_id)
+    stream = streams.pop(job_id, None)
+    if stream is not None:
+        stream.close()
     return {"message": "Job deleted successfully"}
 
 @app.get("/api/export/{job_id}")
@@ -263,10 +501,10 @@ async def export_job(job_id: str):
     """Export job results in various formats."""
     from fastapi.responses import Response
     
-    if job_id not in jobs:
+    job = store.get_job(job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    job = jobs[job_id]
     if job["status"] != "completed":
         raise HTTPException(status_code=400, detail="Job not completed")
     
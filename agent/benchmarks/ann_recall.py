@@ -0,0 +1,120 @@
+"""
+Recall-vs-latency report for the VectorMemory index backends.
+
+Every ANN setting is measured against exact search on IndexFlatIP over
+the same vectors. By default the vectors come from the persisted
+memory.index; pass --synthetic N to benchmark random unit vectors instead.
+
+Usage:
+    cd agent
+    python -m benchmarks.ann_recall
+    python -m benchmarks.ann_recall --synthetic 200000 --queries 500 -k 10
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import faiss
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import Config
+from memory import index_factory
+
+SWEEPS = {
+    "ivf_flat": [("nprobe", n) for n in (1, 4, 16, 64)],
+    "ivf_pq": [("nprobe", n) for n in (1, 4, 16, 64)],
+    "hnsw": [("ef_search", n) for n in (16, 32, 64, 128)],
+}
+
+
+def load_vectors(synthetic, dimension=384):
+    if synthetic:
+        x = np.random.default_rng(0).standard_normal((synthetic, dimension)).astype("float32")
+        faiss.normalize_L2(x)
+        return x
+
+    path = str(Config.MEMORY_INDEX_PATH)
+    if not os.path.exists(path):
+        sys.exit(f"No index at {path}; run some research first or use --synthetic N")
+    index = index_factory.unwrap(faiss.read_index(path))
+    return index.reconstruct_n(0, index.ntotal)
+
+
+def sample_queries(vectors, n, noise=0.05):
+    """Stored vectors with a little noise, so the query isn't its own exact hit."""
+    rng = np.random.default_rng(1)
+    q = vectors[rng.choice(len(vectors), size=min(n, len(vectors)), replace=False)]
+    q = q + noise * rng.standard_normal(q.shape).astype("float32")
+    faiss.normalize_L2(q)
+    return np.ascontiguousarray(q, dtype="float32")
+
+
+def timed_search(index, queries, k):
+    """
+    One query per call, as VectorMemory.search issues them, so the
+    figures are per-call latency rather than batched throughput.
+    Returns (ids, p50 ms, p95 ms).
+    """
+    ids = np.empty((len(queries), k), dtype="int64")
+    timings = []
+    for i in range(len(queries)):
+        start = time.perf_counter()
+        _, found = index.search(queries[i:i + 1], k)
+        timings.append((time.perf_counter() - start) * 1000)
+        ids[i] = found[0]
+    return ids, np.percentile(timings, 50), np.percentile(timings, 95)
+
+
+def recall_at_k(truth, found):
+    hits = sum(len(set(t) & set(f)) for t, f in zip(truth, found))
+    return hits / truth.size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--synthetic", type=int, default=0)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    args = parser.parse_args()
+
+    vectors = load_vectors(args.synthetic)
+    queries = sample_queries(vectors, args.queries)
+    dimension = vectors.shape[1]
+    print(f"{len(vectors)} vectors, {len(queries)} queries, k={args.k}\n")
+
+    flat = index_factory.with_ids(
+        index_factory.build_index("flat", dimension), vectors, np.arange(len(vectors))
+    )
+    truth, p50, p95 = timed_search(flat, queries, args.k)
+
+    print(f"{'index':<10} {'param':<14} {'build s':>8} {'recall':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    print(f"{'flat':<10} {'-':<14} {'-':>8} {1.0:>8.3f} {p50:>8.3f} {p95:>8.3f}")
+
+    params = {
+        "nlist": Config.MEMORY_IVF_NLIST,
+        "pq_m": Config.MEMORY_PQ_M,
+        "hnsw_m": Config.MEMORY_HNSW_M,
+    }
+    for kind, sweep in SWEEPS.items():
+        if len(vectors) < index_factory.min_train_size(kind):
+            print(f"{kind:<10} skipped: needs {index_factory.min_train_size(kind)} vectors to train")
+            continue
+        start = time.perf_counter()
+        index = index_factory.migrate(flat, kind, dimension, **params)
+        build_s = time.perf_counter() - start
+
+        for name, value in sweep:
+            index_factory.set_search_params(index, **{name: value})
+            found, p50, p95 = timed_search(index, queries, args.k)
+            print(
+                f"{kind:<10} {f'{name}={value}':<14} {build_s:>8.1f} "
+                f"{recall_at_k(truth, found):>8.3f} {p50:>8.3f} {p95:>8.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
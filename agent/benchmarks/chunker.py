@@ -0,0 +1,92 @@
+"""
+Throughput and peak-memory report for memory.chunker on large documents.
+
+The sentence-aware chunker is compared with the previous fixed 200-word
+windows over the same text. Pass PDFs to measure real extracted text
+(parsed as fetch_web does), or --synthetic MB for generated prose with
+PDF-style line wraps. Peak memory is what chunking allocates on top of
+the input string (tracemalloc), with chunks consumed one at a time as
+memory_agent does.
+
+Usage:
+    cd agent
+    python -m benchmarks.chunker paper1.pdf paper2.pdf
+    python -m benchmarks.chunker --synthetic 8
+"""
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from memory.chunker import chunk_text
+
+
+def word_windows(text, max_words=200):
+    """The chunker this module replaced, kept as the baseline."""
+    words = text.split()
+    return [(i, " ".join(words[start:start + max_words]))
+            for i, start in enumerate(range(0, len(words), max_words))]
+
+
+def synthetic_text(megabytes, seed=0):
+    rng = random.Random(seed)
+    vocab = [f"term{i}" for i in range(5000)]
+    out, size = [], 0
+    while size < megabytes * 2**20:
+        paragraph = []
+        for _ in range(rng.randint(2, 8)):
+            words = rng.choices(vocab, k=rng.randint(5, 40))
+            paragraph.append(words[0].capitalize() + " " + " ".join(words[1:]) + ".")
+        text = " ".join(paragraph)
+        # wrap like PDF lines
+        lines = [text[i:i + 90] for i in range(0, len(text), 90)]
+        block = "\n".join(lines) + "\n\n"
+        out.append(block)
+        size += len(block)
+    return "".join(out)
+
+
+def pdf_text(paths):
+    from tools.pdf_parse import parse_pdf
+    return "\n\n".join(parse_pdf(Path(p).read_bytes()) for p in paths)
+
+
+def measure(fn, text):
+    """(chunks, seconds, peak bytes); timed and traced in separate runs."""
+    start = time.perf_counter()
+    chunks = sum(1 for _ in fn(text))
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    for _ in fn(text):
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return chunks, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("pdfs", nargs="*")
+    parser.add_argument("--synthetic", type=float, default=0, help="MB of generated text")
+    args = parser.parse_args()
+
+    if args.pdfs:
+        text = pdf_text(args.pdfs)
+    else:
+        text = synthetic_text(args.synthetic or 8)
+    mb = len(text.encode("utf-8")) / 2**20
+    print(f"{mb:.1f} MB of text\n")
+
+    print(f"{'chunker':<16} {'chunks':>8} {'MB/s':>8} {'peak MB':>9}")
+    for name, fn in (("word windows", word_windows), ("sentence-aware", chunk_text)):
+        chunks, elapsed, peak = measure(fn, text)
+        print(f"{name:<16} {chunks:>8} {mb / elapsed:>8.1f} {peak / 2**20:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
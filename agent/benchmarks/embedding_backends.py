@@ -0,0 +1,104 @@
+"""
+Throughput and retrieval agreement of the embedding backends.
+
+Encodes the same texts with each backend in memory.embedders (loaded
+from the local EMBEDDING_MODEL_DIR) and reports texts/sec, plus how
+closely each backend reproduces the first one: mean cosine between the
+two vectors of each text, top-1 agreement and recall@k of the first
+backend's neighbours for a set of queries.
+
+Texts default to a sample of the chunks already stored in memory; the
+queries default to the opening words of a sample of those texts.
+    cd agent
+    python -m memory.embedders --out data/models/all-MiniLM-L6-v2   # once
+    python -m benchmarks.embedding_backends --n 2000
+"""
+import argparse
+import random
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import Config
+from memory.embedders import BACKENDS, load_embedder
+
+
+def stored_chunks(n, seed):
+    conn = sqlite3.connect(str(Config.MEMORY_DB_PATH))
+    texts = [row[0] for row in conn.execute("SELECT chunk FROM chunks")]
+    random.Random(seed).shuffle(texts)
+    return texts[:n]
+
+
+def neighbours(corpus, queries, k):
+    scores = queries @ corpus.T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    parser.add_argument("--model-dir", default=str(Config.EMBEDDING_MODEL_DIR))
+    parser.add_argument("--texts", help="file with one text per line (default: stored chunks)")
+    parser.add_argument("--queries", help="file with one query per line")
+    parser.add_argument("--n", type=int, default=2000)
+    parser.add_argument("--n-queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=Config.EMBED_BATCH_SIZE)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.texts:
+        texts = [line for line in Path(args.texts).read_text().splitlines() if line.strip()][:args.n]
+    else:
+        texts = stored_chunks(args.n, args.seed)
+    if not texts:
+        sys.exit("No texts: pass --texts or run some research first")
+    if args.queries:
+        queries = [line for line in Path(args.queries).read_text().splitlines() if line.strip()]
+    else:
+        sample = random.Random(args.seed).sample(texts, min(args.n_queries, len(texts)))
+        queries = [" ".join(t.split()[:12]) for t in sample]
+    print(f"{len(texts)} texts, {len(queries)} queries, k={args.k}, best of {args.repeat}\n")
+
+    reference = None
+    print(f"{'backend':<10} {'dim':>4} {'load s':>7} {'texts/s':>9} {'cosine':>7} {'top-1':>7} {'recall@k':>9}")
+    for backend in args.backends.split(","):
+        start = time.perf_counter()
+        model = load_embedder(backend, Config.EMBEDDING_MODEL, args.model_dir)
+        load_s = time.perf_counter() - start
+
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            corpus = np.asarray(model.encode(texts, batch_size=args.batch_size), dtype="float32")
+            best = min(best, time.perf_counter() - start)
+        corpus /= np.linalg.norm(corpus, axis=1, keepdims=True)
+        q = np.asarray(model.encode(queries, batch_size=args.batch_size), dtype="float32")
+        q /= np.linalg.norm(q, axis=1, keepdims=True)
+        hits = neighbours(corpus, q, args.k)
+
+        if reference is None:
+            reference = (corpus, hits)
+            cosine = top1 = recall = 1.0
+        else:
+            ref_corpus, ref_hits = reference
+            cosine = float(np.mean(np.sum(corpus * ref_corpus, axis=1)))
+            top1 = float(np.mean(hits[:, 0] == ref_hits[:, 0]))
+            recall = float(np.mean([
+                len(set(a) & set(b)) / args.k for a, b in zip(hits, ref_hits)
+            ]))
+        print(
+            f"{backend:<10} {corpus.shape[1]:>4} {load_s:>7.2f} {len(texts) / best:>9.1f} "
+            f"{cosine:>7.4f} {top1:>7.1%} {recall:>9.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Throughput and text-equivalence report for the HTML extractors.
+
+Runs every extractor in tools.html_extract over a directory of saved
+.html pages and reports pages/sec, plus how closely each one's cleaned
+text matches the bs4 reference extractor (exact matches and mean / min
+token-set overlap).
+
+Build a corpus once with --fetch, then rerun against it:
+    cd agent
+    python -m benchmarks.html_extract --corpus data/html_corpus --fetch urls.txt
+    python -m benchmarks.html_extract --corpus data/html_corpus
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from tools.html_extract import EXTRACTORS, clean_text
+
+
+def fetch_corpus(corpus, url_file):
+    import hashlib
+    import requests
+
+    corpus.mkdir(parents=True, exist_ok=True)
+    for url in Path(url_file).read_text().split():
+        try:
+            response = requests.get(url, timeout=12, headers={"User-Agent": "Research Agent"})
+            response.raise_for_status()
+        except Exception as e:
+            print(f"[skip] {url} -> {e}")
+            continue
+        if "text/html" not in response.headers.get("Content-Type", ""):
+            continue
+        name = hashlib.md5(url.encode()).hexdigest()[:12] + ".html"
+        (corpus / name).write_text(response.text, encoding="utf-8")
+
+
+def overlap(a, b):
+    """Jaccard similarity of the two texts' token sets."""
+    ta, tb = set(a.split()), set(b.split())
+    if not ta and not tb:
+        return 1.0
+    return len(ta & tb) / len(ta | tb)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--corpus", required=True, type=Path)
+    parser.add_argument("--fetch", help="file of URLs to download into the corpus first")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.fetch:
+        fetch_corpus(args.corpus, args.fetch)
+
+    pages = [p.read_text(encoding="utf-8", errors="replace") for p in sorted(args.corpus.glob("*.html"))]
+    if not pages:
+        sys.exit(f"No .html files in {args.corpus}")
+    total_mb = sum(len(p.encode("utf-8")) for p in pages) / 1e6
+    print(f"{len(pages)} pages, {total_mb:.1f} MB, best of {args.repeat}\n")
+
+    reference = [clean_text(EXTRACTORS["bs4"](p)) for p in pages]
+
+    print(f"{'extractor':<10} {'pages/s':>9} {'MB/s':>7} {'exact':>7} {'mean sim':>9} {'min sim':>8}")
+    for name, extract in EXTRACTORS.items():
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            texts = [clean_text(extract(p)) for p in pages]
+            best = min(best, time.perf_counter() - start)
+
+        sims = [overlap(t, r) for t, r in zip(texts, reference)]
+        exact = sum(t == r for t, r in zip(texts, reference)) / len(pages)
+        print(
+            f"{name:<10} {len(pages) / best:>9.1f} {total_mb / best:>7.2f} "
+            f"{exact:>7.1%} {sum(sims) / len(sims):>9.3f} {min(sims):>8.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Recall and size report for the vector codecs (float32 / fp16 / int8).
+
+Every codec is measured against exact float32 search over the vectors of
+the persisted memory.index. Queries are the research queries users
+actually asked, read from the SQLite job store (JOB_STORE_PATH) and
+embedded with the configured model; pass --queries-file with one query
+per line to use another log. Without either, stored vectors with a
+little noise stand in for queries (see ann_recall.sample_queries).
+
+Usage:
+    cd agent
+    python -m benchmarks.vector_codecs -k 10
+    python -m benchmarks.vector_codecs --queries-file queries.txt
+    python -m benchmarks.vector_codecs --synthetic 100000
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+from pathlib import Path
+
+import numpy as np
+import faiss
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import Config
+from memory import index_factory
+from benchmarks.ann_recall import load_vectors, recall_at_k, sample_queries
+
+
+def logged_queries(path=None):
+    """Distinct queries from a text file, or from the job store's jobs."""
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            lines = [line.strip() for line in f]
+    else:
+        if not os.path.exists(Config.JOB_STORE_PATH):
+            return []
+        conn = sqlite3.connect(Config.JOB_STORE_PATH)
+        try:
+            lines = [json.loads(data).get("query", "") for (data,) in conn.execute("SELECT data FROM jobs")]
+        finally:
+            conn.close()
+    return list(dict.fromkeys(q for q in lines if q))
+
+
+def embed(queries):
+    from memory.embedders import load_embedder
+    model = load_embedder(Config.EMBEDDING_BACKEND, Config.EMBEDDING_MODEL, Config.EMBEDDING_MODEL_DIR)
+    q = np.ascontiguousarray(model.encode(queries, convert_to_numpy=True), dtype="float32")
+    faiss.normalize_L2(q)
+    return q
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--synthetic", type=int, default=0)
+    parser.add_argument("--queries-file")
+    parser.add_argument("--queries", type=int, default=200, help="sampled queries when there is no log")
+    parser.add_argument("-k", type=int, default=10)
+    args = parser.parse_args()
+
+    vectors = load_vectors(args.synthetic)
+    texts = [] if args.synthetic else logged_queries(args.queries_file)
+    if texts:
+        queries, source = embed(texts), "logged"
+    else:
+        queries, source = sample_queries(vectors, args.queries), "sampled"
+    dimension = vectors.shape[1]
+    ids = np.arange(len(vectors))
+    print(f"{len(vectors)} vectors, {len(queries)} {source} queries, k={args.k}\n")
+
+    exact = index_factory.with_ids(index_factory.build_index("flat", dimension), vectors, ids)
+    true_scores, truth = exact.search(queries, args.k)
+
+    print(f"{'codec':<8} {'MiB':>8} {'ratio':>6} {'recall':>8} {'top-1':>6} {'max |dscore|':>13}")
+    base_bytes = None
+    for codec in index_factory.CODECS:
+        index = index_factory.with_ids(
+            index_factory.build_index("flat", dimension, codec=codec), vectors, ids
+        )
+        size = len(faiss.serialize_index(index))
+        base_bytes = base_bytes or size
+        scores, found = index.search(queries, args.k)
+        # how far scores drift at each rank; the dedup threshold compares these
+        err = np.abs(scores - true_scores).max()
+        print(
+            f"{codec:<8} {size / 2**20:>8.1f} {base_bytes / size:>6.2f} "
+            f"{recall_at_k(truth, found):>8.3f} {(found[:, 0] == truth[:, 0]).mean():>6.3f} {err:>13.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
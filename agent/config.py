@@ -4,7 +4,7 @@ Loads settings from environment variables with sensible defaults.
 """
 import os
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
 # Load environment variables from .env file if it exists
 try:
@@ -21,37 +21,122 @@ class Config:
     
     # Search Configuration
     N_RESULTS: int = int(os.getenv("N_RESULTS", "20"))
-    RATE_LIMIT: float = float(os.getenv("RATE_LIMIT", "1.5"))
+    RATE_LIMIT: float = float(os.getenv("RATE_LIMIT", "1.5"))  # seconds between requests to one host
+    FETCH_CONCURRENCY: int = int(os.getenv("FETCH_CONCURRENCY", "8"))
+    FETCH_MAX_DOC_BYTES: int = int(os.getenv("FETCH_MAX_DOC_BYTES", str(10 * 1024 * 1024)))
+    FETCH_MAX_ROUND_BYTES: int = int(os.getenv("FETCH_MAX_ROUND_BYTES", str(100 * 1024 * 1024)))
+    HTML_EXTRACTOR: str = os.getenv("HTML_EXTRACTOR", "lxml")  # lxml | bs4
+    PDF_MAX_PAGES: int = int(os.getenv("PDF_MAX_PAGES", "200"))
+    PDF_PAGES_PER_TASK: int = int(os.getenv("PDF_PAGES_PER_TASK", "25"))
+    PDF_TIMEOUT: float = float(os.getenv("PDF_TIMEOUT", "30"))
+    PDF_WORKERS: int = int(os.getenv("PDF_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+    RAW_CACHE_TTL: int = int(os.getenv("RAW_CACHE_TTL", "604800"))  # seconds; Cache-Control max-age wins
+    SEARCH_REGION: str = os.getenv("SEARCH_REGION", "uk-en")
+    SEARCH_CACHE_TTL: int = int(os.getenv("SEARCH_CACHE_TTL", "86400"))
     MAX_RETRIES: int = int(os.getenv("MAX_RETRIES", "3"))
     
     # Model Configuration
     EMBEDDING_MODEL: str = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+    EMBEDDING_BACKEND: str = os.getenv("EMBEDDING_BACKEND", "torch")  # torch | onnx | onnx-int8
     LLM_MODEL: str = os.getenv("LLM_MODEL", "gemini-2.5-pro")
+    LLM_BACKEND: str = os.getenv("LLM_BACKEND", "gemini")  # gemini | stub (offline)
+    LLM_CACHE_TTL: int = int(os.getenv("LLM_CACHE_TTL", "86400"))  # 0 disables the cache
+    LLM_CACHE_SIZE: int = int(os.getenv("LLM_CACHE_SIZE", "1000"))
+    EMBED_BATCH_SIZE: int = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+    # chunk size in words + punctuation; all-MiniLM-L6-v2 truncates at 256 word pieces
+    CHUNK_MAX_TOKENS: int = int(os.getenv("CHUNK_MAX_TOKENS", "200"))
+    CHUNK_OVERLAP_TOKENS: int = int(os.getenv("CHUNK_OVERLAP_TOKENS", "40"))
+    # fingerprint dedup before embedding: exact text, or MinHash-estimated
+    # Jaccard similarity of word 3-shingles at or above the threshold
+    MEMORY_FINGERPRINT_DEDUP: bool = os.getenv("MEMORY_FINGERPRINT_DEDUP", "true").lower() == "true"
+    MEMORY_NEAR_DUP_JACCARD: float = float(os.getenv("MEMORY_NEAR_DUP_JACCARD", "0.8"))
+    
+    # Embedding Cache (in-process LRU + optional on-disk tier)
+    EMBED_CACHE_SIZE: int = int(os.getenv("EMBED_CACHE_SIZE", "20000"))
+    EMBED_CACHE_DISK_SIZE: int = int(os.getenv("EMBED_CACHE_DISK_SIZE", "500000"))
     
     # Paths
     BASE_DIR: Path = Path(__file__).parent
     RAW_DATA_DIR: Path = BASE_DIR / os.getenv("RAW_DATA_DIR", "data/raw")
+    SEARCH_CACHE_PATH: Path = BASE_DIR / os.getenv("SEARCH_CACHE_PATH", "data/search_cache.sqlite")
+    # local model files (required by the onnx backends, see memory/embedders.py)
+    EMBEDDING_MODEL_DIR: Path = BASE_DIR / os.getenv("EMBEDDING_MODEL_DIR", "data/models/all-MiniLM-L6-v2")
+    JOB_STORE_PATH: Path = BASE_DIR / os.getenv("JOB_STORE_PATH", "data/jobs.sqlite")
+    LLM_CACHE_PATH: Path = BASE_DIR / os.getenv("LLM_CACHE_PATH", "data/llm_cache.sqlite")
     MEMORY_INDEX_PATH: Path = BASE_DIR / os.getenv("MEMORY_INDEX_PATH", "data/memory.index")
     MEMORY_META_PATH: Path = BASE_DIR / os.getenv("MEMORY_META_PATH", "data/memory_store.json")
+    MEMORY_DB_PATH: Path = BASE_DIR / os.getenv("MEMORY_DB_PATH", "data/memory.sqlite")
+    MEMORY_LOG_PATH: Path = BASE_DIR / os.getenv("MEMORY_LOG_PATH", "data/memory.log")
+    # unset disables the on-disk embedding cache tier
+    EMBED_CACHE_PATH: Optional[Path] = (
+        BASE_DIR / os.environ["EMBED_CACHE_PATH"] if os.getenv("EMBED_CACHE_PATH") else None
+    )
+    
+    # Vector Memory Persistence
+    MEMORY_CHECKPOINT_EVERY: int = int(os.getenv("MEMORY_CHECKPOINT_EVERY", "5000"))
+    
+    # Vector Index (flat | ivf_flat | ivf_pq | hnsw)
+    MEMORY_INDEX_TYPE: str = os.getenv("MEMORY_INDEX_TYPE", "flat")
+    MEMORY_ANN_THRESHOLD: int = int(os.getenv("MEMORY_ANN_THRESHOLD", "50000"))
+    MEMORY_IVF_NLIST: int = int(os.getenv("MEMORY_IVF_NLIST", "1024"))
+    MEMORY_IVF_NPROBE: int = int(os.getenv("MEMORY_IVF_NPROBE", "16"))
+    MEMORY_PQ_M: int = int(os.getenv("MEMORY_PQ_M", "48"))
+    MEMORY_HNSW_M: int = int(os.getenv("MEMORY_HNSW_M", "32"))
+    MEMORY_HNSW_EF_SEARCH: int = int(os.getenv("MEMORY_HNSW_EF_SEARCH", "64"))
+    # stored vector encoding (float32 | fp16 | int8); existing index files
+    # keep theirs until converted with `python -m memory.migrate_index`
+    MEMORY_VECTOR_CODEC: str = os.getenv("MEMORY_VECTOR_CODEC", "float32")
+    
+    # Shared vector-memory server (memory/server.py); empty = in-process
+    MEMORY_SERVER_URL: str = os.getenv("MEMORY_SERVER_URL", "")
+    MEMORY_SERVER_HOST: str = os.getenv("MEMORY_SERVER_HOST", "127.0.0.1")
+    MEMORY_SERVER_PORT: int = int(os.getenv("MEMORY_SERVER_PORT", "8100"))
+    MEMORY_SERVER_BATCH_MS: float = float(os.getenv("MEMORY_SERVER_BATCH_MS", "5"))
+    MEMORY_SERVER_MAX_BATCH: int = int(os.getenv("MEMORY_SERVER_MAX_BATCH", "64"))
     
     # Server Configuration
+    WARMUP: bool = os.getenv("WARMUP", "true").lower() == "true"  # load model/index in background at startup
     HOST: str = os.getenv("HOST", "0.0.0.0")
     PORT: int = int(os.getenv("PORT", "8000"))
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", "2"))  # concurrent graph runs
+    JOB_QUEUE_SIZE: int = int(os.getenv("JOB_QUEUE_SIZE", "20"))  # waiting jobs before 429
+    JOB_STORE: str = os.getenv("JOB_STORE", "memory")  # memory | sqlite (shared by workers)
+    JOB_STORE_MAX: int = int(os.getenv("JOB_STORE_MAX", "1000"))  # in-memory backend only
+    JOB_TTL: int = int(os.getenv("JOB_TTL", str(7 * 24 * 3600)))
+    JOB_STALE_AFTER: float = float(os.getenv("JOB_STALE_AFTER", "120"))  # active job without heartbeat -> interrupted
     CORS_ORIGINS: List[str] = os.getenv("CORS_ORIGINS", "http://localhost:3000,http://localhost:5173").split(",")
     
     # Analysis Thresholds
     MIN_VECTOR_HITS: int = int(os.getenv("MIN_VECTOR_HITS", "3"))
     MIN_AVG_SCORE: float = float(os.getenv("MIN_AVG_SCORE", "0.43"))
     
+    # Summarizer Context (see utils/context_budget.py)
+    CONTEXT_MAX_TOKENS: int = int(os.getenv("CONTEXT_MAX_TOKENS", "6000"))
+    CONTEXT_MAX_PER_URL: int = int(os.getenv("CONTEXT_MAX_PER_URL", "3"))
+    CONTEXT_DUP_THRESHOLD: float = float(os.getenv("CONTEXT_DUP_THRESHOLD", "0.92"))
+    CONTEXT_MMR_LAMBDA: float = float(os.getenv("CONTEXT_MMR_LAMBDA", "0.7"))  # 1.0 = relevance only
+    
+    # Per-job Research Budget (checked before every extra research round)
+    MAX_RESEARCH_ROUNDS: int = int(os.getenv("MAX_RESEARCH_ROUNDS", "3"))
+    MAX_JOB_SECONDS: float = float(os.getenv("MAX_JOB_SECONDS", "120"))
+    MAX_JOB_BYTES: int = int(os.getenv("MAX_JOB_BYTES", str(200 * 1024 * 1024)))
+    
     @classmethod
     def validate(cls) -> None:
         """Validate that required configuration is set."""
-        if not cls.GEMINI_API_KEY:
+        if cls.LLM_BACKEND == "gemini" and not cls.GEMINI_API_KEY:
             raise ValueError("GEMINI_API_KEY must be set in environment variables")
     
     @classmethod
     def ensure_directories(cls) -> None:
         """Ensure all required directories exist."""
         cls.RAW_DATA_DIR.mkdir(parents=True, exist_ok=True)
+        cls.SEARCH_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        cls.LLM_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        cls.JOB_STORE_PATH.parent.mkdir(parents=True, exist_ok=True)
         cls.MEMORY_INDEX_PATH.parent.mkdir(parents=True, exist_ok=True)
         cls.MEMORY_META_PATH.parent.mkdir(parents=True, exist_ok=True)
+        cls.MEMORY_DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+        cls.MEMORY_LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
+        if cls.EMBED_CACHE_PATH:
+            cls.EMBED_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
@@ -0,0 +1,84 @@
+import os
+import json
+import base64
+import numpy as np
+
+
+class AppendLog:
+    """
+    Append-only write-ahead log for VectorMemory.
+    Each line is one stored chunk: {id, url, chunk, vec}
+    where vec is the base64 float32 embedding.
+    Capabilities:
+      - append a whole ingestion batch with a single fsync
+      - replay entries written since the last checkpoint
+      - truncate once a checkpoint has been written
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.entries = 0
+
+    def append(self, records, embs):
+        """
+        records: List[{id, url, chunk}]
+        embs: float32 matrix, one row per record
+        """
+        lines = []
+        for rec, vec in zip(records, embs):
+            line = dict(rec)
+            line["vec"] = base64.b64encode(
+                np.asarray(vec, dtype="float32").tobytes()
+            ).decode("ascii")
+            lines.append(json.dumps(line))
+
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.entries += len(lines)
+
+    def replay(self, min_id=0):
+        """
+        Yield (record, vector) for logged entries with id >= min_id.
+
+        A torn final line from a crash mid-write is cut off the file, so
+        the next append starts on a clean line. A bad line anywhere else
+        means the log is corrupt and raises ValueError.
+        """
+        if not os.path.exists(self.path):
+            return
+
+        good_end = 0
+        with open(self.path, "rb") as f:
+            for raw in f:
+                try:
+                    if not raw.endswith(b"\n"):
+                        raise ValueError("unterminated line")
+                    rec = json.loads(raw)
+                except ValueError:
+                    if f.read(1):
+                        raise ValueError(
+                            f"Corrupt entry in {self.path} at byte {good_end}"
+                        )
+                    break
+                good_end += len(raw)
+                self.entries += 1
+                if rec["id"] < min_id:
+                    continue
+                vec = np.frombuffer(base64.b64decode(rec.pop("vec")), dtype="float32")
+                yield rec, vec
+
+        if good_end < os.path.getsize(self.path):
+            print(f"[memory] Dropping torn tail of {self.path} at byte {good_end}")
+            with open(self.path, "r+b") as f:
+                f.truncate(good_end)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def truncate(self):
+        """Drop all entries; called after a successful checkpoint."""
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.flush()
+            os.fsync(f.fileno())
+        self.entries = 0
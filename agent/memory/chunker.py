@@ -1,13 +1,132 @@
-from typing import List, Tuple
+"""
+Streaming, sentence-aware chunker for documents before they are embedded.
 
-def chunk_text(text: str, max_words: int = 200) -> List[Tuple[int, str]]:
-    words = text.split()
-    chunks = []
+Chunks are built from whole sentences, closed early at paragraph ends,
+and cut inside a paragraph only when the token limit forces it; such
+cuts repeat up to `overlap_tokens` of trailing sentences at the start of
+the next chunk. The text is walked with regex iterators, so only the
+chunk being built is held besides the input string.
+"""
+import re
+from collections import deque
+from typing import Callable, Iterator, Optional, Tuple
+
+# paragraphs end at blank lines, or at a line break right after closing
+# punctuation: cleaned HTML has one block per line, while PDF text also
+# wraps mid-sentence. Matching on "\n" first keeps the scan fast.
+_LINE_BREAK = re.compile(r"\n\s*")
+_CLOSING = frozenset(".!?:\"')”")
+_SENTENCE_END = re.compile(r"[.!?]+[\"')\]”’]*\s+(?=[\"'(\[“]?[A-Z0-9])")
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+
+
+def count_tokens(text: str) -> int:
+    """
+    Words and punctuation marks, as BERT-style pre-tokenizers split them;
+    a lower bound on the model's word pieces.
+    """
+    return len(_TOKEN.findall(text))
+
+
+def _spans(pattern, text, start, end):
+    """(start, end) of the pieces of text[start:end], each ending with a match."""
+    for match in pattern.finditer(text, start, end):
+        yield start, match.end()
+        start = match.end()
+    yield start, end
+
+
+def _split_long(sentence, max_tokens, count):
+    """Cut a sentence longer than `max_tokens` at word boundaries."""
+    words, size = [], 0
+    for word in sentence.split():
+        n = count(word)
+        if words and size + n > max_tokens:
+            yield " ".join(words), size
+            words, size = [], 0
+        words.append(word)
+        size += n
+    if words:
+        yield " ".join(words), size
+
+
+def _paragraphs(text):
+    """(start, end) of each paragraph of `text`."""
+    start = 0
+    for match in _LINE_BREAK.finditer(text):
+        end = match.start()
+        if "\n" in match.group()[1:] or (end and text[end - 1] in _CLOSING):
+            yield start, end
+            start = match.end()
+    yield start, len(text)
+
+
+def _sentences(text, max_tokens, count):
+    """
+    Yield (sentence, tokens) with whitespace collapsed, and (None, 0)
+    after the last sentence of every paragraph.
+    """
+    for para_start, para_end in _paragraphs(text):
+        for start, end in _spans(_SENTENCE_END, text, para_start, para_end):
+            sentence = " ".join(text[start:end].split())
+            if not sentence:
+                continue
+            n = count(sentence)
+            if n <= max_tokens:
+                yield sentence, n
+            else:
+                yield from _split_long(sentence, max_tokens, count)
+        yield None, 0
+
+
+def chunk_text(
+    text: str,
+    max_tokens: Optional[int] = None,
+    overlap_tokens: Optional[int] = None,
+    count: Callable[[str], int] = count_tokens,
+) -> Iterator[Tuple[int, str]]:
+    """
+    Lazily split `text` into (chunk_id, chunk) pairs of at most
+    `max_tokens` tokens as measured by `count`.
+    Defaults come from CHUNK_MAX_TOKENS / CHUNK_OVERLAP_TOKENS.
+    """
+    if max_tokens is None or overlap_tokens is None:
+        from config import Config
+        max_tokens = max_tokens or Config.CHUNK_MAX_TOKENS
+        overlap_tokens = Config.CHUNK_OVERLAP_TOKENS if overlap_tokens is None else overlap_tokens
+    overlap_tokens = min(overlap_tokens, max_tokens // 2)
+
+    window = deque()  # (sentence, tokens) of the chunk being built
+    size = 0
+    fresh = False  # window holds sentences not emitted yet
     chunk_id = 0
 
-    for i in range(0, len(words), max_words):
-        chunk = " ".join(words[i:i + max_words])
-        chunks.append((chunk_id, chunk))
-        chunk_id += 1
+    for sentence, n in _sentences(text, max_tokens, count):
+        if sentence is None:
+            # paragraph end: close a reasonably full chunk here, without overlap
+            if fresh and size >= max_tokens // 2:
+                yield chunk_id, " ".join(s for s, _ in window)
+                chunk_id += 1
+            if not fresh or size >= max_tokens // 2:
+                window.clear()
+                size, fresh = 0, False
+            continue
+
+        if fresh and size + n > max_tokens:
+            yield chunk_id, " ".join(s for s, _ in window)
+            chunk_id += 1
+            carry, carried = deque(), 0
+            while window and carried + window[-1][1] <= overlap_tokens:
+                s = window.pop()
+                carry.appendleft(s)
+                carried += s[1]
+            window, size, fresh = carry, carried, False
+
+        while window and size + n > max_tokens:
+            size -= window.popleft()[1]
+        window.append((sentence, n))
+        size += n
+        fresh = True
 
-    return chunks
+    if fresh:
+        yield chunk_id, " ".join(s for s, _ in window)
@@ -0,0 +1,79 @@
+"""
+Drop-in VectorMemory replacement backed by memory.server.
+"""
+import numpy as np
+
+
+class _RemoteCacheStats:
+    """Stands in for VectorMemory.embed_cache; only stats() is remote."""
+
+    def __init__(self, client):
+        self._client = client
+
+    def stats(self):
+        return self._client._get("/stats")["embed_cache"]
+
+
+class RemoteVectorMemory:
+    """
+    Same public interface as VectorMemory (search, vectors, known_urls,
+    add_chunks, add_chunks_bulk, delete_url, checkpoint), served by a
+    shared memory server so every API worker uses one model and index.
+    """
+
+    def __init__(self, base_url, timeout=120, session=None):
+        import requests
+
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        self.embed_cache = _RemoteCacheStats(self)
+
+    def _post(self, path, payload):
+        response = self.session.post(self.base_url + path, json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def _get(self, path):
+        response = self.session.get(self.base_url + path, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def search(self, query, k=5):
+        return self._post("/search", {"query": query, "k": k})["results"]
+
+    def vectors(self, ids):
+        vecs = self._post("/vectors", {"ids": [int(i) for i in ids]})["vectors"]
+        return np.asarray(vecs, dtype="float32")
+
+    def warmup(self):
+        """The server warms itself; just check it is reachable."""
+        self._get("/health")
+
+    def known_urls(self, urls):
+        return set(self._post("/known_urls", {"urls": list(urls)})["urls"])
+
+    def add_chunks(self, url, chunks):
+        """
+        chunks: List[(chunk_id, chunk_text)]
+        """
+        return self.add_chunks_bulk(
+            [(url, chunk_id, chunk_text) for chunk_id, chunk_text in chunks]
+        )
+
+    def add_chunks_bulk(self, items, batch_size=None, threshold=0.90):
+        stored = self._post("/add_chunks_bulk", {
+            "items": [list(item) for item in items],
+            "batch_size": batch_size,
+            "threshold": threshold,
+        })["stored"]
+        return [tuple(pair) for pair in stored]
+
+    def delete_url(self, url):
+        return self._post("/delete_url", {"url": url})["removed"]
+
+    def checkpoint(self):
+        self._post("/checkpoint", {})
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,175 @@
+"""
+Embedding backends for VectorMemory.
+
+Every backend looks like a SentenceTransformer to VectorMemory:
+    encode(texts, batch_size=..., convert_to_numpy=True) -> float32 matrix
+    get_sentence_embedding_dimension() -> int
+
+  - torch:     sentence_transformers.SentenceTransformer (the default)
+  - onnx:      ONNX Runtime on CPU, no torch needed at inference time
+  - onnx-int8: the same with a dynamically int8-quantized model
+
+The ONNX backends load local files from EMBEDDING_MODEL_DIR:
+tokenizer.json, model.onnx / model_int8.onnx, export.json naming the
+model they came from (checked against EMBEDDING_MODEL) and, optionally,
+sentence_bert_config.json for the max sequence length. Create them with
+    cd agent
+    python -m memory.embedders --out data/models/all-MiniLM-L6-v2
+"""
+import json
+import os
+import shutil
+
+import numpy as np
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+ONNX_FILES = {
+    "onnx": "model.onnx",
+    "onnx-int8": "model_int8.onnx",
+}
+
+
+class OnnxEmbedder:
+    """
+    Mean-pooled, L2-normalized sentence embeddings from a transformer
+    exported to ONNX, matching sentence-transformers' output for
+    models like all-MiniLM-L6-v2 (Transformer -> Pooling(mean) -> Normalize).
+    """
+
+    def __init__(self, model_dir, file_name="model.onnx", max_length=None, threads=None):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        if max_length is None:
+            max_length = 256
+            config_path = os.path.join(model_dir, "sentence_bert_config.json")
+            if os.path.exists(config_path):
+                with open(config_path, "r", encoding="utf-8") as f:
+                    max_length = json.load(f).get("max_seq_length", max_length)
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length)
+        self.tokenizer.enable_padding()
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, file_name), options, providers=["CPUExecutionProvider"]
+        )
+        self._inputs = {i.name for i in self.session.get_inputs()}
+
+        dim = self.session.get_outputs()[0].shape[-1]
+        # exported models may leave the hidden size symbolic; ask the model
+        self._dimension = dim if isinstance(dim, int) else self.encode(["dimension"]).shape[1]
+
+    def get_sentence_embedding_dimension(self):
+        return self._dimension
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True, **kwargs):
+        batches = []
+        for start in range(0, len(texts), batch_size):
+            encoded = self.tokenizer.encode_batch(list(texts[start:start + batch_size]))
+            ids = np.asarray([e.ids for e in encoded], dtype=np.int64)
+            mask = np.asarray([e.attention_mask for e in encoded], dtype=np.int64)
+            feeds = {"input_ids": ids, "attention_mask": mask}
+            if "token_type_ids" in self._inputs:
+                feeds["token_type_ids"] = np.zeros_like(ids)
+
+            tokens = self.session.run(None, feeds)[0]  # (batch, seq, dim)
+            weights = mask[..., None].astype(np.float32)
+            pooled = (tokens * weights).sum(axis=1) / np.clip(weights.sum(axis=1), 1e-9, None)
+            batches.append(pooled)
+
+        if not batches:
+            return np.zeros((0, getattr(self, "_dimension", 0)), dtype="float32")
+        embs = np.vstack(batches).astype("float32")
+        embs /= np.clip(np.linalg.norm(embs, axis=1, keepdims=True), 1e-12, None)
+        return embs
+
+
+# written by export(): which model a directory holds
+EXPORT_MARKER = "export.json"
+
+
+def _check_export(model_dir, model_name):
+    """Refuse a directory exported from a different model than `model_name`."""
+    try:
+        with open(os.path.join(model_dir, EXPORT_MARKER), "r", encoding="utf-8") as f:
+            exported = json.load(f)["model"]
+    except (OSError, ValueError, KeyError):
+        raise ValueError(
+            f"{model_dir} does not record which model it was exported from; "
+            f"re-export it with `python -m memory.embedders --model {model_name} --out {model_dir}`"
+        )
+    if exported != model_name:
+        raise ValueError(
+            f"{model_dir} holds {exported}, but EMBEDDING_MODEL is {model_name}; "
+            f"re-export with `python -m memory.embedders --model {model_name} --out <dir>`"
+        )
+
+
+def load_embedder(backend, model_name, model_dir=None):
+    """
+    Build the encoder for `backend` (see BACKENDS). torch loads
+    `model_name` itself; the ONNX backends read the files exported for
+    it to `model_dir`.
+    """
+    if backend == "torch":
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(model_name)
+    if backend in ONNX_FILES:
+        if not model_dir or not os.path.isdir(model_dir):
+            raise FileNotFoundError(
+                f"EMBEDDING_MODEL_DIR {model_dir!r} not found; "
+                "create it with `python -m memory.embedders --out <dir>`"
+            )
+        _check_export(model_dir, model_name)
+        return OnnxEmbedder(str(model_dir), ONNX_FILES[backend])
+    raise ValueError(f"Unknown embedding backend {backend!r}; expected one of {BACKENDS}")
+
+
+def export(model_name, out_dir):
+    """
+    Save `model_name` for every backend under `out_dir`: the
+    sentence-transformers files (torch), model.onnx and model_int8.onnx.
+    """
+    from sentence_transformers import SentenceTransformer
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    os.makedirs(out_dir, exist_ok=True)
+    model = SentenceTransformer(model_name)
+    model.save(out_dir)
+
+    onnx_model = SentenceTransformer(model_name, backend="onnx")
+    onnx_model.save(os.path.join(out_dir, "onnx_export"))
+    os.replace(
+        os.path.join(out_dir, "onnx_export", "onnx", "model.onnx"),
+        os.path.join(out_dir, "model.onnx"),
+    )
+    shutil.rmtree(os.path.join(out_dir, "onnx_export"))
+    quantize_dynamic(
+        os.path.join(out_dir, "model.onnx"),
+        os.path.join(out_dir, "model_int8.onnx"),
+        weight_type=QuantType.QInt8,
+    )
+    with open(os.path.join(out_dir, EXPORT_MARKER), "w", encoding="utf-8") as f:
+        json.dump({"model": model_name}, f)
+    print(f"Saved {model_name} (torch, onnx, onnx-int8) to {out_dir}")
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    from pathlib import Path
+
+    sys.path.insert(0, str(Path(__file__).parent.parent))
+    from config import Config
+
+    parser = argparse.ArgumentParser(description="Export the embedding model for the ONNX backends")
+    parser.add_argument("--model", default=Config.EMBEDDING_MODEL)
+    parser.add_argument("--out", default=str(Config.EMBEDDING_MODEL_DIR))
+    args = parser.parse_args()
+    export(args.model, args.out)
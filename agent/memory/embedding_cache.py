@@ -0,0 +1,140 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+class EmbeddingCache:
+    """
+    Content-hash cache for encoder output, keyed by (model name, text).
+    Tiers:
+      - in-process LRU of up to `max_items` vectors
+      - optional SQLite file of up to `disk_max_items` vectors, shared
+        across restarts and processes
+    Vectors are stored exactly as the encoder returned them (float32).
+    """
+
+    # prune the disk tier every this many writes, not on every write
+    DISK_PRUNE_EVERY = 1000
+
+    def __init__(self, model_name, max_items=20000, disk_path=None, disk_max_items=500000):
+        self.model_name = model_name
+        self.max_items = max_items
+        self.disk_max_items = disk_max_items
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = None
+        self._disk_writes = 0
+        if disk_path:
+            self._disk = sqlite3.connect(str(disk_path), check_same_thread=False)
+            self._disk.execute("PRAGMA journal_mode=WAL")
+            self._disk.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, vec BLOB NOT NULL, used REAL NOT NULL)"
+            )
+            self._disk.commit()
+
+    def key(self, text):
+        h = hashlib.sha1()
+        h.update(self.model_name.encode("utf-8"))
+        h.update(b"\0")
+        h.update(text.encode("utf-8"))
+        return h.hexdigest()
+
+    def get_many(self, texts):
+        """Return a list aligned with `texts`: cached vector or None."""
+        keys = [self.key(t) for t in texts]
+        found = [None] * len(keys)
+        missing = []
+
+        with self._lock:
+            for i, k in enumerate(keys):
+                vec = self._lru.get(k)
+                if vec is not None:
+                    self._lru.move_to_end(k)
+                    found[i] = vec
+                    self.hits += 1
+                else:
+                    missing.append(i)
+
+            if missing and self._disk is not None:
+                from_disk = self._disk_get([keys[i] for i in missing])
+                still_missing = []
+                for i in missing:
+                    vec = from_disk.get(keys[i])
+                    if vec is None:
+                        still_missing.append(i)
+                        continue
+                    found[i] = vec
+                    self._lru_put(keys[i], vec)
+                    self.disk_hits += 1
+                missing = still_missing
+
+            self.misses += len(missing)
+        return found
+
+    def put_many(self, texts, vectors):
+        keys = [self.key(t) for t in texts]
+        vectors = [np.array(v, dtype="float32", copy=True) for v in vectors]
+        with self._lock:
+            for k, vec in zip(keys, vectors):
+                self._lru_put(k, vec)
+            if self._disk is not None:
+                self._disk_put(keys, vectors)
+
+    def stats(self):
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            "size": len(self._lru),
+        }
+
+    def _lru_put(self, key, vec):
+        self._lru[key] = vec
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_items:
+            self._lru.popitem(last=False)
+
+    def _disk_get(self, keys):
+        placeholders = ",".join("?" * len(keys))
+        rows = self._disk.execute(
+            f"SELECT key, vec FROM embeddings WHERE key IN ({placeholders})", keys
+        ).fetchall()
+        if rows:
+            with self._disk:
+                self._disk.executemany(
+                    "UPDATE embeddings SET used = ? WHERE key = ?",
+                    [(time.time(), k) for k, _ in rows],
+                )
+        return {k: np.frombuffer(blob, dtype="float32") for k, blob in rows}
+
+    def _disk_put(self, keys, vectors):
+        now = time.time()
+        with self._disk:
+            self._disk.executemany(
+                "INSERT OR REPLACE INTO embeddings(key, vec, used) VALUES (?, ?, ?)",
+                [(k, v.tobytes(), now) for k, v in zip(keys, vectors)],
+            )
+        self._disk_writes += len(keys)
+        if self._disk_writes >= self.DISK_PRUNE_EVERY:
+            self._disk_writes = 0
+            self._disk_prune()
+
+    def _disk_prune(self):
+        """Evict least recently used rows beyond `disk_max_items`."""
+        with self._disk:
+            self._disk.execute(
+                "DELETE FROM embeddings WHERE key IN ("
+                "SELECT key FROM embeddings ORDER BY used DESC LIMIT -1 OFFSET ?)",
+                (self.disk_max_items,),
+            )
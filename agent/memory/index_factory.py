@@ -0,0 +1,232 @@
+import numpy as np
+import faiss
+
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+
+# how stored vectors are encoded; bytes per 384-d vector: 1536 / 768 / 384
+CODECS = ("float32", "fp16", "int8")
+
+_STORAGE = {"float32": "Flat", "fp16": "SQfp16", "int8": "SQ8"}
+_QTYPES = {
+    faiss.ScalarQuantizer.QT_fp16: "fp16",
+    faiss.ScalarQuantizer.QT_8bit: "int8",
+}
+
+# faiss wants roughly this many training points per IVF centroid
+MIN_POINTS_PER_CENTROID = 39
+
+# 8-bit PQ trains 256 centroids per sub-quantizer
+MIN_PQ_TRAIN_POINTS = 256 * MIN_POINTS_PER_CENTROID
+
+
+def min_train_size(kind):
+    """Fewest vectors `kind` can be trained on without degrading badly."""
+    if kind == "ivf_pq":
+        return MIN_PQ_TRAIN_POINTS
+    if kind == "ivf_flat":
+        return MIN_POINTS_PER_CENTROID
+    return 0
+
+
+def _train_unit_range(index):
+    """
+    Train an int8 scalar quantizer on the [-1, 1] range every component
+    of a unit vector lies in, so vectors added later are never clipped.
+    """
+    if not index.is_trained:
+        bounds = np.ones((2, index.d), dtype="float32")
+        bounds[0] = -1
+        index.train(bounds)
+    return index
+
+
+def build_index(kind, dimension, train_vectors=None, codec="float32", **params):
+    """
+    Build an (untrained-if-needed, trained-if-possible) inner-product index.
+
+    kind: one of INDEX_TYPES
+    train_vectors: float32 matrix used to train IVF quantizers
+    codec: one of CODECS, how the index stores vectors
+    params: nlist, pq_m, hnsw_m, hnsw_ef_construction
+
+    ivf_pq is wrapped in a refinement stage (stored with `codec`) so
+    returned scores are (near-)exact inner products; VectorMemory's dedup
+    threshold relies on that.
+    """
+    if codec not in CODECS:
+        raise ValueError(f"Unknown vector codec {codec!r}; expected one of {CODECS}")
+    storage = _STORAGE[codec]
+
+    if kind == "flat":
+        if codec == "float32":
+            return faiss.IndexFlatIP(dimension)
+        return _train_unit_range(
+            faiss.index_factory(dimension, storage, faiss.METRIC_INNER_PRODUCT)
+        )
+
+    if kind == "hnsw":
+        spec = f"HNSW{params.get('hnsw_m', 32)}"
+        if codec != "float32":
+            spec += f",{storage}"
+        index = faiss.index_factory(dimension, spec, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = params.get("hnsw_ef_construction", 80)
+        return _train_unit_range(index)
+
+    if kind in ("ivf_flat", "ivf_pq"):
+        nlist = params.get("nlist", 1024)
+        if train_vectors is not None:
+            # shrink nlist for small training sets instead of failing
+            nlist = max(1, min(nlist, len(train_vectors) // MIN_POINTS_PER_CENTROID))
+        if kind == "ivf_flat":
+            encoding = storage
+        else:
+            if train_vectors is not None and len(train_vectors) < MIN_PQ_TRAIN_POINTS:
+                raise ValueError(
+                    f"ivf_pq needs at least {MIN_PQ_TRAIN_POINTS} training vectors, "
+                    f"got {len(train_vectors)}"
+                )
+            refine = "RFlat" if codec == "float32" else f"Refine({storage})"
+            encoding = f"PQ{params.get('pq_m', 48)},{refine}"
+        index = faiss.index_factory(
+            dimension, f"IVF{nlist},{encoding}", faiss.METRIC_INNER_PRODUCT
+        )
+        if train_vectors is not None:
+            index.train(train_vectors)
+        return index
+
+    raise ValueError(f"Unknown index type {kind!r}; expected one of {INDEX_TYPES}")
+
+
+def with_ids(inner, vectors=None, ids=None):
+    """
+    Wrap an empty `inner` index so vectors are addressed by explicit
+    memory ids instead of insertion position.
+    """
+    index = faiss.IndexIDMap2(inner)
+    if vectors is not None and len(vectors):
+        index.add_with_ids(vectors, np.asarray(ids, dtype="int64"))
+    return index
+
+
+def unwrap(index):
+    """Inner index of an id-mapped index (or the index itself)."""
+    if isinstance(index, faiss.IndexIDMap):
+        return faiss.downcast_index(index.index)
+    return index
+
+
+def stored_ids(index):
+    """Memory ids held by an id-mapped index, in storage order."""
+    return faiss.vector_to_array(index.id_map)
+
+
+def attach_ids(index):
+    """
+    Upgrade a legacy position-addressed index (position == memory id)
+    to an id-mapped one with the same type and training.
+    """
+    if isinstance(index, faiss.IndexIDMap):
+        return index
+    vectors = index.reconstruct_n(0, index.ntotal)
+    inner = faiss.clone_index(index)
+    inner.reset()
+    return with_ids(inner, vectors, np.arange(len(vectors)))
+
+
+def set_search_params(index, nprobe=None, ef_search=None):
+    """Apply query-time knobs to whichever index type is in use."""
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None and nprobe:
+        ivf.nprobe = nprobe
+    inner = unwrap(index)
+    if isinstance(inner, faiss.IndexHNSW) and ef_search:
+        inner.hnsw.efSearch = ef_search
+
+
+def is_flat(index):
+    """Exhaustive (pre-promotion) index, whatever its codec."""
+    return isinstance(unwrap(index), (faiss.IndexFlat, faiss.IndexScalarQuantizer))
+
+
+def describe(index):
+    """
+    (kind, codec, params) of an index built by build_index, enough to
+    rebuild it with another codec.
+    """
+    inner = unwrap(index)
+    if isinstance(inner, faiss.IndexRefine):
+        refine = faiss.downcast_index(inner.refine_index)
+        ivf = faiss.downcast_index(faiss.extract_index_ivf(inner))
+        return "ivf_pq", _codec_of(refine), {"nlist": ivf.nlist, "pq_m": ivf.pq.M}
+    if isinstance(inner, faiss.IndexHNSW):
+        storage = faiss.downcast_index(inner.storage)
+        return "hnsw", _codec_of(storage), {"hnsw_m": inner.hnsw.nb_neighbors(1)}
+    ivf = faiss.try_extract_index_ivf(inner)
+    if ivf is not None:
+        ivf = faiss.downcast_index(ivf)
+        if isinstance(ivf, faiss.IndexIVFPQ):
+            # legacy PQ without refinement
+            return "ivf_pq", "float32", {"nlist": ivf.nlist, "pq_m": ivf.pq.M}
+        return "ivf_flat", _codec_of(ivf), {"nlist": ivf.nlist}
+    return "flat", _codec_of(inner), {}
+
+
+def _codec_of(inner):
+    if isinstance(inner, (faiss.IndexScalarQuantizer, faiss.IndexIVFScalarQuantizer)):
+        return _QTYPES.get(inner.sq.qtype, "other")
+    return "float32"
+
+
+def all_vectors(index):
+    """Every stored vector (decoded) in storage order, for any index type."""
+    inner = unwrap(index)
+    ivf = faiss.try_extract_index_ivf(inner)
+    if ivf is not None:
+        ivf.make_direct_map()
+    return inner.reconstruct_n(0, inner.ntotal)
+
+
+def recode(index, codec, **params):
+    """
+    Rebuild an id-mapped index with the same type and shape but vectors
+    stored with `codec`. Memory ids are preserved; IVF indexes are
+    retrained on the stored vectors. Returns the new index.
+    """
+    kind, _, shape = describe(index)
+    vectors = all_vectors(index)
+    new_inner = build_index(
+        kind, index.d, train_vectors=vectors, codec=codec, **{**params, **shape}
+    )
+    return with_ids(new_inner, vectors, stored_ids(index))
+
+
+def migrate(index, kind, dimension, **params):
+    """
+    Copy every vector of an id-mapped flat index into a freshly trained,
+    id-mapped `kind` index. Memory ids are preserved.
+    """
+    inner = unwrap(index)
+    vectors = inner.reconstruct_n(0, inner.ntotal)
+    new_inner = build_index(kind, dimension, train_vectors=vectors, **params)
+    return with_ids(new_inner, vectors, stored_ids(index))
+
+
+def drop_ids_from(index, first_id):
+    """
+    Remove every vector whose memory id is >= first_id. Index types that
+    cannot remove (HNSW, refined PQ) are rebuilt with the same type and
+    training from the surviving vectors.
+    """
+    ids = stored_ids(index)
+    if not (ids >= first_id).any():
+        return index
+    try:
+        index.remove_ids(faiss.IDSelectorRange(first_id, np.iinfo("int64").max))
+        return index
+    except RuntimeError:
+        inner = unwrap(index)
+        keep = ids < first_id
+        vectors = inner.reconstruct_n(0, inner.ntotal)[keep]
+        new_inner = faiss.clone_index(inner)
+        new_inner.reset()
+        return with_ids(new_inner, vectors, ids[keep])
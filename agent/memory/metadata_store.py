@@ -0,0 +1,247 @@
+import os
+import json
+import sqlite3
+import threading
+
+from memory import fingerprints
+
+_BAND_COLUMNS = [f"b{i}" for i in range(fingerprints.BANDS)]
+
+
+class MetadataStore:
+    """
+    SQLite-backed chunk metadata for VectorMemory.
+    Tables:
+      - urls:   id, url              (each source URL stored once)
+      - chunks: id, url_id, chunk    (id == FAISS id)
+      - state:  key, value           (e.g. the last checkpointed id)
+      - chunk_fingerprints / doc_fingerprints: exact hash, MinHash and
+        its LSH band keys per chunk id / URL, see memory.fingerprints
+    Chunk text stays on disk and is fetched only for search hits.
+    Writes go through one connection (VectorMemory's ingestion thread);
+    reads use a connection per thread, so with WAL they see the last
+    committed batch without waiting on the writer.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS urls (
+            id INTEGER PRIMARY KEY,
+            url TEXT NOT NULL UNIQUE
+        );
+        CREATE TABLE IF NOT EXISTS chunks (
+            id INTEGER PRIMARY KEY,
+            url_id INTEGER NOT NULL REFERENCES urls(id),
+            chunk TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS chunks_url_id ON chunks(url_id);
+        CREATE TABLE IF NOT EXISTS state (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        );
+    """ + "".join(
+        f"CREATE TABLE IF NOT EXISTS {table} ({key} INTEGER PRIMARY KEY, "
+        f"exact TEXT NOT NULL, minhash TEXT, {', '.join(c + ' INTEGER' for c in _BAND_COLUMNS)});\n"
+        + "".join(
+            f"CREATE INDEX IF NOT EXISTS {table}_{col} ON {table}({col});\n"
+            for col in ["exact"] + _BAND_COLUMNS
+        )
+        for table, key in (("chunk_fingerprints", "id"), ("doc_fingerprints", "url_id"))
+    )
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        # the append log already makes batches durable
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+        self.conn.commit()
+        self._local = threading.local()
+        self._readers = []
+        self._readers_lock = threading.Lock()
+
+    def _reader(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # opened on this thread, closed by close() from any thread
+            conn = self._local.conn = sqlite3.connect(self.path, check_same_thread=False)
+            with self._readers_lock:
+                self._readers.append(conn)
+        return conn
+
+    def __len__(self):
+        return self._reader().execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def max_id(self):
+        """Largest stored chunk id, or -1 when empty."""
+        row = self._reader().execute("SELECT MAX(id) FROM chunks").fetchone()
+        return -1 if row[0] is None else row[0]
+
+    def ids(self):
+        """Iterate stored chunk ids in ascending order."""
+        for (chunk_id,) in self._reader().execute("SELECT id FROM chunks ORDER BY id"):
+            yield chunk_id
+
+    def add(self, records):
+        """
+        records: List[{id, url, chunk}], optionally with the chunk's
+        fingerprint (exact, minhash) and its document's (doc_exact, doc_minhash).
+        Ids that already exist are left alone, so log replay is idempotent.
+        """
+        slots = ", ".join("?" * (2 + fingerprints.BANDS))
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO urls(url) VALUES (?)",
+                [(rec["url"],) for rec in records],
+            )
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO chunks(id, url_id, chunk) "
+                "SELECT ?, id, ? FROM urls WHERE url = ?",
+                [(rec["id"], rec["chunk"], rec["url"]) for rec in records],
+            )
+            self.conn.executemany(
+                f"INSERT OR IGNORE INTO chunk_fingerprints VALUES (?, {slots})",
+                [
+                    (rec["id"], rec["exact"], rec["minhash"], *fingerprints.bands(rec["minhash"]))
+                    for rec in records if "exact" in rec
+                ],
+            )
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO doc_fingerprints SELECT id, {slots} FROM urls WHERE url = ?",
+                [
+                    (rec["doc_exact"], rec["doc_minhash"],
+                     *fingerprints.bands(rec["doc_minhash"]), rec["url"])
+                    for rec in records if "doc_exact" in rec
+                ],
+            )
+
+    def _similar(self, query, fps, threshold):
+        """
+        For each (exact, minhash): the first key `query` returns that
+        matches exactly, else one at least `threshold` similar, else None.
+        """
+        found = []
+        reader = self._reader()
+        for exact, minhash in fps:
+            match = None
+            for key, other_exact, other in reader.execute(query, (exact, *fingerprints.bands(minhash))):
+                if other_exact == exact:
+                    match = key
+                    break
+                if (match is None and minhash is not None and other is not None
+                        and fingerprints.similarity(minhash, other) >= threshold):
+                    match = key
+            found.append(match)
+        return found
+
+    def similar_chunks(self, fps, threshold):
+        """Per (exact, minhash): id of a stored chunk it duplicates, or None."""
+        where = " OR ".join(f"{c} = ?" for c in ["exact"] + _BAND_COLUMNS)
+        return self._similar(
+            f"SELECT id, exact, minhash FROM chunk_fingerprints WHERE {where}", fps, threshold
+        )
+
+    def similar_documents(self, fps, threshold):
+        """Per (exact, minhash): URL of a stored document it duplicates, or None."""
+        where = " OR ".join(f"f.{c} = ?" for c in ["exact"] + _BAND_COLUMNS)
+        return self._similar(
+            "SELECT u.url, f.exact, f.minhash FROM doc_fingerprints f "
+            f"JOIN urls u ON u.id = f.url_id WHERE {where}",
+            fps, threshold,
+        )
+
+    def get(self, ids):
+        """Return {id: {id, url, chunk}} for the ids that exist."""
+        ids = [int(i) for i in ids]
+        if not ids:
+            return {}
+        placeholders = ",".join("?" * len(ids))
+        rows = self._reader().execute(
+            "SELECT c.id, u.url, c.chunk FROM chunks c "
+            f"JOIN urls u ON u.id = c.url_id WHERE c.id IN ({placeholders})",
+            ids,
+        )
+        return {row[0]: {"id": row[0], "url": row[1], "chunk": row[2]} for row in rows}
+
+    def existing(self, ids):
+        """Subset of `ids` that are stored."""
+        ids = [int(i) for i in ids]
+        if not ids:
+            return set()
+        placeholders = ",".join("?" * len(ids))
+        rows = self._reader().execute(
+            f"SELECT id FROM chunks WHERE id IN ({placeholders})", ids
+        )
+        return {row[0] for row in rows}
+
+    def known_urls(self, urls):
+        """Subset of `urls` that have at least one stored chunk."""
+        urls = list(urls)
+        if not urls:
+            return set()
+        placeholders = ",".join("?" * len(urls))
+        rows = self._reader().execute(
+            f"SELECT u.url FROM urls u WHERE u.url IN ({placeholders}) "
+            "AND EXISTS (SELECT 1 FROM chunks c WHERE c.url_id = u.id)",
+            urls,
+        )
+        return {row[0] for row in rows}
+
+    def delete_url(self, url):
+        """Remove every chunk of `url`; returns the removed ids."""
+        with self.conn:
+            ids = [
+                row[0] for row in self.conn.execute(
+                    "SELECT c.id FROM chunks c JOIN urls u ON u.id = c.url_id "
+                    "WHERE u.url = ?",
+                    (url,),
+                )
+            ]
+            self.conn.executemany(
+                "DELETE FROM chunk_fingerprints WHERE id = ?", [(i,) for i in ids]
+            )
+            self.conn.execute(
+                "DELETE FROM doc_fingerprints WHERE url_id = (SELECT id FROM urls WHERE url = ?)",
+                (url,),
+            )
+            self.conn.execute(
+                "DELETE FROM chunks WHERE url_id = (SELECT id FROM urls WHERE url = ?)",
+                (url,),
+            )
+            self.conn.execute("DELETE FROM urls WHERE url = ?", (url,))
+        return ids
+
+    def get_state(self, key, default=None):
+        row = self._reader().execute(
+            "SELECT value FROM state WHERE key = ?", (key,)
+        ).fetchone()
+        return default if row is None else row[0]
+
+    def set_state(self, key, value):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO state(key, value) VALUES (?, ?)",
+                (key, int(value)),
+            )
+        # make the checkpoint marker durable before the log is dropped
+        self.conn.execute("PRAGMA wal_checkpoint(FULL)")
+
+    def import_json(self, path):
+        """
+        One-off import of the legacy memory_store.json list of dicts.
+        Returns the number of chunks imported.
+        """
+        if not os.path.exists(path):
+            return 0
+        with open(path, "r", encoding="utf-8") as f:
+            records = json.load(f)
+        if records:
+            self.add(records)
+        return len(records)
+
+    def close(self):
+        with self._readers_lock:
+            readers, self._readers = self._readers, []
+        for conn in readers:
+            conn.close()
+        self.conn.close()
@@ -0,0 +1,78 @@
+"""
+One-shot conversion of a persisted memory.index to another vector codec
+(float32, fp16 or int8; see index_factory.CODECS).
+
+The index keeps its type (flat / IVF / HNSW) and memory ids, so the
+SQLite metadata and the append log stay valid and nothing is re-embedded.
+Stop every process that has the memory open (API workers, memory server)
+before running it, then set MEMORY_VECTOR_CODEC to the same codec so new
+and promoted indexes use it too:
+    cd agent
+    python -m memory.migrate_index --codec fp16
+The previous file is kept as memory.index.bak unless --no-backup is given.
+"""
+import os
+import shutil
+
+import faiss
+
+from memory import index_factory
+from memory.vector_memory import _fsync_dir, _fsync_path
+
+
+def migrate_file(path, codec, backup=True, **params):
+    """
+    Rewrite the index at `path` with vectors stored as `codec`.
+    params: index build knobs for the rebuilt index (e.g. hnsw_ef_construction).
+    Returns {vectors, codec_before, codec_after, bytes_before, bytes_after}.
+    """
+    path = str(path)
+    index = index_factory.attach_ids(faiss.read_index(path))
+    _, before, _ = index_factory.describe(index)
+    report = {
+        "vectors": index.ntotal,
+        "codec_before": before,
+        "codec_after": codec,
+        "bytes_before": os.path.getsize(path),
+        "bytes_after": os.path.getsize(path),
+    }
+    if before == codec:
+        return report
+
+    converted = index_factory.recode(index, codec, **params)
+    tmp = path + ".tmp"
+    faiss.write_index(converted, tmp)
+    _fsync_path(tmp)
+    if backup:
+        shutil.copy2(path, path + ".bak")
+    os.replace(tmp, path)
+    _fsync_dir(os.path.dirname(os.path.abspath(path)))
+    report["bytes_after"] = os.path.getsize(path)
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    from pathlib import Path
+
+    sys.path.insert(0, str(Path(__file__).parent.parent))
+    from config import Config
+
+    parser = argparse.ArgumentParser(description="Convert memory.index to another vector codec")
+    parser.add_argument("--codec", required=True, choices=index_factory.CODECS)
+    parser.add_argument("--index", default=str(Config.MEMORY_INDEX_PATH))
+    parser.add_argument("--no-backup", action="store_true")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.index):
+        sys.exit(f"No index at {args.index}")
+    result = migrate_file(args.index, args.codec, backup=not args.no_backup)
+    if result["codec_before"] == args.codec:
+        print(f"{args.index} already stores {args.codec} vectors")
+    else:
+        print(
+            f"{args.index}: {result['vectors']} vectors, "
+            f"{result['codec_before']} -> {result['codec_after']}, "
+            f"{result['bytes_before'] / 2**20:.1f} MiB -> {result['bytes_after'] / 2**20:.1f} MiB"
+        )
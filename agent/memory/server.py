@@ -0,0 +1,187 @@
+"""
+Out-of-process vector memory shared by several API workers.
+
+One process owns the embedding model, the FAISS index and the metadata
+store; API workers talk to it through memory.client.RemoteVectorMemory
+(set MEMORY_SERVER_URL). Concurrent searches are micro-batched into one
+encode + one index search.
+
+Run it next to the API:
+    cd agent
+    python -m memory.server
+"""
+import asyncio
+import sys
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fastapi import FastAPI
+from pydantic import BaseModel
+
+from config import Config
+
+
+class SearchBatcher:
+    """
+    Collects searches arriving within `window` seconds (up to
+    `max_batch`) and runs them as one VectorMemory.search_many call.
+    """
+
+    def __init__(self, memory, window, max_batch):
+        self.memory = memory
+        self.window = window
+        self.max_batch = max_batch
+        self.batches = 0
+        self.queries = 0
+        self._queue = asyncio.Queue()
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+
+    async def search(self, query, k):
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((query, k, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            k = max(item[1] for item in batch)
+            try:
+                results = await asyncio.to_thread(
+                    self.memory.search_many, [item[0] for item in batch], k
+                )
+            except Exception as e:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.queries += len(batch)
+            for (_, item_k, future), hits in zip(batch, results):
+                if not future.done():
+                    future.set_result(hits[:item_k])
+
+
+memory = None
+batcher = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global memory, batcher
+    from memory.vector_memory import VectorMemory
+
+    if memory is None:  # tests install their own
+        Config.ensure_directories()
+        memory = VectorMemory()
+        memory.warmup()
+    batcher = SearchBatcher(
+        memory, Config.MEMORY_SERVER_BATCH_MS / 1000, Config.MEMORY_SERVER_MAX_BATCH
+    )
+    batcher.start()
+    yield
+    await batcher.stop()
+    await asyncio.to_thread(memory.close)
+
+
+app = FastAPI(title="Research Agent vector memory", lifespan=lifespan)
+
+
+class SearchRequest(BaseModel):
+    query: str
+    k: int = 5
+
+class IdsRequest(BaseModel):
+    ids: List[int]
+
+class UrlsRequest(BaseModel):
+    urls: List[str]
+
+class IngestRequest(BaseModel):
+    items: List[list]  # [url, chunk_id, chunk_text]
+    batch_size: Optional[int] = None
+    threshold: float = 0.90
+
+class UrlRequest(BaseModel):
+    url: str
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok", "ntotal": memory.index.ntotal}
+
+
+@app.get("/stats")
+async def stats():
+    return {
+        "ntotal": memory.index.ntotal,
+        "chunks": len(memory.store),
+        "embed_cache": memory.embed_cache.stats(),
+        "search_batches": batcher.batches,
+        "search_queries": batcher.queries,
+    }
+
+
+@app.post("/search")
+async def search(request: SearchRequest):
+    return {"results": await batcher.search(request.query, request.k)}
+
+
+@app.post("/vectors")
+async def vectors(request: IdsRequest):
+    vecs = await asyncio.to_thread(memory.vectors, request.ids)
+    return {"vectors": vecs.tolist()}
+
+
+@app.post("/known_urls")
+async def known_urls(request: UrlsRequest):
+    return {"urls": sorted(await asyncio.to_thread(memory.known_urls, request.urls))}
+
+
+@app.post("/add_chunks_bulk")
+async def add_chunks_bulk(request: IngestRequest):
+    # VectorMemory queues this behind other writers on its ingestion thread
+    stored = await asyncio.to_thread(
+        memory.add_chunks_bulk,
+        [tuple(item) for item in request.items],
+        request.batch_size,
+        request.threshold,
+    )
+    return {"stored": stored}
+
+
+@app.post("/delete_url")
+async def delete_url(request: UrlRequest):
+    return {"removed": await asyncio.to_thread(memory.delete_url, request.url)}
+
+
+@app.post("/checkpoint")
+async def checkpoint():
+    await asyncio.to_thread(memory.checkpoint)
+    return {"status": "ok"}
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host=Config.MEMORY_SERVER_HOST, port=Config.MEMORY_SERVER_PORT)
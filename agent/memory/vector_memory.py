@@ -1,66 +1,251 @@
 import os
-import json
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
-from sentence_transformers import SentenceTransformer
 import faiss
 
+from memory.append_log import AppendLog
+from memory.metadata_store import MetadataStore
+from memory.embedding_cache import EmbeddingCache
+from memory import fingerprints, index_factory
+from memory.embedders import load_embedder
+from utils.rwlock import ReadWriteLock
+
+def _fsync_path(path):
+    with open(path, "rb") as f:
+        os.fsync(f.fileno())
+
+
+def _fsync_dir(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
 class VectorMemory:
     """
     Persistent vector memory store using FAISS.
     Stores: {id, url, chunk, embedding}
+    FAISS holds embeddings keyed by id; SQLite holds url + chunk text.
     Capabilities:
-      - add new chunks only if they aren't duplicates
+      - add new chunks only if they aren't duplicates: fingerprints
+        first (memory.fingerprints), embeddings for what survives
       - retrieve relevant chunks based on similarity
       - persistent index + metadata across runs
+      - append-only log per batch, compacted by periodic checkpoints
+      - flat index that is promoted to IVF / HNSW once it grows large
+      - vectors stored as float32, fp16 or int8 (MEMORY_VECTOR_CODEC)
+      - safe to share between threads (see below)
+
+    Concurrency: every mutation (ingest, delete, checkpoint) runs on a
+    single ingestion thread, in submission order. Embedding, dedup, the
+    log fsync and SQLite commits happen outside the index lock; only the
+    in-memory index update takes the write side of `_index_lock`, and
+    an ANN promotion is built on the side and swapped in. Searches take
+    the read side, so they never wait on embedding or disk I/O.
     """
 
     def __init__(self, 
                  index_path=None,
                  meta_path=None,
-                 model_name=None):
+                 model_name=None,
+                 db_path=None,
+                 log_path=None,
+                 checkpoint_every=None,
+                 index_type=None,
+                 codec=None,
+                 fingerprint_dedup=None,
+                 model=None):
         from config import Config
         
         self.index_path = str(index_path or Config.MEMORY_INDEX_PATH)
+        # legacy JSON metadata, imported once into the SQLite store
         self.meta_path = str(meta_path or Config.MEMORY_META_PATH)
+        self.store = MetadataStore(db_path or Config.MEMORY_DB_PATH)
+        self.log = AppendLog(log_path or Config.MEMORY_LOG_PATH)
+        self.checkpoint_every = checkpoint_every or Config.MEMORY_CHECKPOINT_EVERY
+        self.index_type = index_type or Config.MEMORY_INDEX_TYPE
+        self.codec = codec or Config.MEMORY_VECTOR_CODEC
+        self.ann_threshold = Config.MEMORY_ANN_THRESHOLD
+        self.fingerprint_dedup = (
+            Config.MEMORY_FINGERPRINT_DEDUP if fingerprint_dedup is None else fingerprint_dedup
+        )
+        self.near_dup_jaccard = Config.MEMORY_NEAR_DUP_JACCARD
+        self.index_params = {
+            "codec": self.codec,
+            "nlist": Config.MEMORY_IVF_NLIST,
+            "pq_m": Config.MEMORY_PQ_M,
+            "hnsw_m": Config.MEMORY_HNSW_M,
+        }
         model_name = model_name or Config.EMBEDDING_MODEL
+        backend = Config.EMBEDDING_BACKEND
         
-        self.model = SentenceTransformer(model_name)
+        if model is None:
+            model = load_embedder(backend, model_name, Config.EMBEDDING_MODEL_DIR)
+        self.model = model  # anything with a SentenceTransformer-style encode()
+        self.embed_cache = EmbeddingCache(
+            # backends don't produce identical vectors; don't share entries
+            model_name if backend == "torch" else f"{model_name}@{backend}",
+            max_items=Config.EMBED_CACHE_SIZE,
+            disk_path=Config.EMBED_CACHE_PATH,
+            disk_max_items=Config.EMBED_CACHE_DISK_SIZE,
+        )
         
-        # memory metadata structure
-        self.memory = []  # list of dicts {id, url, chunk}
         self.next_id = 0
         
-        # vector index
-        self.dimension = 384  # all-MiniLM-L6-v2 embeddings size
-        self.index = faiss.IndexFlatIP(self.dimension)
+        # vector index: always starts flat, see _maybe_promote
+        self.dimension = self.model.get_sentence_embedding_dimension()
+        self.index = index_factory.with_ids(
+            index_factory.build_index("flat", self.dimension, codec=self.codec)
+        )
         print("VectorMemory instance:", id(self))
+        self._index_lock = ReadWriteLock()
+        self._ingest = ThreadPoolExecutor(max_workers=1, thread_name_prefix="memory-ingest")
         self._load()
+        index_factory.set_search_params(
+            self.index,
+            nprobe=Config.MEMORY_IVF_NPROBE,
+            ef_search=Config.MEMORY_HNSW_EF_SEARCH,
+        )
 
     def _load(self):
-        """Load metadata + index if exists."""
-        if os.path.exists(self.meta_path):
-            with open(self.meta_path, "r", encoding="utf-8") as f:
-                self.memory = json.load(f)
-                if self.memory:
-                    self.next_id = max(m["id"] for m in self.memory) + 1
-
+        """Open index + metadata if they exist, then replay the log tail."""
         if os.path.exists(self.index_path):
-            self.index = faiss.read_index(self.index_path)
+            self.index = index_factory.attach_ids(faiss.read_index(self.index_path))
+            if self.index.d != self.dimension:
+                raise ValueError(
+                    f"{self.index_path} holds {self.index.d}-d vectors but the embedding "
+                    f"model produces {self.dimension}-d; rebuild the memory for this model"
+                )
+            _, codec, _ = index_factory.describe(self.index)
+            if codec != self.codec:
+                print(
+                    f"[memory] {self.index_path} stores {codec} vectors, not {self.codec}; "
+                    f"run `python -m memory.migrate_index --codec {self.codec}` to convert it"
+                )
+
+        if len(self.store) == 0 and os.path.exists(self.meta_path):
+            # legacy store: list position was the FAISS id, and the JSON
+            # was always written together with the index
+            imported = self.store.import_json(self.meta_path)
+            self.store.set_state("checkpoint_id", self.store.max_id() + 1)
+            print(f"[memory] Imported {imported} chunks from {self.meta_path}")
+
+        # ids below this are in the index file; the log holds the rest
+        checkpoint_id = self.store.get_state("checkpoint_id", 0)
+
+        # a crash between the index rename and the checkpoint marker can
+        # leave the index ahead; drop the tail, the log still holds it
+        self.index = index_factory.drop_ids_from(self.index, checkpoint_id)
+
+        self.next_id = max(checkpoint_id, self.store.max_id() + 1)
+        records, vectors = [], []
+        for rec, vec in self.log.replay(min_id=checkpoint_id):
+            records.append(rec)
+            vectors.append(vec)
+        if records:
+            ids = [rec["id"] for rec in records]
+            self.index.add_with_ids(np.vstack(vectors), np.asarray(ids, dtype="int64"))
+            self.store.add(records)
+            self.next_id = max(self.next_id, max(ids) + 1)
+            print(f"[memory] Replayed {len(records)} chunks from {self.log.path}")
+
+    def _save(self, records=None, embs=None):
+        """
+        Persist a batch: append it to the log (one fsync).
+        Called before the batch touches the index or SQLite, so
+        everything visible is already recoverable from the log;
+        _maybe_checkpoint compacts the log once it is long enough.
+        """
+        if records:
+            self.log.append(records, embs)
+
+    def _maybe_checkpoint(self):
+        if self.log.entries >= self.checkpoint_every:
+            self._checkpoint()
+
+    def _maybe_promote(self):
+        """
+        Migrate the flat index to the configured ANN index once it holds
+        `ann_threshold` vectors. Runs once; the result is checkpointed
+        immediately so the trained index survives restarts.
+        """
+        if self.index_type == "flat" or not index_factory.is_flat(self.index):
+            return
+        if self.index.ntotal < max(self.ann_threshold,
+                                   index_factory.min_train_size(self.index_type)):
+            return
+
+        from config import Config
+
+        print(f"[memory] Promoting {self.index.ntotal} vectors to {self.index_type}")
+        # readers keep searching the flat index while the new one trains;
+        # nothing else writes meanwhile, we are the ingestion thread
+        promoted = index_factory.migrate(
+            self.index, self.index_type, self.dimension, **self.index_params
+        )
+        index_factory.set_search_params(
+            promoted,
+            nprobe=Config.MEMORY_IVF_NPROBE,
+            ef_search=Config.MEMORY_HNSW_EF_SEARCH,
+        )
+        with self._index_lock.write():
+            self.index = promoted
+        self._checkpoint()
 
-    def _save(self):
-        """Persist metadata + index."""
-        with open(self.meta_path, "w", encoding="utf-8") as f:
-            json.dump(self.memory, f, indent=2)
-        faiss.write_index(self.index, self.index_path)
+    def _write(self, fn, *args):
+        """Run `fn` on the ingestion thread and wait for its result."""
+        return self._ingest.submit(fn, *args).result()
+
+    def checkpoint(self):
+        """
+        Compact the log into the index file, then truncate it.
+        Metadata rows are already committed to SQLite per batch; the
+        checkpoint only moves the `checkpoint_id` marker.
+        """
+        return self._write(self._checkpoint)
+
+    def _checkpoint(self):
+        # only the ingestion thread mutates the index, so writing it out
+        # needs no lock; concurrent searches are reads too
+        index_tmp = self.index_path + ".tmp"
+
+        faiss.write_index(self.index, index_tmp)
+        _fsync_path(index_tmp)
+        os.replace(index_tmp, self.index_path)
+        # the rename must be durable before the log is dropped
+        _fsync_dir(os.path.dirname(os.path.abspath(self.index_path)))
+
+        self.store.set_state("checkpoint_id", self.next_id)
+        self.log.truncate()
+
+    def _encode(self, texts, batch_size=None):
+        """
+        Encoder output for `texts`, served from the embedding cache where
+        possible; only the misses go through the model.
+        """
+        cached = self.embed_cache.get_many(texts)
+        missing = [i for i, vec in enumerate(cached) if vec is None]
+        if missing:
+            fresh = self.model.encode(
+                [texts[i] for i in missing],
+                batch_size=batch_size or len(missing),
+                convert_to_numpy=True,
+            )
+            self.embed_cache.put_many([texts[i] for i in missing], fresh)
+            for i, vec in zip(missing, fresh):
+                cached[i] = vec
+        return np.vstack(cached).astype("float32")
 
     def _embed(self, text):
-        return self.model.encode([text], convert_to_numpy=True)
+        return self._encode([text])
 
-    def _chunk_text(self, text, max_words=200):
-        """Split long text into chunks to avoid huge embeddings."""
-        words = text.split()
-        for i in range(0, len(words), max_words):
-            yield " ".join(words[i:i + max_words])
+    def _embed_batch(self, texts, batch_size=None):
+        """Encode many texts at once; returns an L2-normalized float32 matrix."""
+        embs = np.ascontiguousarray(self._encode(list(texts), batch_size))
+        faiss.normalize_L2(embs)
+        return embs
 
     """def add_document(self, url, text):
         
@@ -69,7 +254,7 @@ class VectorMemory:
         
         stored_chunks = []
 
-        for chunk in self._chunk_text(text):
+        for _, chunk in chunk_text(text):
             if self._is_duplicate(chunk):
                 continue
 
@@ -92,54 +277,236 @@ class VectorMemory:
         """
         chunks: List[(chunk_id, chunk_text)]
         """
+        return self.add_chunks_bulk(
+            [(url, chunk_id, chunk_text) for chunk_id, chunk_text in chunks]
+        )
+
+    def add_chunks_bulk(self, items, batch_size=None, threshold=0.90):
+        """
+        Queue a bulk ingestion on the ingestion thread and wait for it;
+        see _add_chunks_bulk. Safe to call from any number of threads.
+        """
+        return self._write(self._add_chunks_bulk, items, batch_size, threshold)
+
+    def _add_chunks_bulk(self, items, batch_size=None, threshold=0.90):
+        """
+        Bulk ingestion path for a whole research round.
+
+        items: List[(url, chunk_id, chunk_text)]
+
+        Documents and chunks that repeat stored or earlier ones are
+        dropped by fingerprint before anything is embedded. The rest are
+        embedded in batches of `batch_size` and deduplicated against the
+        index with a single search per batch, plus against the earlier
+        chunks of the same batch. Each stored batch is
+        appended to the log with one fsync; the index and metadata files
+        are only rewritten by threshold-triggered checkpoints.
+
+        Returns list of tuples: (memory_id, chunk_text) for stored chunks.
+        """
+        from config import Config
+
+        batch_size = batch_size or Config.EMBED_BATCH_SIZE
         stored_chunks = []
+        items, docs = self._drop_fingerprint_duplicates(items)
 
-        for chunk_id, chunk_text in chunks:
-            
-            emb = self._embed(chunk_text)
-            if self._is_duplicate(emb):
+        for start in range(0, len(items), batch_size):
+            batch = items[start:start + batch_size]
+            embs = self._embed_batch([text for _, _, text, _ in batch])
+            keep = ~self._duplicate_mask(embs, threshold)
+            if not keep.any():
                 continue
-            faiss.normalize_L2(emb)
-            self.index.add(emb)
 
-            self.memory.append({
-                "id": self.next_id,
-                "url": url,
-                "chunk": chunk_text,
-            })
+            records = []
+            for (url, _, chunk_text, fields), kept in zip(batch, keep):
+                if not kept:
+                    continue
+                records.append({
+                    "id": self.next_id,
+                    "url": url,
+                    "chunk": chunk_text,
+                    **fields,
+                    # the document's fingerprint rides on its first stored chunk
+                    **docs.pop(url, {}),
+                })
+                stored_chunks.append((self.next_id, chunk_text))
+                self.next_id += 1
 
-            stored_chunks.append((self.next_id, chunk_text))
-            self.next_id += 1
+            self._save(records, embs[keep])
+            # metadata first: any id a search can see has its row
+            self.store.add(records)
+            with self._index_lock.write():
+                self.index.add_with_ids(
+                    embs[keep], np.asarray([rec["id"] for rec in records], dtype="int64")
+                )
+            self._maybe_promote()
+            self._maybe_checkpoint()
 
-        self._save()
         return stored_chunks
 
+    def _drop_fingerprint_duplicates(self, items):
+        """
+        Pre-embedding dedup: drop every chunk of a document that mirrors
+        a stored or earlier document from another URL, then chunks that
+        repeat a stored or earlier chunk (exact or MinHash near match).
+
+        Returns ([(url, chunk_id, chunk_text, chunk fingerprint fields)],
+        {url: document fingerprint fields}) for what is left.
+        """
+        if not self.fingerprint_dedup:
+            return [(url, chunk_id, text, {}) for url, chunk_id, text in items], {}
+
+        by_url = {}
+        for item in items:
+            by_url.setdefault(item[0], []).append(item)
+        fps = {
+            url: fingerprints.fingerprint_document([text for _, _, text in doc_items])
+            for url, doc_items in by_url.items()
+        }
+
+        stored_docs = self.store.similar_documents(
+            [doc_fp for _, doc_fp in fps.values()], self.near_dup_jaccard
+        )
+        seen_docs = fingerprints.Matcher(self.near_dup_jaccard)
+        docs, candidates = {}, []
+        for (url, (chunk_fps, doc_fp)), mirrored in zip(fps.items(), stored_docs):
+            if mirrored == url:
+                mirrored = None  # a re-fetch; its chunks are checked below
+            mirrored = mirrored or seen_docs.match(doc_fp)
+            if mirrored is not None:
+                print(f"[memory] Skipping {url}: duplicate of {mirrored}")
+                continue
+            seen_docs.add(doc_fp, url)
+            docs[url] = {"doc_exact": doc_fp[0], "doc_minhash": doc_fp[1]}
+            for (_, chunk_id, text), (exact, minhash) in zip(by_url[url], chunk_fps):
+                candidates.append((url, chunk_id, text, {"exact": exact, "minhash": minhash}))
+
+        stored_chunks = self.store.similar_chunks(
+            [(f["exact"], f["minhash"]) for *_, f in candidates], self.near_dup_jaccard
+        )
+        seen_chunks = fingerprints.Matcher(self.near_dup_jaccard)
+        survivors = []
+        for candidate, duplicate_of in zip(candidates, stored_chunks):
+            fp = (candidate[3]["exact"], candidate[3]["minhash"])
+            if duplicate_of is None and seen_chunks.match(fp) is None:
+                seen_chunks.add(fp, len(survivors))
+                survivors.append(candidate)
+        return survivors, docs
+
+    def _duplicate_mask(self, embs, threshold=0.90):
+        """
+        Flag rows of a normalized embedding matrix that duplicate either
+        an indexed vector or an earlier row of the same matrix.
+        """
+        mask = np.zeros(len(embs), dtype=bool)
+
+        if self.index.ntotal > 0:
+            with self._index_lock.read():
+                scores, ids = self.index.search(embs, 1)  # nearest neighbor per row
+            hits = scores[:, 0] > threshold
+            if hits.any():
+                # vectors of deleted chunks may linger in HNSW; ignore them
+                live = self.store.existing(ids[hits, 0])
+                hits &= np.isin(ids[:, 0], list(live))
+            mask |= hits
+
+        # in-batch: greedy, earlier rows win
+        sims = embs @ embs.T
+        for i in range(1, len(embs)):
+            if mask[i]:
+                continue
+            earlier = sims[i, :i] > threshold
+            if (earlier & ~mask[:i]).any():
+                mask[i] = True
+        return mask
 
     def _is_duplicate(self, chunk_emb, threshold=0.90):
         """Detect duplicates via cosine similarity."""
-        if len(self.memory) < 1:
-            return False
-            
-        scores, _ = self.index.search(chunk_emb, 1)  # nearest neighbor
-        
-        if scores[0][0] > threshold:  
-            return True
-        return False
+        emb = np.array(chunk_emb, dtype="float32", copy=True)
+        faiss.normalize_L2(emb)
+        return bool(self._duplicate_mask(emb[:1], threshold)[0])
 
     def search(self, query, k=5):
+        results = self.search_many([query], k)[0]
+        print("FAISS index size:", self.index.ntotal)
+        return results
+
+    def search_many(self, queries, k=5):
+        """
+        Search several queries with one embedding batch and one index
+        search. Returns a result list per query, as from search().
+        """
+        embs = self._embed_batch(queries)
+        with self._index_lock.read():
+            scores, ids = self.index.search(embs, k)
+        rows = self.store.get({int(idx) for idx in ids.ravel() if idx >= 0})
+
         results = []
-        emb = self._embed(query)
+        for row_scores, row_ids in zip(scores, ids):
+            hits = []
+            for score, idx in zip(row_scores, row_ids):
+                m = rows.get(int(idx))
+                if m is None:
+                    continue
+                hits.append({
+                    "id": int(idx),
+                    "score": float(score),
+                    "url": m["url"],
+                    "chunk": m["chunk"]
+                })
+            results.append(hits)
+        return results
+
+    def vectors(self, ids):
+        """
+        Stored, normalized vectors for memory ids (as returned by search),
+        one row per id. Read back from the index where it can reconstruct;
+        otherwise (e.g. IVF) the chunks are re-embedded via the cache.
+        """
+        ids = [int(i) for i in ids]
+        if not ids:
+            return np.zeros((0, self.dimension), dtype="float32")
+        try:
+            with self._index_lock.read():
+                return np.vstack([self.index.reconstruct(i) for i in ids]).astype("float32")
+        except RuntimeError:
+            rows = self.store.get(ids)
+            return self._embed_batch([rows[i]["chunk"] for i in ids])
+
+    def warmup(self):
+        """Run the encoder and the index once, bypassing the cache."""
+        emb = np.asarray(self.model.encode(["warmup"], convert_to_numpy=True), dtype="float32")
         faiss.normalize_L2(emb)
-        scores, ids = self.index.search(emb, k)
-        for score, idx in zip(scores[0], ids[0]):
-            if idx < 0 or idx >= len(self.memory):
-                continue
-            m = self.memory[idx]
-            results.append({
-                "score": float(score),
-                "url": m["url"],
-                "chunk": m["chunk"]
-            })
-        print("FAISS index size:", self.index.ntotal)
-        print("Memory size:", len(self.memory))
-        return results
\ No newline at end of file
+        with self._index_lock.read():
+            self.index.search(emb, 1)
+
+    def known_urls(self, urls):
+        """URLs from `urls` that already have chunks in memory."""
+        return self.store.known_urls(urls)
+
+    def delete_url(self, url):
+        """
+        Forget every chunk from `url`. Returns the number removed.
+        Checkpoints so the log cannot replay the deleted rows.
+        """
+        return self._write(self._delete_url, url)
+
+    def _delete_url(self, url):
+        if self.log.entries:
+            # replaying logged chunks would bring the deleted rows back
+            self._checkpoint()
+        ids = self.store.delete_url(url)
+        if not ids:
+            return 0
+        try:
+            with self._index_lock.write():
+                self.index.remove_ids(np.asarray(ids, dtype="int64"))
+        except RuntimeError:
+            pass  # HNSW cannot remove; search and dedup skip orphan ids
+        self._checkpoint()
+        return len(ids)
+
+    def close(self):
+        """Finish queued ingestion and stop the ingestion thread."""
+        self._ingest.shutdown(wait=True)
+        self.store.close()
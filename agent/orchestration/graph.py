@@ -10,16 +10,32 @@ from agents.context_builder import context_builder_agent
 from agents.summarizer import summarizer_agent
 
 
-def build_graph():
+def open_memory():
+    """The shared memory server's client if configured, else a local VectorMemory."""
+    from config import Config
+
+    if Config.MEMORY_SERVER_URL:
+        from memory.client import RemoteVectorMemory
+        return RemoteVectorMemory(Config.MEMORY_SERVER_URL)
+    return VectorMemory()
+
+
+def build_graph(warm=False):
+    """
+    Compile the research graph. With `warm`, the embedding model runs
+    once up front so the first job doesn't pay for lazy initialization.
+    """
     graph = StateGraph(ResearchState)
     
-    vector_mem = VectorMemory()
+    vector_mem = open_memory()
+    if warm:
+        vector_mem.warmup()
     # nodes (UNCHANGED)
     graph.add_node("supervisor", supervisor_agent)
-    graph.add_node("research", research_agent)
+    graph.add_node("research", lambda state: research_agent(state, vector_mem))
     graph.add_node("memory", lambda state: memory_agent(state, vector_mem))
     graph.add_node("analysis", lambda state: analyst_agent(state, vector_mem))
-    graph.add_node("context", context_builder_agent)
+    graph.add_node("context", lambda state: context_builder_agent(state, vector_mem))
     graph.add_node("summarize", summarizer_agent)
 
     # entry
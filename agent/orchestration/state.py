@@ -13,6 +13,13 @@ class ResearchState(TypedDict):
     graph_results: List[Dict[str, Any]]
 
     final_context: str
+    context_report: Dict[str, int]  # see utils.context_budget.select_hits
     next_step: str
     analysis_decision: str
-    logs: List[str]
\ No newline at end of file
+    logs: List[str]
+
+    # per-job research budget (see agents/supervisor.py)
+    research_round: int
+    seen_urls: List[str]
+    bytes_fetched: int
+    started_at: float
\ No newline at end of file
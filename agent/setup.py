@@ -17,6 +17,7 @@ setup(
         "google-genai>=0.2.0",
         "requests>=2.31.0",
         "beautifulsoup4>=4.12.2",
+        "lxml>=4.9.0",
         "ddgs>=0.1.0",
         "PyMuPDF>=1.23.8",
         "faiss-cpu>=1.7.4",
@@ -26,4 +27,8 @@ setup(
         "spacy>=3.7.2",
         "python-multipart>=0.0.6",
     ],
+    extras_require={
+        # EMBEDDING_BACKEND=onnx / onnx-int8
+        "onnx": ["onnxruntime>=1.17", "tokenizers>=0.15"],
+    },
 )
@@ -0,0 +1,63 @@
+"""
+Shared pytest fixtures for the research agent.
+"""
+import hashlib
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Tests run from agent/, mirroring how api/main.py resolves imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+class StubEncoder:
+    """
+    Deterministic stand-in for SentenceTransformer.
+    Identical texts map to identical vectors; different texts are
+    near-orthogonal random vectors, so they never trip the dedup threshold.
+    """
+
+    def __init__(self, dimension=384):
+        self.dimension = dimension
+        self.calls = 0
+
+    def get_sentence_embedding_dimension(self):
+        return self.dimension
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True, **kwargs):
+        self.calls += 1
+        rows = []
+        for text in texts:
+            seed = int(hashlib.md5(text.encode("utf-8")).hexdigest()[:8], 16)
+            rows.append(np.random.default_rng(seed).standard_normal(self.dimension))
+        return np.asarray(rows, dtype="float32")
+
+
+@pytest.fixture
+def stub_encoder():
+    return StubEncoder()
+
+
+@pytest.fixture
+def memory_paths(tmp_path):
+    return {
+        "index_path": tmp_path / "memory.index",
+        "meta_path": tmp_path / "memory_store.json",
+        "db_path": tmp_path / "memory.sqlite",
+        "log_path": tmp_path / "memory.log",
+    }
+
+
+@pytest.fixture
+def make_memory(memory_paths, stub_encoder):
+    """Factory so a test can 'restart' the store on the same files."""
+    from memory.vector_memory import VectorMemory
+
+    def _make(**kwargs):
+        params = dict(memory_paths, model=stub_encoder, index_type="flat")
+        params.update(kwargs)
+        return VectorMemory(**params)
+
+    return _make
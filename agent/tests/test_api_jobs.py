@@ -0,0 +1,113 @@
+"""
+Tests for the research job endpoints, with a fake graph.
+"""
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+import api.main as api
+from api.job_executor import JobExecutor
+from api.job_store import MemoryJobStore
+
+
+class FakeGraph:
+    """Yields one state per node; blocks on `release` before the last."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.release.set()
+
+    def stream(self, state, config, stream_mode="values"):
+        yield dict(state, next_step="research")
+        self.release.wait(2)
+        yield dict(
+            state,
+            final_context="answer",
+            vector_results=[{"url": "https://a.example.com/x", "chunk": "c", "score": 0.9}],
+        )
+
+
+@pytest.fixture
+def client(monkeypatch):
+    graph = FakeGraph()
+    monkeypatch.setattr(api, "graph", graph)
+    monkeypatch.setattr(api, "executor", JobExecutor(workers=1, max_queue=1))
+    monkeypatch.setattr(api, "store", MemoryJobStore())
+    monkeypatch.setattr(api, "streams", {})
+    yield TestClient(api.app), graph
+    api.executor.shutdown()
+
+
+def wait_status(http, job_id, status):
+    for _ in range(200):
+        body = http.get(f"/api/jobs/{job_id}").json()
+        if body["status"] == status:
+            return body
+        threading.Event().wait(0.01)
+    raise AssertionError(body)
+
+
+def test_job_completes(client):
+    http, _ = client
+    job_id = http.post("/api/research", json={"query": "q"}).json()["job_id"]
+
+    body = wait_status(http, job_id, "completed")
+    assert body["result"] == "answer"
+    assert body["sources"][0]["url"] == "https://a.example.com/x"
+
+
+def test_full_queue_gets_429_and_delete_cancels(client):
+    http, graph = client
+    graph.release.clear()
+
+    running = http.post("/api/research", json={"query": "a"}).json()["job_id"]
+    wait_status(http, running, "processing")
+    queued = http.post("/api/research", json={"query": "b"}).json()
+    assert queued["queue_position"] == 1
+    assert http.post("/api/research", json={"query": "c"}).status_code == 429
+
+    assert http.delete(f"/api/jobs/{queued['job_id']}").status_code == 200
+    assert http.delete(f"/api/jobs/{running}").status_code == 200
+    assert http.get(f"/api/jobs/{running}").status_code == 404
+    graph.release.set()
+    api.executor._pool.shutdown(wait=True)
+    assert api.executor.stats()["running"] == 0
+
+
+def test_pagination_conversation_and_replay(client):
+    http, _ = client
+    first = http.post("/api/research", json={"query": "q"}).json()["job_id"]
+    conv = http.post("/api/conversation", json={"query": "topic"}).json()
+    for job_id in (first, conv["job_id"]):
+        wait_status(http, job_id, "completed")
+
+    page = http.get("/api/jobs", params={"offset": 0, "limit": 1}).json()
+    assert page["total"] == 2 and len(page["jobs"]) == 1
+    assert page["jobs"][0]["query"] == "topic"  # newest first
+
+    conversation_id = api.store.get_job(conv["job_id"])["conversation_id"]
+    messages = http.get(f"/api/conversations/{conversation_id}").json()["messages"]
+    assert [m["result"] for m in messages] == ["answer"]
+
+    # the token stream is gone once the job is done; the result is replayed
+    body = http.get(f"/api/jobs/{conv['job_id']}/stream").text
+    assert '"token": "answer"' in body and body.endswith("event: done\ndata: {}\n\n")
+    assert "answer" in http.get(f"/api/export/{conv['job_id']}").text
+
+
+def test_identical_query_joins_without_queueing(client):
+    http, graph = client
+    graph.release.clear()
+
+    first = http.post("/api/research", json={"query": "Same question"}).json()["job_id"]
+    wait_status(http, first, "processing")
+    joined = http.post("/api/research", json={"query": "same  question"}).json()
+    assert joined["status"] == "processing"
+    # the only worker is busy and nothing was queued
+    assert api.executor.stats()["queued"] == 0
+    assert http.post("/api/research", json={"query": "other"}).status_code == 200
+
+    graph.release.set()
+    body = wait_status(http, joined["job_id"], "completed")
+    assert body["result"] == "answer"
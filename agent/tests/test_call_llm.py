@@ -0,0 +1,97 @@
+"""
+Tests for the LLM response cache and the offline stub backend.
+"""
+import pytest
+
+from config import Config
+from tools import call_llm as llm
+from tools.llm_cache import ResponseCache
+
+
+@pytest.fixture
+def stub_llm(tmp_path, monkeypatch):
+    """call_llm wired to the stub backend and a fresh cache file."""
+    calls = []
+
+    def backend(prompt, model_name):
+        calls.append((prompt, model_name))
+        return llm._call_stub(prompt, model_name)
+
+    monkeypatch.setattr(Config, "LLM_BACKEND", "stub")
+    monkeypatch.setattr(Config, "LLM_CACHE_TTL", 60)
+    monkeypatch.setitem(llm.BACKENDS, "stub", backend)
+    monkeypatch.setattr(llm, "_cache", ResponseCache(tmp_path / "llm.sqlite", 60, 100))
+    return calls
+
+
+def test_repeat_prompt_served_from_cache(stub_llm):
+    first = llm.call_llm("summarize X", model="m1")
+    assert llm.call_llm("summarize X", model="m1") == first
+    assert len(stub_llm) == 1
+
+    # the model name is part of the key
+    llm.call_llm("summarize X", model="m2")
+    assert len(stub_llm) == 2
+
+
+def test_backend_is_part_of_the_key(stub_llm, monkeypatch):
+    llm.call_llm("summarize X", model="m1")
+
+    real = []
+    monkeypatch.setattr(Config, "LLM_BACKEND", "gemini")
+    monkeypatch.setitem(llm.BACKENDS, "gemini", lambda p, m: real.append(p) or "real answer")
+    # the stub's placeholder must not be served to the real backend
+    assert llm.call_llm("summarize X", model="m1") == "real answer"
+    assert real == ["summarize X"]
+
+
+def test_bypass_flag(stub_llm):
+    llm.call_llm("p", model="m")
+    llm.call_llm("p", model="m", use_cache=False)
+    assert len(stub_llm) == 2
+
+
+def test_ttl_and_size_bound(tmp_path):
+    cache = ResponseCache(tmp_path / "llm.sqlite", ttl=60, max_entries=2)
+    for i in range(3):
+        cache.put("m", f"p{i}", f"r{i}")
+    assert cache.get("m", "p0") is None
+    assert cache.get("m", "p2") == "r2"
+
+    expired = ResponseCache(tmp_path / "llm.sqlite", ttl=0, max_entries=2)
+    assert expired.get("m", "p2") is None
+
+
+def test_stub_needs_no_api_key(monkeypatch, tmp_path):
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    monkeypatch.setattr(Config, "LLM_BACKEND", "stub")
+    monkeypatch.setattr(llm, "_cache", ResponseCache(tmp_path / "llm.sqlite", 60, 10))
+    assert llm.call_llm("hello").startswith("[stub")
+    Config.validate()
+
+
+def test_stream_pieces_are_cached(stub_llm, monkeypatch):
+    streamed = []
+    monkeypatch.setitem(llm.STREAM_BACKENDS, "stub", lambda p, m: streamed.append(p) or iter(["a", "b", "c"]))
+
+    assert list(llm.call_llm_stream("p", model="m")) == ["a", "b", "c"]
+    # the completed stream is reused whole, by both paths
+    assert list(llm.call_llm_stream("p", model="m")) == ["abc"]
+    assert llm.call_llm("p", model="m") == "abc"
+    assert len(streamed) == 1 and not stub_llm
+
+
+def test_summarizer_relays_tokens(stub_llm):
+    from agents.summarizer import summarizer_agent
+    from utils.token_stream import TokenStream
+
+    sink = TokenStream()
+    state = summarizer_agent(
+        {"query": "q", "final_context": "ctx"}, {"configurable": {"token_sink": sink}}
+    )
+    sink.close()
+
+    events, closed = sink.read(0)
+    assert closed
+    assert "".join(text for kind, text in events if kind == "token") == state["final_context"]
+    assert state["final_context"].startswith("[stub")
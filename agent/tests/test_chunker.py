@@ -0,0 +1,68 @@
+"""
+Behaviour checks for the streaming, sentence-aware chunker.
+"""
+import inspect
+
+from memory.chunker import chunk_text, count_tokens
+
+
+def _sentences(n, words=9, start=0):
+    return [
+        " ".join([f"Sentence{i}"] + [f"w{i}x{j}" for j in range(words - 1)]) + "."
+        for i in range(start, start + n)
+    ]
+
+
+def test_is_lazy_and_numbers_chunks():
+    chunks = chunk_text(" ".join(_sentences(30)), max_tokens=40, overlap_tokens=0)
+
+    assert inspect.isgenerator(chunks)
+    assert [chunk_id for chunk_id, _ in chunks] == list(range(8))
+
+
+def test_chunks_end_on_sentences_within_limit():
+    text = " ".join(_sentences(30))
+    chunks = [chunk for _, chunk in chunk_text(text, max_tokens=45, overlap_tokens=0)]
+
+    assert all(count_tokens(chunk) <= 45 for chunk in chunks)
+    assert all(chunk.endswith(".") for chunk in chunks)
+    # nothing lost or reordered
+    assert " ".join(chunks) == text
+
+
+def test_mid_paragraph_cut_repeats_trailing_sentence():
+    sentences = _sentences(6)
+    chunks = [chunk for _, chunk in chunk_text(" ".join(sentences), max_tokens=30, overlap_tokens=10)]
+
+    assert chunks[0] == " ".join(sentences[:3])
+    assert chunks[1].startswith(sentences[2])
+
+
+def test_paragraph_end_closes_a_full_chunk_without_overlap():
+    first, second = _sentences(3), _sentences(3, start=3)
+    text = " ".join(first) + "\n\n" + " ".join(second)
+    chunks = [chunk for _, chunk in chunk_text(text, max_tokens=50, overlap_tokens=10)]
+
+    assert chunks == [" ".join(first), " ".join(second)]
+
+
+def test_short_paragraphs_are_merged():
+    text = "Intro\nFirst point here.\nSecond point here."
+    assert list(chunk_text(text, max_tokens=50, overlap_tokens=0)) == [
+        (0, "Intro First point here. Second point here.")
+    ]
+
+
+def test_overlong_sentence_is_split_at_words():
+    text = " ".join(f"w{i}" for i in range(100))
+    chunks = [chunk for _, chunk in chunk_text(text, max_tokens=30, overlap_tokens=5)]
+
+    assert all(count_tokens(chunk) <= 30 for chunk in chunks)
+    assert " ".join(chunks).split() == text.split()
+
+
+def test_custom_token_counter():
+    text = " ".join(_sentences(4))
+    chunks = list(chunk_text(text, max_tokens=2, overlap_tokens=0, count=lambda s: 1))
+
+    assert len(chunks) == 2
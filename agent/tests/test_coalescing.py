@@ -0,0 +1,152 @@
+"""
+Tests for coalescing identical in-flight research jobs.
+"""
+import threading
+import time
+
+from api.coalescing import ResearchCoalescer
+from api.job_executor import JobCancelled
+from utils.token_stream import TokenStream
+
+
+def tokens(stream):
+    events, _ = stream.read(0)
+    return "".join(text for kind, text in events if kind == "token")
+
+
+def test_identical_queries_share_one_run():
+    coalescer = ResearchCoalescer()
+    entered, release = threading.Event(), threading.Event()
+    runs = []
+
+    def graph_run(sink, should_stop):
+        runs.append(1)
+        sink.put("hello ")
+        entered.set()
+        release.wait(2)
+        sink.put("world")
+        return {"final_context": "hello world"}
+
+    streams = {name: TokenStream() for name in ("a", "b")}
+    results = {}
+
+    def job(name, query):
+        results[name] = coalescer.run(query, name, streams[name], lambda: False, graph_run)
+
+    first = threading.Thread(target=job, args=("a", "Quantum  Computing"))
+    first.start()
+    assert entered.wait(2)
+    second = threading.Thread(target=job, args=("b", " quantum computing"))
+    second.start()
+    while coalescer.stats()["coalesced"] < 1:
+        threading.Event().wait(0.01)
+    release.set()
+    first.join(2)
+    second.join(2)
+
+    assert len(runs) == 1
+    assert results["a"] == ({"final_context": "hello world"}, False)
+    assert results["b"] == ({"final_context": "hello world"}, True)
+    # the late joiner still sees the tokens emitted before it attached
+    assert tokens(streams["a"]) == tokens(streams["b"]) == "hello world"
+    assert coalescer.stats() == {"graph_runs": 1, "coalesced": 1, "in_flight": 0}
+
+
+def test_run_stops_only_when_every_member_cancels():
+    coalescer = ResearchCoalescer()
+    cancelled = {"a": threading.Event(), "b": threading.Event()}
+    checks = []
+
+    def graph_run(sink, should_stop):
+        while coalescer.stats()["coalesced"] < 1:
+            threading.Event().wait(0.01)
+        cancelled["a"].set()
+        checks.append(should_stop())
+        cancelled["b"].set()
+        checks.append(should_stop())
+        raise JobCancelled()
+
+    errors = []
+
+    def job(name):
+        try:
+            coalescer.run("q", name, None, cancelled[name].is_set, graph_run)
+        except JobCancelled:
+            errors.append(name)
+
+    threads = [threading.Thread(target=job, args=(name,)) for name in ("a", "b")]
+    threads[0].start()
+    while coalescer.stats()["in_flight"] < 1:
+        threading.Event().wait(0.01)
+    threads[1].start()
+    for t in threads:
+        t.join(2)
+
+    assert checks == [False, True]
+    assert sorted(errors) == ["a", "b"]
+
+
+def test_cancelled_follower_stops_waiting():
+    coalescer = ResearchCoalescer()
+    entered, release = threading.Event(), threading.Event()
+
+    def graph_run(sink, should_stop):
+        entered.set()
+        release.wait(5)
+        return {"final_context": "done"}
+
+    leader = threading.Thread(target=coalescer.run, args=("q", "a", None, lambda: False, graph_run))
+    leader.start()
+    assert entered.wait(2)
+    cancelled = threading.Event()
+    errors = []
+
+    def follower():
+        try:
+            coalescer.run("q", "b", None, cancelled.is_set, graph_run)
+        except JobCancelled:
+            errors.append("b")
+
+    waiting = threading.Thread(target=follower)
+    waiting.start()
+    start = time.monotonic()
+    cancelled.set()
+    waiting.join(2)
+
+    # returned while the leader is still running
+    assert errors == ["b"]
+    assert time.monotonic() - start < 2
+    assert coalescer.stats()["in_flight"] == 1
+    release.set()
+    leader.join(2)
+
+
+def test_join_attaches_without_a_worker():
+    coalescer = ResearchCoalescer()
+    entered, release = threading.Event(), threading.Event()
+    ended = []
+
+    def graph_run(sink, should_stop):
+        sink.put("partial ")
+        entered.set()
+        release.wait(2)
+        return {"final_context": "answer"}
+
+    assert not coalescer.join("q", "b", None, lambda: False, ended.append)
+
+    leader = threading.Thread(target=coalescer.run, args=("q", "a", None, lambda: False, graph_run))
+    leader.start()
+    assert entered.wait(2)
+    stream, joined = TokenStream(), []
+    assert coalescer.join(
+        " Q ", "b", stream, lambda: False,
+        lambda result, error: ended.append((result, error)), lambda: joined.append("b"),
+    )
+    assert joined == ["b"]
+    assert sorted(coalescer.job_ids()) == ["a", "b"]
+    release.set()
+    leader.join(2)
+
+    assert ended == [({"final_context": "answer"}, None)]
+    assert tokens(stream) == "partial "
+    assert coalescer.stats() == {"graph_runs": 1, "coalesced": 1, "in_flight": 0}
@@ -0,0 +1,65 @@
+"""
+Tests for token-budgeted, diversity-aware context selection.
+"""
+import numpy as np
+
+from utils.context_budget import build_context, estimate_tokens, select_hits
+
+
+def hit(url, chunk, score):
+    return {"url": url, "chunk": chunk, "score": score}
+
+
+def unit(*rows):
+    v = np.asarray(rows, dtype="float32")
+    return v / np.linalg.norm(v, axis=1, keepdims=True)
+
+
+def test_near_duplicates_dropped():
+    hits = [hit("a", "alpha one", 0.9), hit("b", "alpha two", 0.85), hit("c", "beta", 0.5)]
+    vectors = unit([1, 0, 0], [0.99, 0.05, 0], [0, 1, 0])
+
+    picked, report = select_hits(hits, vectors, dup_threshold=0.95)
+
+    assert [h["url"] for h in picked] == ["a", "c"]
+    assert report["kept"] == 2 and report["tokens_saved"] > 0
+
+
+def test_mmr_prefers_diverse_hit():
+    hits = [hit("a", "x1", 0.9), hit("b", "x2", 0.88), hit("c", "y", 0.8)]
+    vectors = unit([1, 0, 0], [0.9, 0.43, 0], [0, 0, 1])
+
+    picked, _ = select_hits(hits, vectors, dup_threshold=1.01, mmr_lambda=0.5)
+
+    assert [h["url"] for h in picked] == ["a", "c", "b"]
+
+
+def test_per_url_cap_and_exact_duplicates_without_vectors():
+    hits = [hit("a", f"chunk {i}", 0.9 - i / 100) for i in range(5)]
+    hits.append(hit("b", "chunk 0", 0.5))
+
+    picked, _ = select_hits(hits, max_per_url=2)
+
+    assert [h["chunk"] for h in picked] == ["chunk 0", "chunk 1"]
+
+
+def test_token_budget():
+    hits = [hit(str(i), str(i) * 400, 0.9) for i in range(10)]
+    text, report = build_context(hits, max_tokens=350, max_per_url=3,
+                                 dup_threshold=0.9, mmr_lambda=0.7)
+
+    assert report["kept"] == 3
+    assert report["tokens_out"] <= 350
+    assert report["tokens_in"] == 10 * estimate_tokens("[SOURCE]\n" + "w" * 400)
+    assert text.count("[SOURCE]") == 3
+
+
+def test_memory_vectors_match_search(make_memory):
+    vm = make_memory()
+    vm.add_chunks("https://a.example.com", [(0, "first text"), (1, "second text")])
+
+    hits = vm.search("first text", k=2)
+    vectors = vm.vectors(h["id"] for h in hits)
+
+    assert vectors.shape == (2, vm.dimension)
+    assert np.dot(vectors[0], vm._embed_batch(["first text"])[0]) > 0.99
@@ -0,0 +1,86 @@
+"""
+Tests for the embedding backends and model-driven dimensions.
+"""
+import numpy as np
+import pytest
+
+from tests.conftest import StubEncoder
+
+
+@pytest.fixture
+def onnx_model_dir(tmp_path):
+    """A toy 'transformer': token id -> fixed vector, plus a word-level tokenizer."""
+    onnx = pytest.importorskip("onnx")
+    pytest.importorskip("onnxruntime")
+    tokenizers = pytest.importorskip("tokenizers")
+    from onnx import TensorProto, helper, numpy_helper
+
+    vocab = {"[PAD]": 0, "[UNK]": 1, "alpha": 2, "beta": 3, "gamma": 4}
+    table = np.random.default_rng(0).standard_normal((len(vocab), 8)).astype("float32")
+    graph = helper.make_graph(
+        [helper.make_node("Gather", ["table", "input_ids"], ["last_hidden_state"])],
+        "toy",
+        [
+            helper.make_tensor_value_info("input_ids", TensorProto.INT64, ["batch", "seq"]),
+            helper.make_tensor_value_info("attention_mask", TensorProto.INT64, ["batch", "seq"]),
+        ],
+        [helper.make_tensor_value_info("last_hidden_state", TensorProto.FLOAT, ["batch", "seq", "dim"])],
+        [numpy_helper.from_array(table, "table")],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)], ir_version=8)
+    onnx.save(model, str(tmp_path / "model.onnx"))
+
+    tok = tokenizers.Tokenizer(tokenizers.models.WordLevel(vocab, unk_token="[UNK]"))
+    tok.pre_tokenizer = tokenizers.pre_tokenizers.Whitespace()
+    tok.save(str(tmp_path / "tokenizer.json"))
+    return tmp_path, vocab, table
+
+
+def test_onnx_embedder_mean_pools_and_normalizes(onnx_model_dir):
+    from memory.embedders import OnnxEmbedder
+
+    model_dir, vocab, table = onnx_model_dir
+    embedder = OnnxEmbedder(str(model_dir))
+
+    assert embedder.get_sentence_embedding_dimension() == 8
+    embs = embedder.encode(["alpha beta", "gamma", "alpha beta gamma gamma"], batch_size=3)
+
+    expected = table[[vocab["alpha"], vocab["beta"]]].mean(axis=0)
+    expected /= np.linalg.norm(expected)
+    assert np.allclose(embs[0], expected, atol=1e-5)
+    # padding in a mixed-length batch does not leak into the mean
+    assert np.allclose(embs[1], embedder.encode(["gamma"])[0], atol=1e-5)
+    assert np.allclose(np.linalg.norm(embs, axis=1), 1.0, atol=1e-5)
+
+
+def test_unknown_backend_and_missing_model_dir(tmp_path):
+    from memory.embedders import load_embedder
+
+    with pytest.raises(ValueError):
+        load_embedder("tensorflow", "all-MiniLM-L6-v2")
+    with pytest.raises(FileNotFoundError):
+        load_embedder("onnx", "all-MiniLM-L6-v2", tmp_path / "missing")
+
+
+def test_model_dir_must_match_model(onnx_model_dir):
+    import json
+    from memory.embedders import load_embedder
+
+    model_dir, _, _ = onnx_model_dir
+    with pytest.raises(ValueError):
+        load_embedder("onnx", "toy", model_dir)  # no export marker
+
+    (model_dir / "export.json").write_text(json.dumps({"model": "toy"}))
+    assert load_embedder("onnx", "toy", model_dir).get_sentence_embedding_dimension() == 8
+    with pytest.raises(ValueError):
+        load_embedder("onnx", "another-model", model_dir)
+
+
+def test_dimension_comes_from_model(make_memory):
+    vm = make_memory(model=StubEncoder(dimension=16))
+    vm.add_chunks_bulk([("u", 0, "a"), ("u", 1, "b")])
+    vm.checkpoint()
+    assert vm.dimension == 16 and vm.index.d == 16
+
+    with pytest.raises(ValueError, match="16-d"):
+        make_memory(model=StubEncoder(dimension=32))
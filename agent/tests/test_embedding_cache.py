@@ -0,0 +1,57 @@
+"""
+Tests for the content-hash embedding cache.
+"""
+import numpy as np
+
+from memory.embedding_cache import EmbeddingCache
+
+
+def _vec(x):
+    return np.full(4, x, dtype="float32")
+
+
+def test_lru_hits_misses_and_eviction():
+    cache = EmbeddingCache("m", max_items=2)
+    cache.put_many(["a", "b"], [_vec(1), _vec(2)])
+    cache.get_many(["a"])             # a is now most recent
+    cache.put_many(["c"], [_vec(3)])  # evicts b
+
+    found = cache.get_many(["a", "b", "c"])
+    assert found[1] is None
+    assert found[0][0] == 1 and found[2][0] == 3
+    assert cache.stats()["hits"] == 3
+    assert cache.stats()["misses"] == 1
+
+
+def test_key_includes_model_name():
+    assert EmbeddingCache("m1").key("text") != EmbeddingCache("m2").key("text")
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    path = tmp_path / "embed_cache.sqlite"
+    EmbeddingCache("m", disk_path=path).put_many(["a"], [_vec(7)])
+
+    fresh = EmbeddingCache("m", disk_path=path)
+    found = fresh.get_many(["a"])
+    assert found[0][0] == 7
+    assert fresh.stats()["disk_hits"] == 1
+
+
+def test_disk_tier_is_size_bounded(tmp_path):
+    cache = EmbeddingCache("m", disk_path=tmp_path / "c.sqlite", disk_max_items=3)
+    cache.DISK_PRUNE_EVERY = 1
+    cache.put_many([str(i) for i in range(5)], [_vec(i) for i in range(5)])
+
+    count = cache._disk.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+    assert count == 3
+
+
+def test_vector_memory_skips_encoder_for_repeats(make_memory, stub_encoder):
+    vm = make_memory()
+    vm.add_chunks_bulk([("u", 0, "a"), ("u", 1, "b")])
+    calls = stub_encoder.calls
+
+    vm.add_chunks_bulk([("u", 0, "a"), ("u", 1, "b")])
+    vm.search("a")
+    vm.search("a")
+    assert stub_encoder.calls == calls
@@ -0,0 +1,153 @@
+"""
+Tests for FetchWebTool fetching behaviour (no network access).
+"""
+import time
+
+from tools.fetch_web import FetchWebTool, HostRateLimiter
+
+
+def test_rate_limiter_spaces_same_host_only():
+    limiter = HostRateLimiter()
+    start = time.monotonic()
+    limiter.wait("https://a.example.com/1", 0.2)
+    limiter.wait("https://b.example.com/1", 0.2)
+    assert time.monotonic() - start < 0.1
+
+    limiter.wait("https://a.example.com/2", 0.2)
+    assert time.monotonic() - start >= 0.19
+
+
+def test_fetch_query_keeps_search_order(tmp_path, monkeypatch):
+    tool = FetchWebTool(raw_data_dir=str(tmp_path), concurrency=4)
+    urls = [f"https://site{i}.example.com" for i in range(6)]
+    monkeypatch.setattr(tool, "search", lambda query, n_results=10: urls)
+
+    def slow_fetch(url):
+        # later URLs finish first
+        time.sleep(0.01 * (len(urls) - urls.index(url)))
+        return {"url": url, "text": f"text of {url}", "truncated": False}
+
+    monkeypatch.setattr(tool, "fetch_document", slow_fetch)
+    pages = tool.fetch_query("q", n_results=6)
+
+    assert [p["url"] for p in pages] == urls
+    assert pages[2]["text"] == f"text of {urls[2]}"
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, text="", headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.content = text.encode("utf-8")
+        self.headers = headers or {}
+        self.encoding = "utf-8"
+        self.body_read = False
+
+    def iter_content(self, chunk_size=1):
+        self.body_read = True
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i:i + chunk_size]
+
+    def close(self):
+        pass
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+
+class FakeSession:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, url, timeout=None, headers=None, **kwargs):
+        self.requests.append(dict(headers or {}))
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+HTML = "<html><body><p>Hello research</p><script>x()</script></body></html>"
+
+
+def _tool(tmp_path, monkeypatch, session):
+    import tools.fetch_web as fetch_web
+
+    monkeypatch.setattr(fetch_web, "_http_session", lambda: session)
+    return FetchWebTool(raw_data_dir=str(tmp_path), rate_limit=0.001)
+
+
+def test_fresh_cache_entry_skips_network(tmp_path, monkeypatch):
+    session = FakeSession(FakeResponse(
+        text=HTML, headers={"Content-Type": "text/html", "ETag": '"v1"'}
+    ))
+    tool = _tool(tmp_path, monkeypatch, session)
+
+    assert tool.fetch_url("https://a.example.com") == "Hello research"
+    assert tool.fetch_url("https://a.example.com") == "Hello research"
+    assert len(session.requests) == 1
+
+
+def test_stale_entry_is_revalidated_with_304(tmp_path, monkeypatch):
+    session = FakeSession(
+        FakeResponse(text=HTML, headers={
+            "Content-Type": "text/html", "ETag": '"v1"', "Cache-Control": "max-age=0",
+        }),
+        FakeResponse(status_code=304, headers={"Cache-Control": "max-age=600"}),
+    )
+    tool = _tool(tmp_path, monkeypatch, session)
+
+    tool.fetch_url("https://a.example.com")
+    assert tool.fetch_url("https://a.example.com") == "Hello research"
+    assert session.requests[1]["If-None-Match"] == '"v1"'
+
+    meta = tool._read_meta("https://a.example.com", None)
+    assert meta["etag"] == '"v1"' and meta["ttl"] == 600
+
+
+def test_stale_entry_served_when_network_fails(tmp_path, monkeypatch):
+    session = FakeSession(
+        FakeResponse(text=HTML, headers={"Content-Type": "text/html", "Cache-Control": "max-age=0"}),
+        ConnectionError("offline"),
+    )
+    tool = _tool(tmp_path, monkeypatch, session)
+
+    tool.fetch_url("https://a.example.com")
+    assert tool.fetch_url("https://a.example.com") == "Hello research"
+
+
+def test_unsupported_type_rejected_before_body(tmp_path, monkeypatch):
+    video = FakeResponse(text="x" * 1000, headers={"Content-Type": "video/mp4"})
+    tool = _tool(tmp_path, monkeypatch, FakeSession(video))
+
+    assert tool.fetch_document("https://a.example.com/v.mp4")["text"] == ""
+    assert not video.body_read
+
+
+def test_oversized_html_is_truncated_and_reported(tmp_path, monkeypatch):
+    page = "<html><body>" + "<p>word</p>" * 20000 + "</body></html>"
+    session = FakeSession(FakeResponse(text=page, headers={"Content-Type": "text/html"}))
+    tool = _tool(tmp_path, monkeypatch, session)
+    tool.max_doc_bytes = 1000
+
+    doc = tool.fetch_document("https://a.example.com")
+    assert doc["truncated"]
+    assert 0 < len(doc["text"]) < 1000
+    assert tool.bytes_fetched == 1000
+
+    # the flag survives the cache
+    assert tool.fetch_document("https://a.example.com")["truncated"]
+
+
+def test_round_budget_stops_later_documents(tmp_path, monkeypatch):
+    session = FakeSession(
+        FakeResponse(text=HTML, headers={"Content-Type": "text/html"}),
+        FakeResponse(text=HTML, headers={"Content-Type": "text/html"}),
+    )
+    tool = _tool(tmp_path, monkeypatch, session)
+    tool.max_round_bytes = len(HTML)
+
+    assert tool.fetch_url("https://a.example.com") == "Hello research"
+    assert tool.fetch_url("https://b.example.com") == ""
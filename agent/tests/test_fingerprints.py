@@ -0,0 +1,53 @@
+"""
+Behaviour checks for the chunk / document fingerprints.
+"""
+import random
+
+from memory import fingerprints
+
+
+def _text(seed, words=200):
+    rng = random.Random(seed)
+    return " ".join(f"word{rng.randint(0, 5000)}" for _ in range(words))
+
+
+def _edited(text, edits, seed=0):
+    rng = random.Random(seed)
+    words = text.split()
+    for _ in range(edits):
+        words[rng.randrange(len(words))] = "edited"
+    return " ".join(words)
+
+
+def test_exact_hash_ignores_case_punctuation_and_spacing():
+    a = fingerprints.fingerprint("Mirrored pages, syndicated   articles!")
+    b = fingerprints.fingerprint("mirrored pages syndicated articles")
+    assert a[0] == b[0]
+
+
+def test_similarity_tracks_edits():
+    base = fingerprints.fingerprint(_text(1))[1]
+
+    assert fingerprints.similarity(base, fingerprints.fingerprint(_edited(_text(1), 3))[1]) >= 0.8
+    assert fingerprints.similarity(base, fingerprints.fingerprint(_text(2))[1]) < 0.2
+
+
+def test_short_texts_get_no_minhash():
+    assert fingerprints.fingerprint("home about contact")[1] is None
+
+
+def test_document_fingerprint_is_built_from_chunks():
+    chunks = [_text(1), _text(2)]
+    chunk_fps, doc = fingerprints.fingerprint_document(chunks)
+
+    assert chunk_fps == [fingerprints.fingerprint(c) for c in chunks]
+    assert doc == fingerprints.fingerprint_document([c.upper() for c in chunks])[1]
+
+
+def test_matcher_finds_exact_and_near_duplicates():
+    matcher = fingerprints.Matcher(threshold=0.8)
+    matcher.add(fingerprints.fingerprint(_text(1)), "first")
+
+    assert matcher.match(fingerprints.fingerprint(_text(1).upper())) == "first"
+    assert matcher.match(fingerprints.fingerprint(_edited(_text(1), 2))) == "first"
+    assert matcher.match(fingerprints.fingerprint(_text(3))) is None
@@ -0,0 +1,36 @@
+"""
+Tests for the HTML extractors.
+"""
+import pytest
+
+from tools.html_extract import EXTRACTORS, clean_text, get_extractor
+
+PAGE = """<html><head><title>Title</title><style>p {}</style></head>
+<body><nav>Menu</nav><header>Site</header>
+<h1>Heading</h1><p>First <b>bold</b> paragraph.</p><!-- note -->
+<script>track()</script><p>Second paragraph.</p>
+<footer>Copyright</footer></body></html>"""
+
+
+@pytest.mark.parametrize("name", sorted(EXTRACTORS))
+def test_extractors_keep_content_and_drop_chrome(name):
+    text = clean_text(EXTRACTORS[name](PAGE))
+
+    assert "First" in text and "bold" in text and "Second paragraph." in text
+    for noise in ("Menu", "Site", "track()", "Copyright", "note", "p {}"):
+        assert noise not in text
+
+
+def test_lxml_matches_reference_on_plain_page():
+    assert clean_text(EXTRACTORS["lxml"](PAGE)) == clean_text(EXTRACTORS["bs4"](PAGE))
+
+
+def test_lxml_handles_empty_and_declared_encoding():
+    assert EXTRACTORS["lxml"]("") == ""
+    declared = '<?xml version="1.0" encoding="ISO-8859-1"?><html><body><p>ok</p></body></html>'
+    assert "ok" in EXTRACTORS["lxml"](declared)
+
+
+def test_unknown_extractor_rejected():
+    with pytest.raises(ValueError):
+        get_extractor("regex")
@@ -0,0 +1,55 @@
+"""
+Tests for the bounded research job executor.
+"""
+import threading
+
+import pytest
+
+from api.job_executor import JobCancelled, JobExecutor, QueueFull
+
+
+def blocking_job(started, release, results, name):
+    def run(cancel):
+        started.set()
+        while not release.wait(0.01):
+            if cancel.is_set():
+                results.append(f"{name} cancelled")
+                raise JobCancelled()
+        results.append(name)
+    return run
+
+
+def test_queue_bound_and_positions():
+    executor = JobExecutor(workers=1, max_queue=2)
+    started, release, results = threading.Event(), threading.Event(), []
+
+    executor.submit("a", blocking_job(started, release, results, "a"))
+    assert started.wait(1)
+    executor.submit("b", lambda cancel: results.append("b"))
+    executor.submit("c", lambda cancel: results.append("c"))
+
+    assert executor.position("a") == 0
+    assert executor.position("b") == 1 and executor.position("c") == 2
+    with pytest.raises(QueueFull):
+        executor.submit("d", lambda cancel: None)
+    assert executor.stats() == {"workers": 1, "running": 1, "queued": 2, "max_queue": 2}
+
+    release.set()
+    executor.shutdown()
+    executor._pool.shutdown(wait=True)
+
+
+def test_cancel_queued_and_running():
+    executor = JobExecutor(workers=1, max_queue=5)
+    started, release, results = threading.Event(), threading.Event(), []
+
+    executor.submit("a", blocking_job(started, release, results, "a"))
+    assert started.wait(1)
+    executor.submit("b", lambda cancel: results.append("b"))
+
+    assert executor.cancel("b") == "cancelled"
+    assert executor.cancel("a") == "cancelling"
+    assert executor.cancel("missing") is None
+
+    executor._pool.shutdown(wait=True)
+    assert results == ["a cancelled"]
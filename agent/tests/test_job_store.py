@@ -0,0 +1,105 @@
+"""
+Tests for the job/conversation store backends.
+"""
+from types import SimpleNamespace
+
+import pytest
+
+from api import job_store
+from api.job_store import MemoryJobStore, SqliteJobStore
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemoryJobStore(max_jobs=100, ttl=60)
+    return SqliteJobStore(tmp_path / "jobs.sqlite", ttl=60)
+
+
+def test_job_lifecycle_and_pages(store):
+    for i in range(5):
+        store.create_job(f"j{i}", {"status": "queued", "query": f"q{i}"})
+    assert store.update_job("j1", status="completed", result="r")
+    assert store.get_job("j1") == {"status": "completed", "query": "q1", "result": "r"}
+
+    page, total = store.list_jobs(offset=1, limit=2)
+    assert total == 5
+    assert [job_id for job_id, _ in page] == ["j3", "j2"]
+
+    assert store.delete_job("j1")
+    assert store.get_job("j1") is None
+    assert not store.update_job("j1", status="error")
+    assert not store.delete_job("j1")
+
+
+def test_conversations(store):
+    assert store.get_conversation("c") is None
+    store.create_conversation("c")
+    assert store.get_conversation("c") == []
+    store.append_message("c", {"query": "a"})
+    store.append_message("c", {"query": "b"})
+    assert [m["query"] for m in store.get_conversation("c")] == ["a", "b"]
+
+
+def test_memory_lru_keeps_active_jobs():
+    store = MemoryJobStore(max_jobs=2, ttl=60)
+    store.create_job("running", {"status": "processing"})
+    store.create_job("old", {"status": "completed"})
+    store.create_job("new", {"status": "completed"})
+
+    assert store.get_job("running") is not None
+    assert store.get_job("old") is None
+    assert store.get_job("new") is not None
+
+
+def test_sqlite_survives_restart_and_ttl(tmp_path):
+    path = tmp_path / "jobs.sqlite"
+    SqliteJobStore(path, ttl=60).create_job("j", {"status": "completed"})
+
+    assert SqliteJobStore(path, ttl=60).get_job("j") == {"status": "completed"}
+    assert SqliteJobStore(path, ttl=0).get_job("j") is None
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_active_jobs_live_while_heartbeating(backend, tmp_path, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(job_store, "time", SimpleNamespace(time=lambda: clock[0]))
+    if backend == "memory":
+        store = MemoryJobStore(max_jobs=100, ttl=60, stale_after=30)
+    else:
+        store = SqliteJobStore(tmp_path / "jobs.sqlite", ttl=60, stale_after=30)
+    store.create_job("live", {"status": "processing"})
+    store.create_job("orphan", {"status": "processing"})
+    store.create_job("done", {"status": "completed"})
+
+    for _ in range(4):
+        clock[0] += 20
+        store.heartbeat(["live"])
+
+    # past the TTL: the heartbeating job is still served, the rest are not
+    assert store.get_job("live") == {"status": "processing"}
+    assert store.get_job("done") is None
+    assert store.get_job("orphan") is None
+    assert [job_id for job_id, _ in store.list_jobs()[0]] == ["live"]
+
+    # the worker goes away: interrupted and, being past the TTL, gone
+    clock[0] += 31
+    assert store.get_job("live") is None
+    assert store.list_jobs() == ([], 0)
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_stale_job_is_interrupted(backend, tmp_path, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(job_store, "time", SimpleNamespace(time=lambda: clock[0]))
+    if backend == "memory":
+        store = MemoryJobStore(max_jobs=100, ttl=600, stale_after=30)
+    else:
+        store = SqliteJobStore(tmp_path / "jobs.sqlite", ttl=600, stale_after=30)
+    store.create_job("j", {"status": "queued"})
+
+    clock[0] += 31
+    assert store.reap() == 1
+    job = store.get_job("j")
+    assert job["status"] == "error"
+    assert job["error"] == job_store.INTERRUPTED["error"]
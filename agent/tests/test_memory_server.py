@@ -0,0 +1,54 @@
+"""
+Tests for the shared vector-memory server and its drop-in client.
+"""
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+import memory.server as server
+from memory.client import RemoteVectorMemory
+
+
+@pytest.fixture
+def remote(make_memory, monkeypatch):
+    local = make_memory()
+    monkeypatch.setattr(server, "memory", local)
+    with TestClient(server.app) as http:
+        yield RemoteVectorMemory("http://testserver", session=http), local
+
+
+def test_client_matches_local_interface(remote):
+    client, local = remote
+
+    stored = client.add_chunks("https://a.example.com", [(0, "alpha"), (1, "beta")])
+    assert stored == [(0, "alpha"), (1, "beta")]
+    assert client.add_chunks_bulk([("https://b.example.com", 0, "alpha")]) == []
+
+    hits = client.search("alpha", k=2)
+    assert hits == local.search("alpha", k=2)
+    assert client.vectors([h["id"] for h in hits]).shape == (2, local.dimension)
+    assert client.known_urls(["https://a.example.com", "https://c.example.com"]) == {
+        "https://a.example.com"
+    }
+    assert client.embed_cache.stats()["size"] > 0
+
+    assert client.delete_url("https://a.example.com") == 2
+    assert client.search("alpha", k=2) == []
+
+
+def test_concurrent_searches_are_batched(make_memory):
+    local = make_memory()
+    local.add_chunks_bulk([("u", i, f"text {i}") for i in range(5)])
+    batcher = server.SearchBatcher(local, window=0.05, max_batch=64)
+
+    async def run():
+        batcher.start()
+        results = await asyncio.gather(*(batcher.search(f"text {i}", 1) for i in range(5)))
+        await batcher.stop()
+        return results
+
+    results = asyncio.run(run())
+
+    assert [r[0]["chunk"] for r in results] == [f"text {i}" for i in range(5)]
+    assert batcher.batches == 1 and batcher.queries == 5
@@ -0,0 +1,57 @@
+"""
+Tests for process-pool PDF parsing.
+"""
+import time
+
+import fitz
+import pytest
+
+from tools import pdf_parse
+from tools.pdf_parse import parse_pdf
+
+
+def _pdf(n_pages):
+    doc = fitz.open()
+    for i in range(n_pages):
+        doc.new_page().insert_text((72, 72), f"page {i} text")
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def test_split_parse_matches_single_range():
+    data = _pdf(12)
+    whole = parse_pdf(data, pages_per_task=100)
+    split = parse_pdf(data, pages_per_task=5)
+
+    assert split == whole
+    assert whole.index("page 0") < whole.index("page 11")
+
+
+def test_page_cap():
+    text = parse_pdf(_pdf(10), max_pages=3)
+
+    assert "page 2" in text
+    assert "page 3" not in text
+
+
+@pytest.mark.parametrize("data", [b"", b"not a pdf"])
+def test_invalid_pdf_returns_empty(data):
+    assert parse_pdf(data) == ""
+
+
+def _stuck_parse(content_bytes, start, stop):
+    time.sleep(60)
+
+
+def test_runaway_parse_is_stopped_and_pool_recovers(monkeypatch):
+    data = _pdf(2)
+    parse_pdf(data)  # start a worker so spawn time is not measured
+
+    monkeypatch.setattr(pdf_parse, "_parse_pages", _stuck_parse)
+    start = time.monotonic()
+    assert parse_pdf(data, timeout=1) == ""
+    assert time.monotonic() - start < 3
+
+    monkeypatch.undo()
+    assert "page 1" in parse_pdf(data)
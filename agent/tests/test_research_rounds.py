@@ -0,0 +1,76 @@
+"""
+Tests for incremental, budgeted research rounds.
+"""
+import time
+
+import agents.researcher as researcher
+from agents.supervisor import supervisor_agent
+from config import Config
+
+
+class FakeTool:
+    searches = []
+
+    def __init__(self):
+        self.max_round_bytes = 10_000
+        self.bytes_fetched = 0
+        self.fetched = []
+
+    def search(self, query, n_results=10):
+        FakeTool.searches.append(query)
+        return ["https://seen.example.com", "https://known.example.com", "https://new.example.com"]
+
+    def fetch_urls(self, urls):
+        self.fetched.extend(urls)
+        self.bytes_fetched += 500
+        return [{"url": u, "text": "research text " * 40, "truncated": False} for u in urls]
+
+
+class FakeMemory:
+    def known_urls(self, urls):
+        return {u for u in urls if "known" in u}
+
+
+def test_round_varies_query_and_skips_seen_and_known_urls(monkeypatch):
+    monkeypatch.setattr(researcher, "FetchWebTool", FakeTool)
+    FakeTool.searches = []
+    state = {"query": "graph neural networks", "seen_urls": ["https://seen.example.com"]}
+
+    state = researcher.research_agent(state, FakeMemory())
+    state = researcher.research_agent(state, FakeMemory())
+
+    assert FakeTool.searches[0] != FakeTool.searches[1]
+    assert state["research_round"] == 2
+    assert state["bytes_fetched"] == 1000
+    # the first round fetched new.example.com; the second had nothing new
+    assert [d["url"] for d in state["fetched_docs"]] == []
+    assert "https://new.example.com" in state["seen_urls"]
+
+
+def _analysed(**extra):
+    state = {"next_step": "research", "analysis_decision": "need_more_info",
+             "started_at": time.time(), "research_round": 1}
+    state.update(extra)
+    return state
+
+
+def test_supervisor_researches_again_within_budget():
+    assert supervisor_agent(_analysed())["next_step"] == "research"
+
+
+def test_supervisor_summarizes_when_rounds_spent():
+    state = _analysed(research_round=Config.MAX_RESEARCH_ROUNDS,
+                      vector_results=[{"chunk": "c", "url": "u", "score": 0.3}])
+    assert supervisor_agent(state)["next_step"] == "summarize"
+
+
+def test_supervisor_ends_when_time_spent_without_results():
+    state = supervisor_agent(_analysed(started_at=time.time() - Config.MAX_JOB_SECONDS - 1))
+    assert state["next_step"] == "end"
+    assert state["final_context"]
+
+
+def test_supervisor_stops_on_byte_budget():
+    state = _analysed(bytes_fetched=Config.MAX_JOB_BYTES,
+                      vector_results=[{"chunk": "c", "url": "u", "score": 0.3}])
+    assert supervisor_agent(state)["next_step"] == "summarize"
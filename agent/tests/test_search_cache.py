@@ -0,0 +1,95 @@
+"""
+Tests for the search-result cache and single-flight helper.
+"""
+import threading
+import time
+
+import pytest
+
+from tools.search_cache import SearchCache
+from utils.single_flight import SingleFlight
+
+
+def test_normalized_query_hits(tmp_path):
+    cache = SearchCache(tmp_path / "s.sqlite", ttl=60)
+    calls = []
+    search = lambda: calls.append(1) or ["https://a.example.com"]
+
+    cache.get_or_search("Academic  Research on X", "uk-en", 5, search)
+    urls = cache.get_or_search(" academic research on x ", "uk-en", 5, search)
+
+    assert urls == ["https://a.example.com"]
+    assert len(calls) == 1
+    # region and n_results are part of the key
+    cache.get_or_search("academic research on x", "us-en", 5, search)
+    cache.get_or_search("academic research on x", "uk-en", 10, search)
+    assert len(calls) == 3
+
+
+def test_ttl_and_shared_store(tmp_path):
+    path = tmp_path / "s.sqlite"
+    SearchCache(path, ttl=60).get_or_search("q", "uk-en", 5, lambda: ["u1"])
+
+    other_process = SearchCache(path, ttl=60)
+    assert other_process.get_or_search("q", "uk-en", 5, lambda: ["u2"]) == ["u1"]
+
+    expired = SearchCache(path, ttl=0)
+    assert expired.get_or_search("q", "uk-en", 5, lambda: ["u3"]) == ["u3"]
+
+
+def test_empty_results_not_cached(tmp_path):
+    cache = SearchCache(tmp_path / "s.sqlite", ttl=60)
+    cache.get_or_search("q", "uk-en", 5, lambda: [])
+    assert cache.get_or_search("q", "uk-en", 5, lambda: ["u"]) == ["u"]
+
+
+def test_concurrent_identical_searches_make_one_call(tmp_path):
+    cache = SearchCache(tmp_path / "s.sqlite", ttl=60)
+    calls = []
+
+    def slow_search():
+        calls.append(1)
+        time.sleep(0.2)
+        return ["u"]
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(
+            cache.get_or_search("q", "uk-en", 5, slow_search)))
+        for _ in range(5)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == [["u"]] * 5
+
+
+def test_single_flight_shares_errors():
+    flight = SingleFlight()
+    started = threading.Event()
+
+    def failing():
+        started.set()
+        time.sleep(0.1)
+        raise RuntimeError("boom")
+
+    errors = []
+
+    def follower():
+        started.wait()
+        try:
+            flight.do("k", lambda: "unused")
+        except RuntimeError as e:
+            errors.append(e)
+
+    t = threading.Thread(target=follower)
+    t.start()
+    with pytest.raises(RuntimeError):
+        flight.do("k", failing)
+    t.join()
+
+    assert len(errors) == 1
+    assert flight.stats() == {"executions": 1, "coalesced": 1}
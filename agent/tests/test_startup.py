@@ -0,0 +1,67 @@
+"""
+Startup cost: what importing the API pulls in, and time to ready.
+Timings are attached to the test report via record_property.
+"""
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+AGENT_DIR = Path(__file__).parent.parent
+
+HEAVY_MODULES = [
+    "faiss", "langgraph", "sentence_transformers", "torch",
+    "fitz", "ddgs", "bs4", "google.genai",
+]
+
+
+def test_api_import_defers_heavy_dependencies(record_property):
+    script = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        "import api.main\n"
+        "print(time.perf_counter() - start)\n"
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))\n"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", script], cwd=AGENT_DIR,
+        capture_output=True, text=True, check=True,
+    ).stdout.split("\n")
+
+    record_property("api_import_seconds", float(out[0]))
+    assert out[1] == ""
+
+
+def test_live_at_once_ready_after_warmup(monkeypatch, record_property):
+    import api.main as api
+    from config import Config
+
+    release = threading.Event()
+
+    def slow_build():
+        release.wait(5)
+        return object()
+
+    monkeypatch.setattr(Config, "LLM_BACKEND", "stub")
+    monkeypatch.setattr(Config, "WARMUP", True)
+    monkeypatch.setattr(api, "graph", None)
+    monkeypatch.setattr(api, "_build_graph", slow_build)
+    monkeypatch.setattr(api, "readiness", {"status": "starting", "ready_after": None, "error": None})
+    monkeypatch.setattr(api, "_started", time.monotonic())
+
+    with TestClient(api.app) as http:
+        assert http.get("/health/live").status_code == 200
+        assert http.get("/health/ready").status_code == 503
+
+        release.set()
+        for _ in range(500):
+            response = http.get("/health/ready")
+            if response.status_code == 200:
+                break
+            time.sleep(0.01)
+
+    assert response.status_code == 200
+    record_property("time_to_ready_seconds", response.json()["ready_after"])
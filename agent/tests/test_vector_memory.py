@@ -0,0 +1,356 @@
+"""
+Behaviour checks for VectorMemory ingestion, dedup and crash recovery.
+"""
+import pytest
+
+
+def _items(texts, url="https://example.com"):
+    return [(url, i, text) for i, text in enumerate(texts)]
+
+
+def test_bulk_returns_sequential_ids(make_memory):
+    vm = make_memory()
+    stored = vm.add_chunks_bulk(_items(["a", "b", "c"]))
+
+    assert stored == [(0, "a"), (1, "b"), (2, "c")]
+    assert vm.index.ntotal == 3
+    assert vm.next_id == 3
+
+
+def test_in_batch_duplicates_are_dropped(make_memory):
+    vm = make_memory()
+    stored = vm.add_chunks_bulk(_items(["a", "b", "a", "c", "b"]))
+
+    assert [text for _, text in stored] == ["a", "b", "c"]
+    assert vm.index.ntotal == 3
+
+
+def test_cross_batch_duplicates_are_dropped(make_memory):
+    vm = make_memory()
+    stored = vm.add_chunks_bulk(_items(["a", "b", "c", "a", "d", "b"]), batch_size=3)
+
+    assert [text for _, text in stored] == ["a", "b", "c", "d"]
+    assert [memory_id for memory_id, _ in stored] == [0, 1, 2, 3]
+
+
+def test_duplicates_of_earlier_calls_are_dropped(make_memory):
+    vm = make_memory()
+    vm.add_chunks_bulk(_items(["a", "b"]))
+    stored = vm.add_chunks("https://other.example.com", [(0, "b"), (1, "e")])
+
+    assert stored == [(2, "e")]
+
+
+def test_batching_embeds_once_per_batch(make_memory, stub_encoder):
+    vm = make_memory()
+    vm.add_chunks_bulk(_items([f"text {i}" for i in range(10)]), batch_size=4)
+
+    assert stub_encoder.calls == 3
+
+
+def test_search_returns_stored_chunk(make_memory):
+    vm = make_memory()
+    vm.add_chunks_bulk(_items(["alpha", "beta"]))
+    hits = vm.search("beta", k=1)
+
+    assert hits[0]["chunk"] == "beta"
+    assert hits[0]["score"] > 0.99
+
+
+def test_restart_replays_log(make_memory):
+    vm = make_memory()
+    vm.add_chunks_bulk(_items(["a", "b", "c"]))
+
+    restarted = make_memory()
+    assert restarted.index.ntotal == 3
+    assert restarted.next_id == 3
+    assert restarted.search("c", k=1)[0]["chunk"] == "c"
+
+
+def test_restart_after_checkpoint(make_memory):
+    vm = make_memory(checkpoint_every=2)
+    vm.add_chunks_bulk(_items(["a", "b", "c"]), batch_size=2)
+    # first batch checkpointed, second still in the log
+    assert vm.log.entries == 1
+
+    restarted = make_memory(checkpoint_every=2)
+    assert list(restarted.store.ids()) == [0, 1, 2]
+    assert restarted.index.ntotal == 3
+
+
+def test_torn_log_tail_does_not_swallow_next_batch(make_memory, memory_paths):
+    vm = make_memory()
+    vm.add_chunks_bulk(_items(["a", "b"]))
+    with open(memory_paths["log_path"], "a", encoding="utf-8") as f:
+        f.write('{"id": 2, "url": "https://exa')  # crash mid-write
+
+    restarted = make_memory()
+    stored = restarted.add_chunks_bulk(_items(["c", "d"]))
+    assert [memory_id for memory_id, _ in stored] == [2, 3]
+
+    again = make_memory()
+    assert list(again.store.ids()) == [0, 1, 2, 3]
+    assert again.index.ntotal == 4
+
+
+def test_corrupt_log_middle_raises(make_memory, memory_paths):
+    vm = make_memory()
+    vm.add_chunks_bulk(_items(["a"]))
+    with open(memory_paths["log_path"], "a", encoding="utf-8") as f:
+        f.write("not json\n")
+    vm.add_chunks_bulk(_items(["b"]))
+
+    with pytest.raises(ValueError):
+        make_memory()
+
+
+def _promoted_hnsw(make_memory, **kwargs):
+    vm = make_memory(index_type="hnsw", **kwargs)
+    vm.ann_threshold = 5
+    vm.add_chunks_bulk(_items([f"text {i}" for i in range(8)]), batch_size=4)
+    return vm
+
+
+def test_promotion_keeps_dedup_exact(make_memory):
+    import faiss
+    from memory import index_factory
+
+    # fingerprints off, so the repeats reach the embedding dedup
+    vm = _promoted_hnsw(make_memory, fingerprint_dedup=False)
+    assert isinstance(index_factory.unwrap(vm.index), faiss.IndexHNSW)
+
+    stored = vm.add_chunks_bulk(_items([f"text {i}" for i in range(8)]))
+    assert stored == []
+
+
+def test_index_ahead_of_checkpoint_is_trimmed(make_memory):
+    import faiss
+    from memory import index_factory
+
+    vm = _promoted_hnsw(make_memory)
+    vm.checkpoint()
+    # simulate a crash between the index rename and the checkpoint marker
+    vm.store.set_state("checkpoint_id", 6)
+
+    restarted = make_memory(index_type="ivf_flat")
+    assert isinstance(index_factory.unwrap(restarted.index), faiss.IndexHNSW)
+    assert sorted(index_factory.stored_ids(restarted.index)) == list(range(6))
+
+
+def test_delete_url_frees_ids_and_content(make_memory):
+    vm = make_memory()
+    vm.add_chunks_bulk(_items(["a", "b"], url="https://one.example.com"))
+    vm.add_chunks_bulk(_items(["c"], url="https://two.example.com"))
+
+    assert vm.delete_url("https://one.example.com") == 2
+    assert [hit["chunk"] for hit in vm.search("a", k=3)] == ["c"]
+
+    # ids are never reused, and the deleted text can be stored again
+    assert vm.add_chunks_bulk(_items(["a"])) == [(3, "a")]
+
+    restarted = make_memory()
+    assert list(restarted.store.ids()) == [2, 3]
+    assert restarted.index.ntotal == 2
+
+
+def test_delete_is_not_undone_by_log_replay(make_memory, monkeypatch):
+    vm = make_memory(checkpoint_every=1000)
+    vm.add_chunks_bulk(_items(["a", "b"], url="https://one.example.com"))
+    delete = vm.store.delete_url
+
+    def crash_after_delete(url):
+        delete(url)
+        raise RuntimeError("crash before the index is checkpointed")
+
+    monkeypatch.setattr(vm.store, "delete_url", crash_after_delete)
+    with pytest.raises(RuntimeError):
+        vm.delete_url("https://one.example.com")
+
+    assert list(make_memory().store.ids()) == []
+
+
+def test_close_closes_reader_connections(make_memory):
+    import sqlite3
+    import threading
+
+    vm = make_memory()
+    vm.add_chunks_bulk(_items(["a"]))
+    opened, closed, errors = threading.Event(), threading.Event(), []
+
+    def reader_thread():
+        reader = vm.store._reader()
+        opened.set()
+        closed.wait(2)
+        try:
+            reader.execute("SELECT 1")
+        except sqlite3.ProgrammingError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=reader_thread)
+    thread.start()
+    assert opened.wait(2)
+    vm.close()
+    closed.set()
+    thread.join(2)
+
+    assert errors
+
+
+def test_legacy_json_store_is_imported(make_memory, memory_paths, stub_encoder):
+    import json
+    import faiss
+
+    texts = ["a", "b", "c"]
+    legacy = faiss.IndexFlatIP(384)
+    embs = stub_encoder.encode(texts)
+    faiss.normalize_L2(embs)
+    legacy.add(embs)
+    faiss.write_index(legacy, str(memory_paths["index_path"]))
+    with open(memory_paths["meta_path"], "w", encoding="utf-8") as f:
+        json.dump([{"id": i, "url": "u", "chunk": t} for i, t in enumerate(texts)], f)
+
+    vm = make_memory()
+    assert vm.next_id == 3
+    assert vm.search("b", k=1)[0]["chunk"] == "b"
+    assert vm.add_chunks_bulk(_items(["b", "d"])) == [(3, "d")]
+
+
+def test_parallel_search_and_ingest_stay_consistent(make_memory):
+    import threading
+    from memory import index_factory
+
+    vm = make_memory(index_type="hnsw", checkpoint_every=40)
+    vm.ann_threshold = 60  # promote mid-run, under concurrent searches
+    writers, per_writer = 4, 30
+    texts = {w: [f"writer {w} chunk {i}" for i in range(per_writer)] for w in range(writers)}
+    stop = threading.Event()
+    errors = []
+
+    def ingest(w):
+        try:
+            for start in range(0, per_writer, 5):
+                vm.add_chunks_bulk(
+                    _items(texts[w][start:start + 5], url=f"https://w{w}.example.com"),
+                    batch_size=5,
+                )
+        except Exception as e:
+            errors.append(e)
+
+    def search():
+        try:
+            while not stop.is_set():
+                for w in range(writers):
+                    for hit in vm.search(texts[w][0], k=3):
+                        # the id -> metadata mapping must never drift
+                        if hit["score"] > 0.99:
+                            assert hit["chunk"] == texts[w][0]
+                            assert hit["url"] == f"https://w{w}.example.com"
+        except Exception as e:
+            errors.append(e)
+
+    readers = [threading.Thread(target=search) for _ in range(4)]
+    ingesters = [threading.Thread(target=ingest, args=(w,)) for w in range(writers)]
+    for t in readers + ingesters:
+        t.start()
+    for t in ingesters:
+        t.join(30)
+    stop.set()
+    for t in readers:
+        t.join(30)
+
+    assert not errors
+    total = writers * per_writer
+    assert vm.index.ntotal == len(vm.store) == total
+    assert sorted(index_factory.stored_ids(vm.index)) == list(range(total))
+    assert not index_factory.is_flat(vm.index)
+
+    restarted = make_memory(index_type="hnsw")
+    assert sorted(index_factory.stored_ids(restarted.index)) == list(range(total))
+    for w in range(writers):
+        assert restarted.search(texts[w][-1], k=1)[0]["chunk"] == texts[w][-1]
+
+
+@pytest.mark.parametrize("codec", ["fp16", "int8"])
+def test_compressed_codec_keeps_search_and_dedup(make_memory, codec):
+    vm = make_memory(codec=codec)
+    vm.add_chunks_bulk(_items(["alpha", "beta", "gamma"]))
+
+    assert vm.search("beta", k=1)[0]["chunk"] == "beta"
+    assert vm.add_chunks_bulk(_items(["alpha", "delta"])) == [(3, "delta")]
+
+
+def test_promotion_keeps_codec(make_memory):
+    from memory import index_factory
+
+    vm = make_memory(index_type="hnsw", codec="int8")
+    vm.ann_threshold = 5
+    vm.add_chunks_bulk(_items([f"text {i}" for i in range(8)]), batch_size=4)
+
+    assert index_factory.describe(vm.index)[:2] == ("hnsw", "int8")
+
+
+def test_migrate_index_file_preserves_ids(make_memory, memory_paths):
+    import os
+    from memory import index_factory
+    from memory.migrate_index import migrate_file
+
+    vm = make_memory(checkpoint_every=32)
+    vm.add_chunks_bulk(_items([f"text {i}" for i in range(40)]), batch_size=32)
+    vm.close()
+    path = str(memory_paths["index_path"])
+
+    report = migrate_file(path, "int8")
+    assert report["codec_before"] == "float32"
+    assert report["bytes_after"] < report["bytes_before"] / 2
+    assert os.path.exists(path + ".bak")
+
+    # the checkpointed batch comes from the converted file, the rest from the log
+    restarted = make_memory(codec="int8")
+    assert index_factory.describe(restarted.index)[1] == "int8"
+    assert sorted(index_factory.stored_ids(restarted.index)) == list(range(40))
+    assert restarted.search("text 1", k=1)[0]["chunk"] == "text 1"
+
+
+def _article(seed, words=120):
+    import random
+    rng = random.Random(seed)
+    return " ".join(rng.choice(["alpha", "beta", "gamma", "delta", "omega", "sigma", "kappa", "theta",
+                                "river", "stone", "cloud", "field"]) + str(rng.randint(0, 99))
+                    for _ in range(words))
+
+
+def test_mirrored_document_is_skipped_before_embedding(make_memory, stub_encoder):
+    vm = make_memory()
+    chunks = [_article(1), _article(2)]
+    vm.add_chunks("https://origin.example.com", list(enumerate(chunks)))
+    calls = stub_encoder.calls
+
+    # syndicated copy: same text, different case and one extra word
+    mirror = [chunks[0].upper(), chunks[1] + " extra"]
+    stored = vm.add_chunks("https://mirror.example.com", list(enumerate(mirror)))
+
+    assert stored == []
+    assert stub_encoder.calls == calls
+
+
+def test_near_duplicate_chunk_from_new_document_is_skipped(make_memory):
+    vm = make_memory()
+    original = _article(3)
+    vm.add_chunks("https://a.example.com", [(0, original)])
+
+    words = original.split()
+    words[60] = "changed"
+    stored = vm.add_chunks("https://b.example.com", [(0, _article(4)), (1, " ".join(words))])
+
+    assert [text for _, text in stored] == [_article(4)]
+
+
+def test_fingerprints_survive_restart_and_delete(make_memory):
+    vm = make_memory()
+    vm.add_chunks("https://a.example.com", [(0, _article(5))])
+
+    restarted = make_memory()
+    assert restarted.add_chunks("https://b.example.com", [(0, _article(5).lower())]) == []
+
+    restarted.delete_url("https://a.example.com")
+    assert len(restarted.add_chunks("https://b.example.com", [(0, _article(5))])) == 1
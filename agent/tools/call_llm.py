@@ -1,18 +1,98 @@
 # call_llm.py
 import os
+import hashlib
 import logging
-from typing import Optional
-import google.genai as genai
+import threading
+from typing import Iterator, Optional
+
+from tools.llm_cache import ResponseCache
 
 logger = logging.getLogger(__name__)
 
-def call_llm(prompt: str, model: Optional[str] = None) -> str:
+# process-wide pool: one client per API key, reused by every call
+_clients = {}
+_cache = None
+_lock = threading.Lock()
+
+
+def _gemini_client(api_key: str):
+    with _lock:
+        client = _clients.get(api_key)
+        if client is None:
+            import google.genai as genai
+            client = _clients[api_key] = genai.Client(api_key=api_key)
+        return client
+
+
+def _response_cache() -> ResponseCache:
+    global _cache
+    with _lock:
+        if _cache is None:
+            from config import Config
+            Config.LLM_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+            _cache = ResponseCache(
+                Config.LLM_CACHE_PATH, Config.LLM_CACHE_TTL, Config.LLM_CACHE_SIZE
+            )
+        return _cache
+
+
+def _call_gemini(prompt: str, model_name: str) -> str:
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        raise ValueError("GEMINI_API_KEY environment variable is not set")
+
+    client = _gemini_client(api_key)
+    response = client.models.generate_content(model=model_name, contents=prompt)
+    return response.text
+
+
+def _stream_gemini(prompt: str, model_name: str) -> Iterator[str]:
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        raise ValueError("GEMINI_API_KEY environment variable is not set")
+
+    client = _gemini_client(api_key)
+    for chunk in client.models.generate_content_stream(model=model_name, contents=prompt):
+        if chunk.text:
+            yield chunk.text
+
+
+def _call_stub(prompt: str, model_name: str) -> str:
+    """Offline backend: deterministic text derived from the prompt."""
+    digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+    return f"[stub {model_name}] response {digest}"
+
+
+def _stream_stub(prompt: str, model_name: str) -> Iterator[str]:
+    """The stub response, one word at a time."""
+    for i, word in enumerate(_call_stub(prompt, model_name).split(" ")):
+        yield word if i == 0 else " " + word
+
+
+BACKENDS = {
+    "gemini": _call_gemini,
+    "stub": _call_stub,
+}
+
+STREAM_BACKENDS = {
+    "gemini": _stream_gemini,
+    "stub": _stream_stub,
+}
+
+
+def _cache_model(model_name: str, backend: str) -> str:
+    """Cache namespace: backends answer differently, so never share entries."""
+    return model_name if backend == "gemini" else f"{model_name}@{backend}"
+
+
+def call_llm(prompt: str, model: Optional[str] = None, use_cache: bool = True) -> str:
     """
-    Call the Gemini LLM API.
+    Call the configured LLM backend (Gemini by default).
     
     Args:
         prompt: The prompt to send to the LLM
         model: Optional model name override
+        use_cache: Set False to bypass the response cache for this call
         
     Returns:
         The generated text response
@@ -21,16 +101,59 @@ def call_llm(prompt: str, model: Optional[str] = None) -> str:
         ValueError: If API key is not set
         Exception: If API call fails
     """
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key:
-        raise ValueError("GEMINI_API_KEY environment variable is not set")
-    
+    from config import Config
+
     model_name = model or os.getenv("LLM_MODEL", "gemini-2.5-pro")
-    
+    backend = BACKENDS[Config.LLM_BACKEND]
+    cache = _response_cache() if use_cache and Config.LLM_CACHE_TTL > 0 else None
+    cache_model = _cache_model(model_name, Config.LLM_BACKEND)
+
+    if cache is not None:
+        cached = cache.get(cache_model, prompt)
+        if cached is not None:
+            logger.info("LLM response served from cache")
+            return cached
+
     try:
-        client = genai.Client(api_key=api_key)
-        response = client.models.generate_content(model=model_name, contents=prompt)
-        return response.text
+        text = backend(prompt, model_name)
     except Exception as e:
         logger.error(f"Error calling LLM: {e}")
-        raise
\ No newline at end of file
+        raise
+
+    if cache is not None and text:
+        cache.put(cache_model, prompt, text)
+    return text
+
+
+def call_llm_stream(prompt: str, model: Optional[str] = None, use_cache: bool = True) -> Iterator[str]:
+    """
+    Like call_llm, but yields the response text in pieces as the model
+    produces them. A cached response is yielded as a single piece; a
+    completed stream is written to the cache.
+    """
+    from config import Config
+
+    model_name = model or os.getenv("LLM_MODEL", "gemini-2.5-pro")
+    backend = STREAM_BACKENDS[Config.LLM_BACKEND]
+    cache = _response_cache() if use_cache and Config.LLM_CACHE_TTL > 0 else None
+    cache_model = _cache_model(model_name, Config.LLM_BACKEND)
+
+    if cache is not None:
+        cached = cache.get(cache_model, prompt)
+        if cached is not None:
+            logger.info("LLM response served from cache")
+            yield cached
+            return
+
+    pieces = []
+    try:
+        for piece in backend(prompt, model_name):
+            pieces.append(piece)
+            yield piece
+    except Exception as e:
+        logger.error(f"Error streaming from LLM: {e}")
+        raise
+
+    text = "".join(pieces)
+    if cache is not None and text:
+        cache.put(cache_model, prompt, text)
@@ -1,35 +1,137 @@
 # Code for fetching data from the web
 import os
+import json
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
 import requests
-from bs4 import BeautifulSoup
-from ddgs import DDGS  
 import hashlib
 import re
-import fitz
+from tools.pdf_parse import parse_pdf
+from tools.html_extract import get_extractor, clean_text
+from tools.search_cache import SearchCache
+
+
+class HostRateLimiter:
+    """
+    Per-host politeness: consecutive requests to the same host are spaced
+    at least `interval` seconds apart, requests to different hosts are not
+    delayed at all. Shared by every FetchWebTool in the process.
+    """
+
+    def __init__(self):
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url, interval):
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+_host_limiter = HostRateLimiter()
+
+# process-wide cap on in-flight downloads, across all research jobs
+_fetch_slots = None
+_fetch_slots_lock = threading.Lock()
+
+
+_search = None
+_session = None
+_session_lock = threading.Lock()
+
+
+def _http_session():
+    """
+    Keep-alive session shared by every FetchWebTool, so TCP/TLS
+    connections are reused across URLs, rounds and jobs.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            from config import Config
+            from requests.adapters import HTTPAdapter
+            _session = requests.Session()
+            _session.headers["User-Agent"] = "Research Agent"
+            adapter = HTTPAdapter(
+                pool_connections=Config.FETCH_CONCURRENCY * 4,
+                pool_maxsize=Config.FETCH_CONCURRENCY,
+            )
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+        return _session
+
+
+def _search_cache():
+    """Process-wide search cache; backed by a file shared across workers."""
+    global _search
+    with _session_lock:
+        if _search is None:
+            from config import Config
+            Config.SEARCH_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+            _search = SearchCache(Config.SEARCH_CACHE_PATH, Config.SEARCH_CACHE_TTL)
+        return _search
+
+
+def _max_age(response):
+    """max-age from Cache-Control, or None."""
+    match = re.search(r"max-age=(\d+)", response.headers.get("Cache-Control", ""))
+    return int(match.group(1)) if match else None
+
+
+def _download_slots():
+    global _fetch_slots
+    with _fetch_slots_lock:
+        if _fetch_slots is None:
+            from config import Config
+            _fetch_slots = threading.BoundedSemaphore(Config.FETCH_CONCURRENCY)
+        return _fetch_slots
 
 
 class FetchWebTool:
     """
-    A tool for fetching data from the web using DuckDuckGo search and BeautifulSoup.
+    A tool for fetching data from the web using DuckDuckGo search and a
+    pluggable HTML extractor (lxml by default, BeautifulSoup as reference).
     Responsibilities:
       - Search the web for a query
       - Download raw HTML
       - Extract readable text
       - Store raw pages to disk
+      - Fetch pages concurrently, rate limited per host
+      - Stream bodies within per-document and per-round byte budgets
     """
 
-    def __init__(self, raw_data_dir=None, rate_limit=None):
+    def __init__(self, raw_data_dir=None, rate_limit=None, concurrency=None):
         from config import Config
         self.raw_data_dir = raw_data_dir or str(Config.RAW_DATA_DIR)
         self.rate_limit = rate_limit or Config.RATE_LIMIT
+        self.concurrency = concurrency or Config.FETCH_CONCURRENCY
+        self.cache_ttl = Config.RAW_CACHE_TTL
+        self.region = Config.SEARCH_REGION
+        self.extract_html = get_extractor(Config.HTML_EXTRACTOR)
+        self.max_doc_bytes = Config.FETCH_MAX_DOC_BYTES
+        self.max_round_bytes = Config.FETCH_MAX_ROUND_BYTES
+        self.bytes_fetched = 0  # downloaded by this tool, i.e. this round
+        self._bytes_lock = threading.Lock()
         os.makedirs(self.raw_data_dir, exist_ok=True)
 
     # Function to search on DuckDuckGo
     def search(self, query, n_results=10):
-        """Returns a list of URLs from DuckDuckGo search results."""
+        """Returns a list of URLs from DuckDuckGo search results (cached)."""
+        return _search_cache().get_or_search(
+            query, self.region, n_results,
+            lambda: self._search_ddgs(query, n_results),
+        )
+
+    def _search_ddgs(self, query, n_results):
+        from ddgs import DDGS
         with DDGS() as ddgs:
-            results = ddgs.text(query, region="uk-en", max_results=n_results)
+            results = ddgs.text(query, region=self.region, max_results=n_results)
             urls = [result["href"] for result in results if "href" in result]
         return urls 
     
@@ -46,91 +148,181 @@ class FetchWebTool:
         """Check if this URL has already been fetched."""
         filename = self._clean_url(url)
         return os.path.exists(os.path.join(self.raw_data_dir, filename))
-    
+
+    def _meta_path(self, url):
+        return os.path.join(self.raw_data_dir, self._clean_url(url) + ".meta.json")
+
+    def _read_meta(self, url, file_path):
+        """
+        Validators + freshness for a cached page:
+        {etag, last_modified, fetched_at, ttl}
+        Entries cached before metadata existed count as fetched at mtime.
+        """
+        try:
+            with open(self._meta_path(url), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"fetched_at": os.path.getmtime(file_path), "ttl": self.cache_ttl}
+
+    def _write_meta(self, url, response, previous=None, truncated=None):
+        previous = previous or {}
+        ttl = _max_age(response)
+        meta = {
+            # a 304 may omit validators; keep the ones we revalidated with
+            "etag": response.headers.get("ETag") or previous.get("etag"),
+            "last_modified": response.headers.get("Last-Modified") or previous.get("last_modified"),
+            "fetched_at": time.time(),
+            "ttl": self.cache_ttl if ttl is None else ttl,
+            "truncated": previous.get("truncated", False) if truncated is None else truncated,
+        }
+        with open(self._meta_path(url), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
     def fetch_url(self, url):
+        """Readable text of `url` ("" if unavailable)."""
+        return self.fetch_document(url)["text"]
 
+    def fetch_document(self, url):
+        """
+        Fetch one URL through the raw cache.
+        Returns {url, text, truncated}; truncated is True when the body
+        was cut at the per-document or per-round byte budget.
+        """
         filename = self._clean_url(url)
         file_path = os.path.join(self.raw_data_dir, filename)
+        doc = {"url": url, "text": "", "truncated": False}
 
+        cached = None
+        meta = None
+        headers = {}
         if self._already_downloaded(url):
             with open(file_path, "r", encoding="utf-8") as f:
-                return f.read()
+                cached = f.read()
+            meta = self._read_meta(url, file_path)
+            doc.update(text=cached, truncated=meta.get("truncated", False))
+            if time.time() - meta["fetched_at"] < meta["ttl"]:
+                return doc
+            # stale: revalidate instead of downloading again
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
 
+        _host_limiter.wait(url, self.rate_limit)
         try:
-            response = requests.get(
-                url,
-                timeout=12,
-                headers={"User-Agent": "Research Agent"}
-            )
-            response.raise_for_status()
+            with _download_slots():
+                response = _http_session().get(url, timeout=12, headers=headers, stream=True)
+                try:
+                    if response.status_code == 304 and cached is not None:
+                        self._write_meta(url, response, previous=meta)
+                        return doc
+                    response.raise_for_status()
+                    body = self._read_body(url, response)
+                finally:
+                    response.close()
 
         except Exception as e:
             print(f"[ERROR fetch] {url} -> {e}")
-            return ""
+            # a stale copy beats nothing
+            return doc
+
+        if body is None:
+            return {"url": url, "text": "", "truncated": False}
+        content, truncated = body
 
         text = ""
 
         ctype = response.headers.get("Content-Type", "").lower()
 
         if "text/html" in ctype:
-            soup = BeautifulSoup(response.text, "html.parser")
-
-            for tag in soup(["script","style","header","footer","nav"]):
-                tag.extract()
-
-            text = soup.get_text(separator="\n")
+            html = content.decode(response.encoding or "utf-8", errors="replace")
+            text = self.extract_html(html)
 
         elif "application/pdf" in ctype:
-            text = self.parse_pdf(response.content)
-
-        else:
-            print(f"[SKIP unsupported type] {ctype} -> {url}")
-            return ""
+            text = self.parse_pdf(content)
 
         # Safety guard
         if not text:
-            return ""
+            return {"url": url, "text": "", "truncated": truncated}
 
-        cleaned = "\n".join(
-            line.strip()
-            for line in text.splitlines()
-            if line.strip()
-        )
+        cleaned = clean_text(text)
 
         with open(file_path, "w", encoding="utf-8") as f:
             f.write(cleaned)
+        self._write_meta(url, response, truncated=truncated)
+
+        return {"url": url, "text": cleaned, "truncated": truncated}
+
+    def _read_body(self, url, response):
+        """
+        Stream the response body within the byte budgets.
+        Returns (bytes, truncated), or None when the document is skipped:
+        unsupported Content-Type (rejected before any body is read), a
+        PDF too large to parse whole, or an exhausted round budget.
+        """
+        ctype = response.headers.get("Content-Type", "").lower()
+        is_pdf = "application/pdf" in ctype
+        if not is_pdf and "text/html" not in ctype:
+            print(f"[SKIP unsupported type] {ctype} -> {url}")
+            return None
 
-        time.sleep(self.rate_limit)
-        return cleaned
+        length = response.headers.get("Content-Length")
+        if is_pdf and length and length.isdigit() and int(length) > self.max_doc_bytes:
+            # a truncated PDF cannot be parsed, so don't download it
+            print(f"[SKIP too large] {length} bytes -> {url}")
+            return None
+
+        chunks = []
+        size = 0
+        truncated = False
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            allowed = self._take_round_bytes(min(len(chunk), self.max_doc_bytes - size))
+            if allowed < len(chunk):
+                chunks.append(chunk[:allowed])
+                size += allowed
+                truncated = True
+                break
+            chunks.append(chunk)
+            size += len(chunk)
+
+        if truncated:
+            if is_pdf or size == 0:
+                print(f"[SKIP byte budget] {url}")
+                return None
+            print(f"[TRUNCATED] {url} at {size} bytes")
+        return b"".join(chunks), truncated
+
+    def _take_round_bytes(self, wanted):
+        """Reserve up to `wanted` bytes from this round's budget."""
+        with self._bytes_lock:
+            granted = max(0, min(wanted, self.max_round_bytes - self.bytes_fetched))
+            self.bytes_fetched += granted
+        return granted
 
 
     def fetch_query(self, query, n_results=10):
         """ Search + fetch URLs for a given input"""
-        urls = self.search(query, n_results=n_results)
-        pages = []
+        return self.fetch_urls(self.search(query, n_results=n_results))
+
+    def fetch_urls(self, urls):
+        """Fetch many URLs concurrently; results keep the order of `urls`."""
+        if self.concurrency > 1 and len(urls) > 1:
+            with ThreadPoolExecutor(max_workers=min(self.concurrency, len(urls))) as pool:
+                pages = list(pool.map(self.fetch_document, urls))
+        else:
+            pages = [self.fetch_document(url) for url in urls]
+
         print("\nSources fetched:")
         # Presenting a high level output of urls and their text  
-        for url in urls:
-            text = self.fetch_url(url)
-            if text:
-                print(f"- {url}")
-            pages.append({'url': url, 'text': text})
+        for page in pages:
+            if page["text"]:
+                print(f"- {page['url']}" + (" (truncated)" if page["truncated"] else ""))
         
         return pages
 
     def parse_pdf(self,content_bytes):
-
-        text = ""
-
-        try:
-            with fitz.open(stream=content_bytes, filetype="pdf") as doc:
-                for page in doc:
-                    text += page.get_text()
-
-        except Exception as e:
-            print("[PDF PARSE FAIL]", e)
-
-        return text
+        """Page-capped, time-limited PDF parse in the shared process pool."""
+        return parse_pdf(content_bytes)
 
 
 #if __name__ == "__main__":
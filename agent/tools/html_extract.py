@@ -0,0 +1,70 @@
+# HTML -> readable text extractors used by FetchWebTool
+import logging
+
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError:  # lxml is optional; bs4 still works without it
+    lxml = None
+
+logger = logging.getLogger(__name__)
+
+# navigation / chrome that is never part of the readable content
+NOISE_TAGS = ["script", "style", "header", "footer", "nav"]
+
+# extra boilerplate the fast path also drops
+BOILERPLATE_TAGS = NOISE_TAGS + ["noscript", "template", "aside", "form", "svg", "iframe"]
+
+
+def extract_bs4(html: str) -> str:
+    """Reference extractor: BeautifulSoup with the pure-Python parser."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+
+    for tag in soup(NOISE_TAGS):
+        tag.extract()
+
+    return soup.get_text(separator="\n")
+
+
+def extract_lxml(html: str) -> str:
+    """
+    Fast extractor: libxml2 parse, boilerplate elements stripped in C,
+    text nodes joined the same way as extract_bs4.
+    """
+    if not html.strip():
+        return ""
+    parser = lxml.html.HTMLParser(encoding="utf-8", remove_comments=True)
+    try:
+        root = lxml.html.document_fromstring(html.encode("utf-8"), parser=parser)
+    except (etree.ParserError, ValueError):
+        return ""
+
+    etree.strip_elements(root, *BOILERPLATE_TAGS, with_tail=False)
+    return "\n".join(root.itertext())
+
+
+EXTRACTORS = {
+    "bs4": extract_bs4,
+    "lxml": extract_lxml,
+}
+
+
+def get_extractor(name: str):
+    """Look up an extractor by name, falling back to bs4 if lxml is missing."""
+    if name not in EXTRACTORS:
+        raise ValueError(f"Unknown HTML extractor {name!r}; expected one of {list(EXTRACTORS)}")
+    if name == "lxml" and lxml is None:
+        logger.warning("lxml is not installed; using the bs4 HTML extractor")
+        return extract_bs4
+    return EXTRACTORS[name]
+
+
+def clean_text(text: str) -> str:
+    """Strip every line and drop the empty ones."""
+    return "\n".join(
+        line.strip()
+        for line in text.splitlines()
+        if line.strip()
+    )
@@ -0,0 +1,70 @@
+# Prompt-hash keyed cache for LLM responses
+import hashlib
+import sqlite3
+import threading
+import time
+
+
+class ResponseCache:
+    """
+    LLM responses keyed by sha256(model, prompt), stored in SQLite.
+    Capabilities:
+      - TTL expiry
+      - size-bounded: least recently used rows beyond `max_entries` are evicted
+      - hit/miss counters
+    """
+
+    def __init__(self, path, ttl, max_entries):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), check_same_thread=False, timeout=10)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, "
+            "created REAL NOT NULL, used REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    @staticmethod
+    def key(model, prompt):
+        h = hashlib.sha256()
+        h.update(model.encode("utf-8"))
+        h.update(b"\0")
+        h.update(prompt.encode("utf-8"))
+        return h.hexdigest()
+
+    def get(self, model, prompt):
+        key = self.key(model, prompt)
+        now = time.time()
+        with self._lock, self._db:
+            row = self._db.execute(
+                "SELECT response, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] >= self.ttl:
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE responses SET used = ? WHERE key = ?", (now, key))
+        self.hits += 1
+        return row[0]
+
+    def put(self, model, prompt, response):
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses(key, response, created, used) "
+                "VALUES (?, ?, ?, ?)",
+                (self.key(model, prompt), response, now, now),
+            )
+            self._db.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+            self._db.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
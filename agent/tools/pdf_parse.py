@@ -0,0 +1,171 @@
+# PDF text extraction in a pool of worker processes
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from multiprocessing.connection import wait
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _parse_pages(content_bytes, start, stop):
+    """Worker: text of pages [start, stop), assembled in one join."""
+    import fitz
+    with fitz.open(stream=content_bytes, filetype="pdf") as doc:
+        return "".join(doc[i].get_text() for i in range(start, stop))
+
+
+def _page_count(content_bytes):
+    import fitz
+    with fitz.open(stream=content_bytes, filetype="pdf") as doc:
+        return doc.page_count
+
+
+def _serve(conn):
+    """Worker process loop: run (fn, args) calls received on `conn`."""
+    while True:
+        try:
+            fn, args = conn.recv()
+        except EOFError:
+            return
+        try:
+            conn.send((True, fn(*args)))
+        except Exception as e:
+            # the exception itself may not pickle
+            conn.send((False, repr(e)))
+
+
+class _Worker:
+    """One spawned process, used by one page range at a time."""
+
+    def __init__(self, ctx):
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(target=_serve, args=(child,), daemon=True)
+        self.process.start()
+        child.close()
+
+    def kill(self):
+        self.process.terminate()
+        self.process.join(1)
+        self.conn.close()
+
+
+class _Pool:
+    """
+    Up to `size` worker processes, started on first use. A worker that
+    overruns its deadline is killed on its own and its slot respawns on
+    the next acquire, so other documents' parses are never interrupted.
+    """
+
+    def __init__(self, size):
+        # spawn: forking a threaded API process is not safe
+        self._ctx = multiprocessing.get_context("spawn")
+        # idle workers, or None for a slot with no process yet
+        self._idle = queue.LifoQueue()
+        for _ in range(size):
+            self._idle.put(None)
+
+    def acquire(self, block=True):
+        """An idle worker; None if `block` is False and none is free."""
+        try:
+            worker = self._idle.get(block)
+        except queue.Empty:
+            return None
+        if worker is None:
+            try:
+                worker = _Worker(self._ctx)
+            except Exception:
+                self._idle.put(None)
+                raise
+        return worker
+
+    def release(self, worker):
+        self._idle.put(worker)
+
+    def discard(self, worker):
+        """Kill a stuck or broken worker and free its slot."""
+        worker.kill()
+        self._idle.put(None)
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            from config import Config
+            _pool = _Pool(Config.PDF_WORKERS)
+        return _pool
+
+
+def parse_pdf(content_bytes, max_pages=None, timeout=None, pages_per_task=None):
+    """
+    Extract text from a PDF without blocking on the calling thread's CPU.
+
+    Only the first `max_pages` pages are read. Documents longer than
+    `pages_per_task` are split into page ranges parsed in parallel. A
+    range still running `timeout` seconds after a worker picked it up
+    (time spent waiting for a free worker does not count) has its worker
+    killed and replaced, and "" is returned.
+    """
+    from config import Config
+
+    max_pages = max_pages or Config.PDF_MAX_PAGES
+    timeout = timeout or Config.PDF_TIMEOUT
+    pages_per_task = pages_per_task or Config.PDF_PAGES_PER_TASK
+
+    try:
+        n_pages = min(_page_count(content_bytes), max_pages)
+    except Exception as e:
+        print("[PDF PARSE FAIL]", e)
+        return ""
+
+    ranges = [
+        (start, min(start + pages_per_task, n_pages))
+        for start in range(0, n_pages, pages_per_task)
+    ]
+
+    pool = _get_pool()
+    texts = [""] * len(ranges)
+    todo = list(enumerate(ranges))
+    running = {}  # conn -> (worker, range index, deadline)
+    try:
+        while todo or running:
+            # wait for a free worker only when none of ours is busy
+            while todo:
+                worker = pool.acquire(block=not running)
+                if worker is None:
+                    break
+                i, (start, stop) = todo.pop(0)
+                running[worker.conn] = (worker, i, time.monotonic() + timeout)
+                worker.conn.send((_parse_pages, (content_bytes, start, stop)))
+
+            next_deadline = min(deadline for _, _, deadline in running.values())
+            for conn in wait(list(running), timeout=max(0, next_deadline - time.monotonic())):
+                worker, i, _ = running.pop(conn)
+                try:
+                    ok, value = conn.recv()
+                except (EOFError, OSError):
+                    pool.discard(worker)
+                    raise RuntimeError("PDF worker process died")
+                pool.release(worker)
+                if not ok:
+                    raise RuntimeError(value)
+                texts[i] = value
+
+            now = time.monotonic()
+            if any(deadline <= now for _, _, deadline in running.values()):
+                logger.warning(f"PDF page range exceeded {timeout}s; replacing its worker")
+                return ""
+        return "".join(texts)
+
+    except Exception as e:
+        print("[PDF PARSE FAIL]", e)
+        return ""
+    finally:
+        # still mid-parse: a late reply would be read by the next range
+        for worker, _, _ in running.values():
+            pool.discard(worker)
@@ -0,0 +1,87 @@
+# TTL cache for web search results, shared across processes via SQLite
+import json
+import re
+import sqlite3
+import threading
+import time
+
+from utils.single_flight import SingleFlight
+
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive form of a search query."""
+    return re.sub(r"\s+", " ", query).strip().lower()
+
+
+class SearchCache:
+    """
+    Search results keyed by (normalized query, region, n_results).
+    Capabilities:
+      - TTL expiry
+      - SQLite backing store, so every worker process shares hits
+      - in-flight dedup: concurrent identical lookups in one process
+        make a single outbound search
+    """
+
+    def __init__(self, path, ttl):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._flight = SingleFlight()
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), check_same_thread=False, timeout=10)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS searches ("
+            "key TEXT PRIMARY KEY, urls TEXT NOT NULL, fetched_at REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    @staticmethod
+    def key(query, region, n_results):
+        return json.dumps([normalize_query(query), region, n_results])
+
+    def get_or_search(self, query, region, n_results, search_fn):
+        """Cached URLs for the search, calling `search_fn()` on a miss."""
+        key = self.key(query, region, n_results)
+        urls = self._get(key)
+        if urls is not None:
+            self.hits += 1
+            return urls
+
+        def fetch():
+            # a concurrent leader may have filled it since we looked
+            cached = self._get(key)
+            if cached is not None:
+                return cached
+            fresh = search_fn()
+            if fresh:  # an empty result is usually a transient failure
+                self._put(key, fresh)
+            return fresh
+
+        self.misses += 1
+        urls, _ = self._flight.do(key, fetch)
+        return list(urls)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, **self._flight.stats()}
+
+    def _get(self, key):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT urls, fetched_at FROM searches WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or time.time() - row[1] >= self.ttl:
+            return None
+        return json.loads(row[0])
+
+    def _put(self, key, urls):
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO searches(key, urls, fetched_at) VALUES (?, ?, ?)",
+                (key, json.dumps(urls), time.time()),
+            )
+            # opportunistic cleanup of expired rows
+            self._db.execute(
+                "DELETE FROM searches WHERE fetched_at < ?", (time.time() - self.ttl,)
+            )
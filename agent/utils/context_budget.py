@@ -0,0 +1,96 @@
+"""
+Token-budgeted, diversity-aware selection of the summarizer's context.
+"""
+import numpy as np
+
+# rough tokens-per-character ratio for English text under the usual
+# subword tokenizers; good enough for budgeting, no tokenizer needed
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def source_block(hit):
+    return f"[SOURCE]\n{hit.get('chunk', '')}"
+
+
+def select_hits(hits, vectors=None, max_tokens=6000, max_per_url=3,
+                dup_threshold=0.92, mmr_lambda=0.7):
+    """
+    Pick the hits to show the LLM, greedily by maximal marginal relevance:
+        mmr = lambda * score - (1 - lambda) * max cosine to already picked
+    A hit is dropped when it is a near-duplicate of a picked one (cosine
+    >= dup_threshold, or identical text without vectors), when its URL
+    already has `max_per_url` picks, or when it does not fit in what is
+    left of `max_tokens`.
+
+    `vectors` holds one normalized row per hit (e.g. VectorMemory.vectors);
+    without it only exact duplicates are caught and order is by score.
+    Returns (picked hits in pick order, report) where report is
+    {hits, kept, tokens_in, tokens_out, tokens_saved}.
+    """
+    costs = [estimate_tokens(source_block(h)) for h in hits]
+    tokens_in = sum(costs)
+
+    remaining = list(range(len(hits)))
+    # similarity of each candidate to its nearest pick so far
+    nearest = np.full(len(hits), -1.0)
+    per_url = {}
+    seen_text = set()
+    picked = []
+    budget = max_tokens
+
+    while remaining:
+        best = max(
+            remaining,
+            key=lambda i: mmr_lambda * hits[i]["score"] - (1 - mmr_lambda) * max(nearest[i], 0.0),
+        )
+        remaining.remove(best)
+        hit = hits[best]
+        url = hit.get("url", "")
+
+        if nearest[best] >= dup_threshold or hit.get("chunk") in seen_text:
+            continue
+        if per_url.get(url, 0) >= max_per_url or costs[best] > budget:
+            continue
+
+        picked.append(hit)
+        per_url[url] = per_url.get(url, 0) + 1
+        seen_text.add(hit.get("chunk"))
+        budget -= costs[best]
+        if vectors is not None and remaining:
+            sims = vectors[remaining] @ vectors[best]
+            nearest[remaining] = np.maximum(nearest[remaining], sims)
+
+    tokens_out = sum(estimate_tokens(source_block(h)) for h in picked)
+    report = {
+        "hits": len(hits),
+        "kept": len(picked),
+        "tokens_in": tokens_in,
+        "tokens_out": tokens_out,
+        "tokens_saved": tokens_in - tokens_out,
+    }
+    return picked, report
+
+
+def build_context(hits, vectors=None, graph_results=(), **limits):
+    """
+    [SOURCE] blocks for the selected hits plus any [GRAPH] lines.
+    `limits` default to the CONTEXT_* settings. Returns (text, report).
+    """
+    from config import Config
+
+    limits.setdefault("max_tokens", Config.CONTEXT_MAX_TOKENS)
+    limits.setdefault("max_per_url", Config.CONTEXT_MAX_PER_URL)
+    limits.setdefault("dup_threshold", Config.CONTEXT_DUP_THRESHOLD)
+    limits.setdefault("mmr_lambda", Config.CONTEXT_MMR_LAMBDA)
+
+    picked, report = select_hits(hits, vectors, **limits)
+    parts = [source_block(h) for h in picked]
+    parts += [
+        f"[GRAPH]\n{rel['source']} --{rel['relation']}--> {rel['target']}"
+        for rel in graph_results
+    ]
+    return "\n\n".join(parts), report
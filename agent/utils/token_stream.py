@@ -0,0 +1,50 @@
+"""
+Token buffer relaying LLM output from a worker thread to API readers.
+"""
+import threading
+
+
+class TokenStream:
+    """
+    Append-only event buffer filled by the summarizer and read by any
+    number of SSE clients, each from its own offset. Late readers replay
+    everything from the start.
+    Events:
+      ("token", text)  - next piece of the answer
+      ("reset", "")    - the attempt failed; drop what was shown so far
+    """
+
+    def __init__(self):
+        self._events = []
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def put(self, token):
+        with self._cond:
+            self._events.append(("token", token))
+            self._cond.notify_all()
+
+    def reset(self):
+        with self._cond:
+            self._events.append(("reset", ""))
+            self._cond.notify_all()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def read(self, offset, timeout=None):
+        """
+        Events after `offset`, blocking up to `timeout` seconds for new ones.
+        Returns (events, closed); closed means no more events will arrive.
+        """
+        with self._cond:
+            self._cond.wait_for(
+                lambda: len(self._events) > offset or self._closed, timeout
+            )
+            return self._events[offset:], self._closed
@@ -21,6 +21,7 @@ export default function Home() {
   const [jobStatus, setJobStatus] = useState<JobStatus | null>(null)
   const [isLoading, setIsLoading] = useState(false)
   const [error, setError] = useState<string | null>(null)
+  const [streamText, setStreamText] = useState('')
 
   const startResearch = async () => {
     if (!query.trim()) {
@@ -31,6 +32,7 @@ export default function Home() {
     setIsLoading(true)
     setError(null)
     setJobStatus(null)
+    setStreamText('')
 
     try {
       const response = await axios.post(`${API_URL}/api/research`, {
@@ -39,6 +41,7 @@ export default function Home() {
       })
       
       setJobId(response.data.job_id)
+      streamSummary(response.data.job_id)
       pollJobStatus(response.data.job_id)
     } catch (err: any) {
       setError(err.response?.data?.detail || 'Failed to start research')
@@ -46,6 +49,18 @@ export default function Home() {
     }
   }
 
+  // Show the summary as it is written instead of waiting for completion
+  const streamSummary = (id: string) => {
+    const source = new EventSource(`${API_URL}/api/jobs/${id}/stream`)
+    source.onmessage = (event) => {
+      const { token } = JSON.parse(event.data)
+      setStreamText((text) => text + token)
+    }
+    source.addEventListener('reset', () => setStreamText(''))
+    source.addEventListener('done', () => source.close())
+    source.onerror = () => source.close()
+  }
+
   const pollJobStatus = async (id: string) => {
     const pollInterval = setInterval(async () => {
       try {
@@ -151,6 +166,9 @@ export default function Home() {
               <h3 className="font-semibold text-blue-900">Processing...</h3>
             </div>
             <p className="text-blue-700 ml-8">{jobStatus.progress || 'Analyzing sources...'}</p>
+            {streamText && (
+              <div className="mt-4 ml-8 whitespace-pre-wrap text-gray-800">{streamText}</div>
+            )}
           </div>
         )}
 